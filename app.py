@@ -8,17 +8,34 @@ Aplicação principal do chatbot seguindo princípios SOLID e KISS
 - DIP: Dependência de abstrações, não implementações
 """
 
+import atexit
 import os
+from typing import TYPE_CHECKING, Optional
 from dotenv import load_dotenv
 from flask import Flask, render_template, send_from_directory
 from src.database.database_manager import DatabaseManager
+from src.database.monitor_sql import MonitorConsultas
 from src.database.consulta_repository import ConsultaRepository
 from src.database.conversa_repository import ConversaRepository
+from src.database.arquivo_historico import ArquivoHistorico
+from src.database.vaga_repository import VagaRepository
 from src.services.chatbot_service import ChatbotService
 from src.services.ai_service import AIService
-from src.services.whatsapp_service import WhatsAppService
+from src.services.event_bus import EventBus
+from src.services.publicador_estatisticas import PublicadorEstatisticas
+from src.services.rastreamento import Rastreador
+from src.services.snapshot_sessoes import SnapshotSessoes
+from src.services.expiracao_conversas import ExpiradorConversas
+from src.services.arquivamento_historico import ArquivadorHistorico
 from src.controllers.chatbot_controller import ChatbotController
-from src.controllers.whatsapp_controller import WhatsAppController
+from src.controllers.agenda_controller import AgendaController
+from src.controllers.eventos_controller import EventosController
+from src.controllers.cache_http import CacheRespostas
+from src.controllers.metricas_controller import MetricasController
+
+if TYPE_CHECKING:
+    from src.controllers.whatsapp_controller import WhatsAppController
+from src.controllers.admin_controller import AdminController
 
 # Carrega variáveis de ambiente
 load_dotenv()
@@ -29,31 +46,138 @@ def create_app() -> Flask:
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
     
     # Configuração das dependências (Dependency Injection)
-    db_manager = DatabaseManager()
-    consulta_repo = ConsultaRepository(db_manager)
-    conversa_repo = ConversaRepository(db_manager)
+    monitor_sql = MonitorConsultas(limiar_ms=float(os.getenv('SQL_LENTO_MS', '50')))
+    db_manager = DatabaseManager(os.getenv('DATABASE_PATH', 'chatbot.db'), monitor=monitor_sql)
+    vaga_repo = VagaRepository(db_manager, capacidade_padrao=int(os.getenv('CAPACIDADE_POR_PERIODO', '10')))
+    consulta_repo = ConsultaRepository(db_manager, vaga_repo)
+    diretorio_arquivo = os.getenv('ARQUIVO_HISTORICO_DIR')
+    arquivo_historico = ArquivoHistorico(diretorio_arquivo) if diretorio_arquivo else None
+    conversa_repo = ConversaRepository(db_manager, arquivo_historico)
     ai_service = AIService()
-    chatbot_service = ChatbotService(consulta_repo, conversa_repo, ai_service)
+    event_bus = EventBus()
+    chatbot_service = ChatbotService(consulta_repo, conversa_repo, ai_service, vaga_repo, event_bus)
+    app.extensions['snapshot_sessoes'] = restaurar_sessoes(chatbot_service)
+    aquecer_conversas(chatbot_service)
+    
+    # Expiração de conversas e arquivamento do histórico: as threads sobem no primeiro
+    # request do worker (threads criadas no master não sobrevivem ao fork do preload_app)
+    expirador = criar_expirador_conversas(conversa_repo, chatbot_service)
+    if expirador:
+        app.before_request(expirador.iniciar)
+    if arquivo_historico:
+        arquivador = ArquivadorHistorico(
+            conversa_repo,
+            float(os.getenv('ARQUIVAR_HISTORICO_DIAS', '90')),
+            intervalo=float(os.getenv('ARQUIVAR_HISTORICO_INTERVALO_SEGUNDOS', '3600'))
+        )
+        app.before_request(arquivador.iniciar)
+    
+    # Rastreamento amostrado de /mensagem e do webhook (veja /admin/traces)
+    limiar_trace = os.getenv('TRACE_SEMPRE_ACIMA_MS')
+    rastreador = Rastreador(
+        taxa_amostragem=float(os.getenv('TRACE_AMOSTRAGEM', '0.1')),
+        sempre_acima_ms=float(limiar_trace) if limiar_trace else None,
+        chave_hash=app.config['SECRET_KEY']
+    )
     
     # Controllers
-    chatbot_controller = ChatbotController(chatbot_service, consulta_repo, conversa_repo)
+    chatbot_controller = ChatbotController(chatbot_service, consulta_repo, conversa_repo, CacheRespostas(db_manager),
+                                           rastreador)
+    agenda_controller = AgendaController(vaga_repo)
+    # Com vários workers do Gunicorn o publicador sonda o banco (o barramento é por processo)
+    publicador = PublicadorEstatisticas(event_bus, consulta_repo, processos=int(os.getenv('WEB_CONCURRENCY', '1')))
+    eventos_controller = EventosController(event_bus, publicador)
+    metricas_controller = MetricasController()
+    admin_controller = AdminController(monitor_sql, rastreador)
     
     # WhatsApp service e controller (opcional, só se configurado)
-    whatsapp_controller = None
+    whatsapp_controller = criar_whatsapp_controller(chatbot_service, rastreador)
+    
+    # Registra as rotas
+    register_routes(app, chatbot_controller, whatsapp_controller, agenda_controller, eventos_controller,
+                    metricas_controller, admin_controller)
+    
+    return app
+
+def restaurar_sessoes(chatbot_service: ChatbotService) -> Optional[SnapshotSessoes]:
+    """Restaura o snapshot de sessões se SNAPSHOT_SESSOES estiver definido"""
+    caminho = os.getenv('SNAPSHOT_SESSOES')
+    if not caminho:
+        return None
+    
+    snapshot = SnapshotSessoes(caminho, chatbot_service, float(os.getenv('SNAPSHOT_SESSOES_IDADE_MAXIMA_HORAS', '24')))
+    restauradas = snapshot.restaurar()
+    print(f"♻️  {restauradas} sessão(ões) restaurada(s) de {caminho}")
+    return snapshot
+
+def salvar_sessoes(app: Flask, por_processo: bool = False):
+    """
+    Grava o snapshot de sessões da aplicação, se configurado
+    
+    Chamado no shutdown gracioso: hook worker_exit do gunicorn.conf.py (um
+    arquivo por worker, juntados na restauração) ou atexit no servidor de
+    desenvolvimento.
+    """
+    snapshot = app.extensions.get('snapshot_sessoes')
+    if not snapshot:
+        return
+    
+    try:
+        salvas = snapshot.salvar(por_processo)
+        destino = snapshot.arquivo_do_processo() if por_processo else snapshot.caminho
+        print(f"💾 {salvas} sessão(ões) gravada(s) em {destino}")
+    except OSError as e:
+        print(f"⚠️  Não foi possível gravar o snapshot de sessões: {e}")
+
+def aquecer_conversas(chatbot_service: ChatbotService):
+    """Pré-carrega as conversas recentes se AQUECER_CONVERSAS_HORAS estiver definido"""
+    horas = float(os.getenv('AQUECER_CONVERSAS_HORAS') or 0)
+    if horas <= 0:
+        return
+    
+    carregadas = chatbot_service.aquecer_cache(horas, int(os.getenv('AQUECER_CONVERSAS_LIMITE', '5000')))
+    print(f"🔥 {carregadas} conversa(s) ativa(s) nas últimas {horas:g}h carregadas no cache")
+
+def criar_expirador_conversas(conversa_repo: ConversaRepository,
+                              chatbot_service: ChatbotService) -> Optional[ExpiradorConversas]:
+    """Cria o expirador de conversas se EXPIRAR_CONVERSAS_HORAS estiver definido"""
+    ttl_horas = float(os.getenv('EXPIRAR_CONVERSAS_HORAS') or 0)
+    if ttl_horas <= 0:
+        return None
+    
+    return ExpiradorConversas(
+        conversa_repo,
+        chatbot_service,
+        ttl_horas,
+        intervalo=float(os.getenv('EXPIRAR_CONVERSAS_INTERVALO_SEGUNDOS', '300')),
+        arquivar=os.getenv('EXPIRAR_CONVERSAS_ARQUIVAR', '0') == '1'
+    )
+
+def criar_whatsapp_controller(chatbot_service: ChatbotService, rastreador: Rastreador) -> Optional['WhatsAppController']:
+    """
+    Cria a integração com o WhatsApp, se as variáveis do Twilio existirem
+    
+    O pacote twilio (e o requests, que ele usa) só é importado quando a
+    integração está configurada, o que encurta o boot dos workers sem WhatsApp.
+    """
     try:
-        whatsapp_service = WhatsAppService()
-        whatsapp_controller = WhatsAppController(whatsapp_service, chatbot_service)
+        if not all(os.getenv(variavel) for variavel in ('TWILIO_ACCOUNT_SID', 'TWILIO_AUTH_TOKEN', 'TWILIO_PHONE_NUMBER')):
+            raise ValueError("Configurações do Twilio não encontradas nas variáveis de ambiente")
+        
+        from src.services.whatsapp_service import WhatsAppService
+        from src.controllers.whatsapp_controller import WhatsAppController
+        
+        whatsapp_controller = WhatsAppController(WhatsAppService(), chatbot_service, rastreador)
         print("✅ WhatsApp integrado com sucesso!")
+        return whatsapp_controller
     except ValueError as e:
         print(f"⚠️  WhatsApp não configurado: {e}")
         print("💡 Configure as variáveis do Twilio no arquivo .env para usar WhatsApp")
-    
-    # Registra as rotas
-    register_routes(app, chatbot_controller, whatsapp_controller)
-    
-    return app
+        return None
 
-def register_routes(app: Flask, chatbot_controller: ChatbotController, whatsapp_controller: WhatsAppController = None):
+def register_routes(app: Flask, chatbot_controller: ChatbotController, whatsapp_controller: 'WhatsAppController' = None,
+                    agenda_controller: AgendaController = None, eventos_controller: EventosController = None,
+                    metricas_controller: MetricasController = None, admin_controller: AdminController = None):
     """Registra todas as rotas da aplicação"""
     
     # Rota para o dashboard web
@@ -78,6 +202,10 @@ def register_routes(app: Flask, chatbot_controller: ChatbotController, whatsapp_
     def consultas_usuario(user_id: str):
         return chatbot_controller.consultas_usuario(user_id)
     
+    @app.route('/historico/busca', methods=['GET'])
+    def buscar_historico():
+        return chatbot_controller.buscar_historico()
+    
     @app.route('/historico/<user_id>', methods=['GET'])
     def historico_conversa(user_id: str):
         return chatbot_controller.historico_conversa(user_id)
@@ -86,6 +214,14 @@ def register_routes(app: Flask, chatbot_controller: ChatbotController, whatsapp_
     def status_conversa(user_id: str):
         return chatbot_controller.status_conversa(user_id)
     
+    @app.route('/conversa/status/lote', methods=['POST'])
+    def status_conversas_lote():
+        return chatbot_controller.status_conversas_lote()
+    
+    @app.route('/conversas/ativas', methods=['GET'])
+    def conversas_ativas():
+        return chatbot_controller.conversas_ativas()
+    
     @app.route('/conversa/reiniciar/<user_id>', methods=['POST'])
     def reiniciar_conversa(user_id: str):
         return chatbot_controller.reiniciar_conversa(user_id)
@@ -94,6 +230,56 @@ def register_routes(app: Flask, chatbot_controller: ChatbotController, whatsapp_
     def estatisticas():
         return chatbot_controller.estatisticas()
     
+    @app.route('/estatisticas/serie', methods=['GET'])
+    def serie_consultas():
+        return chatbot_controller.serie_consultas()
+    
+    @app.route('/estatisticas/funil', methods=['GET'])
+    def funil_conversas():
+        return chatbot_controller.funil_conversas()
+    
+    @app.route('/estatisticas/duplicadas', methods=['GET'])
+    def consultas_duplicadas():
+        return chatbot_controller.consultas_duplicadas()
+    
+    # Rotas da agenda (capacidade por horário)
+    if agenda_controller:
+        @app.route('/vagas', methods=['GET'])
+        def disponibilidade_vagas():
+            return agenda_controller.disponibilidade()
+        
+        @app.route('/vagas/capacidade', methods=['POST'])
+        def capacidade_vagas():
+            return agenda_controller.definir_capacidade()
+    
+    # Stream de eventos para o dashboard (Server-Sent Events)
+    if eventos_controller:
+        @app.route('/eventos', methods=['GET'])
+        def eventos():
+            return eventos_controller.stream()
+    
+    # Métricas no formato Prometheus (latência por rota e por etapa do chatbot)
+    if metricas_controller:
+        metricas_controller.instrumentar(app)
+        
+        @app.route('/metrics', methods=['GET'])
+        def metrics():
+            return metricas_controller.exportar()
+    
+    # Diagnóstico (protegido por ADMIN_TOKEN, se definido)
+    if admin_controller:
+        @app.route('/admin/consultas-lentas', methods=['GET'])
+        def consultas_lentas():
+            return admin_controller.consultas_lentas()
+        
+        @app.route('/admin/consultas-lentas', methods=['DELETE'])
+        def limpar_consultas_lentas():
+            return admin_controller.limpar_consultas_lentas()
+        
+        @app.route('/admin/traces', methods=['GET'])
+        def traces():
+            return admin_controller.traces()
+    
     @app.route('/health', methods=['GET'])
     def health_check():
         return {'status': 'ok', 'message': 'Chatbot funcionando!'}
@@ -126,11 +312,24 @@ if __name__ == '__main__':
     print("\n📋 Endpoints disponíveis:")
     print("• POST /mensagem - Enviar mensagem para o chatbot")
     print("• GET /consultas - Listar todas as consultas")
+    print("• GET /consultas?nome= - Buscar consultas pelo nome do paciente (paginado)")
     print("• GET /consultas/<user_id> - Consultas de um usuário")
     print("• GET /historico/<user_id> - Histórico de conversa")
+    print("• GET /historico/busca?q= - Busca textual no histórico (paginada)")
     print("• GET /conversa/status/<user_id> - Status da conversa")
+    print("• POST /conversa/status/lote - Status de vários usuários de uma vez")
+    print("• GET /conversas/ativas - Conversas ativas por recência (paginado)")
     print("• POST /conversa/reiniciar/<user_id> - Reiniciar conversa")
     print("• GET /estatisticas - Estatísticas do sistema")
+    print("• GET /estatisticas/serie - Série de consultas por dia/semana/mês e período")
+    print("• GET /estatisticas/funil - Funil de agendamento (conversão por etapa)")
+    print("• GET /estatisticas/duplicadas - Relatório de consultas duplicadas")
+    print("• GET /vagas?data=&periodo= - Disponibilidade de horários")
+    print("• POST /vagas/capacidade - Configurar capacidade de um horário")
+    print("• GET /eventos - Stream de eventos do dashboard (SSE)")
+    print("• GET /metrics - Métricas no formato Prometheus")
+    print("• GET /admin/consultas-lentas - SQL mais custoso e lento (ADMIN_TOKEN)")
+    print("• GET /admin/traces - Traces amostrados em JSON OTLP (ADMIN_TOKEN)")
     print("• GET /health - Health check")
     print("• GET /config - Obter configurações atuais")
     
@@ -140,4 +339,6 @@ if __name__ == '__main__':
         print("• POST /webhook/whatsapp - Webhook para Twilio")
         print("• POST /whatsapp/enviar - Enviar mensagem direta")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Servidor de desenvolvimento - em produção use: gunicorn wsgi:app
+    atexit.register(salvar_sessoes, app)
+    app.run(debug=os.getenv('FLASK_DEBUG', '0') == '1', host='0.0.0.0', port=5000)
\ No newline at end of file
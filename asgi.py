@@ -0,0 +1,199 @@
+# asgi.py
+"""
+Variante ASGI (asyncio) da aplicação, sobre Quart
+
+Mesma arquitetura do app.py (repositories -> services -> controllers), com
+controllers assíncronos, acesso ao SQLite em um executor dedicado e cliente
+Twilio assíncrono. Um único processo mantém milhares de webhooks em espera
+sem ocupar uma thread por conexão.
+
+Cobre o caminho quente do chatbot (mensagens, webhook, consultas, histórico,
+status e estatísticas); dashboard e rotas administrativas continuam no app.py.
+
+Uso:
+    pip install quart uvicorn
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import os
+from typing import TYPE_CHECKING
+from dotenv import load_dotenv
+from quart import Quart
+from src.database.database_manager import DatabaseManager
+from src.database.consulta_repository import ConsultaRepository
+from src.database.conversa_repository import ConversaRepository
+from src.database.arquivo_historico import ArquivoHistorico
+from src.database.vaga_repository import VagaRepository
+from src.database.async_repositories import AsyncConsultaRepository, AsyncConversaRepository, criar_executor_banco
+from src.services.ai_service import AIService
+from src.services.chatbot_service import ChatbotService
+from src.services.async_chatbot_service import AsyncChatbotService
+from src.services.metricas import REGISTRO
+from src.services.snapshot_sessoes import SnapshotSessoes
+from src.services.expiracao_conversas import ExpiradorConversas
+from src.services.arquivamento_historico import ArquivadorHistorico
+from src.controllers.async_chatbot_controller import AsyncChatbotController
+
+if TYPE_CHECKING:
+    from src.controllers.async_whatsapp_controller import AsyncWhatsAppController
+
+# Carrega variáveis de ambiente
+load_dotenv()
+
+def create_async_app() -> Quart:
+    """Factory pattern para criar a aplicação ASGI"""
+    app = Quart(__name__)
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
+    
+    # Executor exclusivo do SQLite (chamadas bloqueantes fora do event loop)
+    executor = criar_executor_banco(int(os.getenv('ASGI_DB_THREADS', '4')))
+    
+    # Configuração das dependências (Dependency Injection)
+    db_manager = DatabaseManager(os.getenv('DATABASE_PATH', 'chatbot.db'))
+    vaga_repo = VagaRepository(db_manager, capacidade_padrao=int(os.getenv('CAPACIDADE_POR_PERIODO', '10')))
+    consulta_repo = ConsultaRepository(db_manager, vaga_repo)
+    diretorio_arquivo = os.getenv('ARQUIVO_HISTORICO_DIR')
+    conversa_repo = ConversaRepository(db_manager, ArquivoHistorico(diretorio_arquivo) if diretorio_arquivo else None)
+    chatbot_service = ChatbotService(consulta_repo, conversa_repo, AIService(), vaga_repo)
+    
+    # Snapshot de sessões e pré-carga das conversas recentes (mesma configuração do app WSGI)
+    snapshot_sessoes = None
+    if os.getenv('SNAPSHOT_SESSOES'):
+        snapshot_sessoes = SnapshotSessoes(os.getenv('SNAPSHOT_SESSOES'), chatbot_service,
+                                           float(os.getenv('SNAPSHOT_SESSOES_IDADE_MAXIMA_HORAS', '24')))
+        print(f"♻️  {snapshot_sessoes.restaurar()} sessão(ões) restaurada(s) de {snapshot_sessoes.caminho}")
+    
+    horas_aquecimento = float(os.getenv('AQUECER_CONVERSAS_HORAS') or 0)
+    if horas_aquecimento > 0:
+        carregadas = chatbot_service.aquecer_cache(horas_aquecimento, int(os.getenv('AQUECER_CONVERSAS_LIMITE', '5000')))
+        print(f"🔥 {carregadas} conversa(s) ativa(s) nas últimas {horas_aquecimento:g}h carregadas no cache")
+    
+    # Expiração de conversas e arquivamento do histórico (threads próprias, fora do event loop)
+    expirador = None
+    ttl_conversas = float(os.getenv('EXPIRAR_CONVERSAS_HORAS') or 0)
+    if ttl_conversas > 0:
+        expirador = ExpiradorConversas(conversa_repo, chatbot_service, ttl_conversas,
+                                       intervalo=float(os.getenv('EXPIRAR_CONVERSAS_INTERVALO_SEGUNDOS', '300')),
+                                       arquivar=os.getenv('EXPIRAR_CONVERSAS_ARQUIVAR', '0') == '1')
+    
+    arquivador = None
+    if diretorio_arquivo:
+        arquivador = ArquivadorHistorico(conversa_repo, float(os.getenv('ARQUIVAR_HISTORICO_DIAS', '90')),
+                                         intervalo=float(os.getenv('ARQUIVAR_HISTORICO_INTERVALO_SEGUNDOS', '3600')))
+    
+    async_chatbot = AsyncChatbotService(chatbot_service, executor)
+    chatbot_controller = AsyncChatbotController(
+        async_chatbot,
+        AsyncConsultaRepository(consulta_repo, executor),
+        AsyncConversaRepository(conversa_repo, executor)
+    )
+    
+    # WhatsApp service e controller (opcional, só se configurado)
+    whatsapp_controller = None
+    whatsapp_service = None
+    try:
+        # twilio/aiohttp só são importados com a integração configurada
+        if not all(os.getenv(variavel) for variavel in ('TWILIO_ACCOUNT_SID', 'TWILIO_AUTH_TOKEN', 'TWILIO_PHONE_NUMBER')):
+            raise ValueError("Configurações do Twilio não encontradas nas variáveis de ambiente")
+        
+        from src.services.async_whatsapp_service import AsyncWhatsAppService
+        from src.controllers.async_whatsapp_controller import AsyncWhatsAppController
+        whatsapp_service = AsyncWhatsAppService()
+        whatsapp_controller = AsyncWhatsAppController(whatsapp_service, async_chatbot)
+        print("✅ WhatsApp (assíncrono) integrado com sucesso!")
+    except ValueError as e:
+        print(f"⚠️  WhatsApp não configurado: {e}")
+    
+    @app.before_serving
+    async def iniciar():
+        if expirador:
+            expirador.iniciar()
+        if arquivador:
+            arquivador.iniciar()
+    
+    @app.after_serving
+    async def encerrar():
+        if expirador:
+            expirador.parar()
+        if arquivador:
+            arquivador.parar()
+        if whatsapp_service:
+            await whatsapp_service.fechar()
+        executor.shutdown(wait=True)
+        if snapshot_sessoes:
+            print(f"💾 {snapshot_sessoes.salvar()} sessão(ões) gravada(s) em {snapshot_sessoes.caminho}")
+    
+    register_async_routes(app, chatbot_controller, whatsapp_controller)
+    
+    return app
+
+def register_async_routes(app: Quart, chatbot_controller: AsyncChatbotController,
+                          whatsapp_controller: 'AsyncWhatsAppController' = None):
+    """Registra as rotas assíncronas da aplicação"""
+    
+    @app.route('/mensagem', methods=['POST'])
+    async def mensagem():
+        return await chatbot_controller.processar_mensagem()
+    
+    @app.route('/consultas', methods=['GET'])
+    async def listar_consultas():
+        return await chatbot_controller.listar_consultas()
+    
+    @app.route('/consultas/<user_id>', methods=['GET'])
+    async def consultas_usuario(user_id: str):
+        return await chatbot_controller.consultas_usuario(user_id)
+    
+    @app.route('/historico/busca', methods=['GET'])
+    async def buscar_historico():
+        return await chatbot_controller.buscar_historico()
+    
+    @app.route('/historico/<user_id>', methods=['GET'])
+    async def historico_conversa(user_id: str):
+        return await chatbot_controller.historico_conversa(user_id)
+    
+    @app.route('/conversa/status/<user_id>', methods=['GET'])
+    async def status_conversa(user_id: str):
+        return await chatbot_controller.status_conversa(user_id)
+    
+    @app.route('/conversa/status/lote', methods=['POST'])
+    async def status_conversas_lote():
+        return await chatbot_controller.status_conversas_lote()
+    
+    @app.route('/conversas/ativas', methods=['GET'])
+    async def conversas_ativas():
+        return await chatbot_controller.conversas_ativas()
+    
+    @app.route('/conversa/reiniciar/<user_id>', methods=['POST'])
+    async def reiniciar_conversa(user_id: str):
+        return await chatbot_controller.reiniciar_conversa(user_id)
+    
+    @app.route('/estatisticas', methods=['GET'])
+    async def estatisticas():
+        return await chatbot_controller.estatisticas()
+    
+    @app.route('/estatisticas/serie', methods=['GET'])
+    async def serie_consultas():
+        return await chatbot_controller.serie_consultas()
+    
+    @app.route('/estatisticas/funil', methods=['GET'])
+    async def funil_conversas():
+        return await chatbot_controller.funil_conversas()
+    
+    @app.route('/metrics', methods=['GET'])
+    async def metrics():
+        return REGISTRO.exportar(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+    
+    @app.route('/health', methods=['GET'])
+    async def health_check():
+        return {'status': 'ok', 'message': 'Chatbot funcionando!'}
+    
+    if whatsapp_controller:
+        @app.route('/webhook/whatsapp', methods=['POST'])
+        async def webhook_whatsapp():
+            return await whatsapp_controller.webhook_whatsapp()
+        
+        @app.route('/whatsapp/enviar', methods=['POST'])
+        async def enviar_whatsapp():
+            return await whatsapp_controller.enviar_mensagem_direta()
+
+app = create_async_app()
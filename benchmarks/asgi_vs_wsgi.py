@@ -0,0 +1,88 @@
+# benchmarks/asgi_vs_wsgi.py
+"""
+Teste de carga: caminho WSGI (Gunicorn) x ASGI (Uvicorn + Quart)
+
+Abre muitas conexões simultâneas com um cliente aiohttp e envia o fluxo de
+agendamento pelo POST /mensagem. Mede vazão, latência e erros em cada
+servidor, com banco SQLite temporário.
+
+Uso:
+    pip install gunicorn quart uvicorn
+    python benchmarks/asgi_vs_wsgi.py --conexoes 200 --duracao 10
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from wsgi_throughput import iniciar_servidor
+
+
+async def executar_carga(base_url: str, conexoes: int, duracao: float) -> dict:
+    """Mantém N usuários simultâneos percorrendo o fluxo de agendamento"""
+    latencias = []
+    erros = 0
+    fim = time.perf_counter() + duracao
+    conector = aiohttp.TCPConnector(limit=conexoes)
+    
+    async with aiohttp.ClientSession(connector=conector, timeout=aiohttp.ClientTimeout(total=60)) as sessao:
+        async def usuario(indice: int):
+            nonlocal erros
+            mensagens = ['iniciar', f'Paciente {indice}', f'{indice % 28 + 1:02d}/07/2030', 'tarde', 'nova']
+            passo = 0
+            while time.perf_counter() < fim:
+                inicio = time.perf_counter()
+                try:
+                    async with sessao.post(f'{base_url}/mensagem', json={
+                        'user_id': f'carga_{indice}', 'mensagem': mensagens[passo % len(mensagens)]
+                    }) as resposta:
+                        await resposta.read()
+                        if resposta.status >= 500:
+                            erros += 1
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    erros += 1
+                latencias.append(time.perf_counter() - inicio)
+                passo += 1
+        
+        await asyncio.gather(*(usuario(i) for i in range(conexoes)))
+    
+    latencias.sort()
+    total = len(latencias)
+    return {
+        'requisicoes': total,
+        'erros': erros,
+        'req_por_segundo': round(total / duracao, 1),
+        'p50_ms': round(latencias[total // 2] * 1000, 1) if total else None,
+        'p99_ms': round(latencias[int(total * 0.99)] * 1000, 1) if total else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--conexoes', type=int, default=200)
+    parser.add_argument('--duracao', type=float, default=10.0)
+    parser.add_argument('--porta', type=int, default=5098)
+    args = parser.parse_args()
+    
+    for tipo, rotulo in (('gunicorn', 'WSGI (gunicorn gthread)'), ('uvicorn', 'ASGI (uvicorn + quart)')):
+        with tempfile.TemporaryDirectory() as diretorio:
+            processo = iniciar_servidor(tipo, args.porta, diretorio)
+            try:
+                resultado = asyncio.run(executar_carga(f'http://127.0.0.1:{args.porta}', args.conexoes, args.duracao))
+            finally:
+                processo.terminate()
+                processo.wait()
+        
+        print(f"📊 {rotulo:<24} {resultado['req_por_segundo']:>8} req/s  "
+              f"p50={resultado['p50_ms']}ms  p99={resultado['p99_ms']}ms  "
+              f"erros={resultado['erros']}/{resultado['requisicoes']}")
+
+
+if __name__ == '__main__':
+    main()
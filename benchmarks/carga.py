@@ -0,0 +1,313 @@
+# benchmarks/carga.py
+"""
+Gerador de carga sintética e replay de conversas contra um servidor no ar
+
+Modo sintético: N usuários simultâneos percorrem o fluxo de agendamento
+(saudação, nome, data, período, nova) com tempo de digitação entre as
+mensagens e uma taxa de erros de digitação, pelo POST /mensagem e/ou pelo
+webhook do WhatsApp (form-urlencoded no formato enviado pela Twilio).
+
+Modo replay: reenvia conversas gravadas em historico_conversas, por usuário e
+na ordem original, respeitando os intervalos reais (acelerados por
+--velocidade). Aceita o próprio arquivo SQLite, um JSON (lista de linhas ou
+{user_id: [linhas]}, como o GET /historico/<user_id>) ou JSON Lines.
+
+O webhook só existe quando o servidor tem as variáveis TWILIO_* definidas
+(valores fictícios bastam: a resposta é TwiML, sem chamada à Twilio).
+
+Uso:
+    python benchmarks/carga.py --url http://localhost:5000 --usuarios 50 --duracao 60
+    python benchmarks/carga.py --canal webhook --pensar 3 --taxa-erros 0.1
+    python benchmarks/carga.py --replay chatbot.db --velocidade 20 --saida resultado.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sqlite3
+import time
+import uuid
+import zlib
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import aiohttp
+
+SAUDACOES = ['oi', 'olá', 'bom dia', 'boa tarde', 'iniciar', 'quero marcar uma consulta']
+NOMES = ['Ana Souza', 'Bruno Lima', 'Carla Dias', 'Diego Alves', 'Elisa Rocha', 'Fábio Nunes', 'Gabriela Reis']
+PERIODOS = ['manhã', 'manha', 'tarde', 'de manhã', 'pela tarde']
+ERRO_INTERNO_WEBHOOK = 'ocorreu um erro interno'
+TECLAS_VIZINHAS = 'qwertyuiopasdfghjklzxcvbnm'
+
+
+class Estatisticas:
+    """Latências e erros por canal"""
+    
+    def __init__(self):
+        self.latencias: Dict[str, List[float]] = defaultdict(list)
+        self.erros: Counter = Counter()
+        self.fluxos_concluidos = 0
+        self.inicio = time.perf_counter()
+    
+    def registrar(self, canal: str, duracao: float, erro: Optional[str] = None):
+        self.latencias[canal].append(duracao)
+        if erro:
+            self.erros[f'{canal}: {erro}'] += 1
+    
+    def resumo(self) -> dict:
+        duracao = time.perf_counter() - self.inicio
+        todas = sorted(latencia for lista in self.latencias.values() for latencia in lista)
+        total_erros = sum(self.erros.values())
+        return {
+            'duracao_s': round(duracao, 1),
+            'requisicoes': len(todas),
+            'req_por_segundo': round(len(todas) / duracao, 1) if duracao else 0.0,
+            'fluxos_concluidos': self.fluxos_concluidos,
+            'taxa_erros': round(total_erros / len(todas), 4) if todas else 0.0,
+            'erros': dict(self.erros.most_common()),
+            'geral': _percentis(todas),
+            'por_canal': {canal: _percentis(sorted(lista)) for canal, lista in self.latencias.items()}
+        }
+
+
+def _percentis(ordenadas: List[float]) -> dict:
+    if not ordenadas:
+        return {}
+    
+    def p(fracao: float) -> float:
+        return round(ordenadas[min(len(ordenadas) - 1, int(fracao * len(ordenadas)))] * 1000, 1)
+    
+    return {'n': len(ordenadas), 'p50_ms': p(0.50), 'p95_ms': p(0.95), 'p99_ms': p(0.99), 'max_ms': p(1.0)}
+
+
+def com_erro_digitacao(texto: str, taxa: float, rng: random.Random) -> str:
+    """Troca, omite, duplica ou substitui um caractere com probabilidade `taxa`"""
+    if len(texto) < 2 or rng.random() >= taxa:
+        return texto
+    
+    i = rng.randrange(len(texto) - 1)
+    tipo = rng.choice(('trocar', 'omitir', 'duplicar', 'vizinha'))
+    if tipo == 'trocar':
+        return texto[:i] + texto[i + 1] + texto[i] + texto[i + 2:]
+    if tipo == 'omitir':
+        return texto[:i] + texto[i + 1:]
+    if tipo == 'duplicar':
+        return texto[:i] + texto[i] + texto[i:]
+    return texto[:i] + rng.choice(TECLAS_VIZINHAS) + texto[i + 1:]
+
+
+def roteiro_agendamento(rng: random.Random, taxa_erros: float) -> List[str]:
+    """Mensagens de uma conversa completa de agendamento"""
+    dia, mes = rng.randint(1, 28), rng.randint(1, 12)
+    data = rng.choice([f'{dia:02d}/{mes:02d}/2030', f'{dia}/{mes}/2030', f'{dia:02d}-{mes:02d}-2030'])
+    mensagens = [rng.choice(SAUDACOES), rng.choice(NOMES), data, rng.choice(PERIODOS), 'nova']
+    # Datas e períodos com erro de digitação exercitam os caminhos de validação
+    return [com_erro_digitacao(mensagem, taxa_erros, rng) for mensagem in mensagens]
+
+
+class Cliente:
+    """Envia uma mensagem pelo canal escolhido e mede a resposta"""
+    
+    def __init__(self, sessao: aiohttp.ClientSession, url: str, estatisticas: Estatisticas, numero_twilio: str):
+        self.sessao = sessao
+        self.url = url.rstrip('/')
+        self.estatisticas = estatisticas
+        self.numero_twilio = numero_twilio
+    
+    async def enviar(self, canal: str, user_id: str, mensagem: str):
+        inicio = time.perf_counter()
+        erro = None
+        try:
+            if canal == 'webhook':
+                erro = await self._webhook(user_id, mensagem)
+            else:
+                erro = await self._mensagem(user_id, mensagem)
+        except asyncio.TimeoutError:
+            erro = 'timeout'
+        except aiohttp.ClientError as e:
+            erro = type(e).__name__
+        self.estatisticas.registrar(canal, time.perf_counter() - inicio, erro)
+    
+    async def _mensagem(self, user_id: str, mensagem: str) -> Optional[str]:
+        async with self.sessao.post(f'{self.url}/mensagem', json={'user_id': user_id, 'mensagem': mensagem}) as resposta:
+            await resposta.read()
+            return f'HTTP {resposta.status}' if resposta.status >= 400 else None
+    
+    async def _webhook(self, user_id: str, mensagem: str) -> Optional[str]:
+        # Mesmos campos (form-urlencoded) que a Twilio envia para mensagens do WhatsApp
+        formulario = {
+            'SmsMessageSid': f'SM{uuid.uuid4().hex}',
+            'MessageSid': f'SM{uuid.uuid4().hex}',
+            'AccountSid': f'AC{uuid.uuid5(uuid.NAMESPACE_DNS, "carga").hex}',
+            'MessagingServiceSid': '',
+            'From': f'whatsapp:{user_id}',
+            'To': f'whatsapp:{self.numero_twilio}',
+            'Body': mensagem,
+            'NumMedia': '0',
+            'NumSegments': '1',
+            'ProfileName': 'Carga',
+            'WaId': user_id.lstrip('+'),
+            'SmsStatus': 'received',
+            'ApiVersion': '2010-04-01'
+        }
+        async with self.sessao.post(f'{self.url}/webhook/whatsapp', data=formulario) as resposta:
+            corpo = await resposta.text()
+            if resposta.status >= 400:
+                return f'HTTP {resposta.status}'
+            # O webhook responde 200 com TwiML mesmo quando falha internamente
+            return 'erro interno (TwiML)' if ERRO_INTERNO_WEBHOOK in corpo else None
+
+
+async def carga_sintetica(cliente: Cliente, usuarios: int, duracao: float, canal: str,
+                          pensar: float, taxa_erros: float, rampa: float, semente: int):
+    """Mantém N usuários percorrendo o fluxo até o fim da duração"""
+    fim = time.perf_counter() + duracao
+    
+    async def usuario(indice: int):
+        rng = random.Random(semente + indice)
+        # Entrada escalonada: evita que todos comecem no mesmo instante
+        await asyncio.sleep(rampa * indice / max(usuarios, 1))
+        rodada = 0
+        while time.perf_counter() < fim:
+            canal_usuario = canal if canal != 'misto' else rng.choice(('mensagem', 'webhook'))
+            user_id = f'+5599{indice:05d}{rodada:04d}' if canal_usuario == 'webhook' else f'carga_{indice}_{rodada}'
+            for mensagem in roteiro_agendamento(rng, taxa_erros):
+                if time.perf_counter() >= fim:
+                    return
+                await cliente.enviar(canal_usuario, user_id, mensagem)
+                # Tempo de leitura/digitação: exponencial com média `pensar`
+                await asyncio.sleep(rng.expovariate(1 / pensar) if pensar > 0 else 0)
+            cliente.estatisticas.fluxos_concluidos += 1
+            rodada += 1
+    
+    await asyncio.gather(*(usuario(i) for i in range(usuarios)))
+
+
+def carregar_gravacao(caminho: str) -> Dict[str, List[Tuple[float, str]]]:
+    """Lê conversas gravadas: {user_id: [(segundos desde a 1ª mensagem, mensagem)]}"""
+    if caminho.endswith('.db') or caminho.endswith('.sqlite'):
+        conn = sqlite3.connect(f'file:{caminho}?mode=ro', uri=True)
+        linhas = [{'user_id': u, 'mensagem_usuario': m, 'timestamp': t} for u, m, t in conn.execute(
+            'SELECT user_id, mensagem_usuario, timestamp FROM historico_conversas ORDER BY id')]
+        conn.close()
+    else:
+        with open(caminho, encoding='utf-8') as arquivo:
+            conteudo = arquivo.read()
+        try:
+            dados = json.loads(conteudo)
+        except json.JSONDecodeError:
+            dados = [json.loads(linha) for linha in conteudo.splitlines() if linha.strip()]
+        if isinstance(dados, dict):
+            linhas = [dict(linha, user_id=user_id) for user_id, lista in dados.items() for linha in lista]
+        else:
+            linhas = dados
+    
+    conversas: Dict[str, List[Tuple[float, str]]] = defaultdict(list)
+    inicios: Dict[str, datetime] = {}
+    for linha in linhas:
+        mensagem = linha.get('mensagem_usuario')
+        if not mensagem:
+            continue
+        user_id = linha['user_id']
+        momento = _ler_timestamp(linha.get('timestamp'))
+        if momento and user_id not in inicios:
+            inicios[user_id] = momento
+        deslocamento = (momento - inicios[user_id]).total_seconds() if momento else 0.0
+        conversas[user_id].append((deslocamento, mensagem))
+    return conversas
+
+
+def _ler_timestamp(valor) -> Optional[datetime]:
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(str(valor).replace('Z', ''))
+    except ValueError:
+        return None
+
+
+async def replay(cliente: Cliente, conversas: Dict[str, List[Tuple[float, str]]], canal: str,
+                 velocidade: float, pausa_maxima: float, concorrencia: int):
+    """Reenvia cada conversa com os intervalos gravados (divididos por `velocidade`)"""
+    limite = asyncio.Semaphore(concorrencia)
+    # Identificadores novos a cada execução: não mistura com estados de replays anteriores
+    prefixo = f'replay_{uuid.uuid4().hex[:6]}_'
+    deslocamento_numero = random.randrange(10 ** 9)
+    
+    async def conversa(user_id: str, mensagens: List[Tuple[float, str]]):
+        async with limite:
+            if canal == 'webhook':
+                destino = f'+5598{(zlib.crc32(user_id.encode()) + deslocamento_numero) % 10 ** 9:09d}'
+            else:
+                destino = prefixo + user_id
+            anterior = mensagens[0][0]
+            for deslocamento, mensagem in mensagens:
+                await asyncio.sleep(min(max(deslocamento - anterior, 0) / velocidade, pausa_maxima))
+                anterior = deslocamento
+                await cliente.enviar(canal, destino, mensagem)
+            cliente.estatisticas.fluxos_concluidos += 1
+    
+    await asyncio.gather(*(conversa(user_id, mensagens) for user_id, mensagens in conversas.items()))
+
+
+def imprimir(resumo: dict):
+    print(f"\n⏱️  {resumo['duracao_s']} s • {resumo['requisicoes']} requisições • "
+          f"{resumo['req_por_segundo']} req/s • {resumo['fluxos_concluidos']} conversas concluídas")
+    print(f"❗ Taxa de erros: {resumo['taxa_erros']:.2%}")
+    for descricao, quantidade in resumo['erros'].items():
+        print(f"   • {descricao}: {quantidade}")
+    print(f"\n{'Canal':<10} {'n':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for canal, p in list(resumo['por_canal'].items()) + [('geral', resumo['geral'])]:
+        if p:
+            print(f"{canal:<10} {p['n']:>7} {p['p50_ms']:>9} {p['p95_ms']:>9} {p['p99_ms']:>9} {p['max_ms']:>9}")
+
+
+async def executar(args) -> dict:
+    estatisticas = Estatisticas()
+    conector = aiohttp.TCPConnector(limit=args.conexoes)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(connector=conector, timeout=timeout) as sessao:
+        cliente = Cliente(sessao, args.url, estatisticas, args.numero_twilio)
+        if args.replay:
+            conversas = carregar_gravacao(args.replay)
+            print(f"🔁 Replay de {len(conversas)} conversa(s) de {args.replay}")
+            await replay(cliente, conversas, 'webhook' if args.canal == 'webhook' else 'mensagem',
+                         args.velocidade, args.pausa_maxima, args.usuarios)
+        else:
+            print(f"👥 {args.usuarios} usuário(s) por {args.duracao:.0f} s no canal '{args.canal}'")
+            await carga_sintetica(cliente, args.usuarios, args.duracao, args.canal, args.pensar,
+                                  args.taxa_erros, args.rampa, args.semente)
+    return estatisticas.resumo()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--canal', choices=['mensagem', 'webhook', 'misto'], default='misto')
+    parser.add_argument('--usuarios', type=int, default=20, help='Usuários simultâneos (no replay: conversas em paralelo)')
+    parser.add_argument('--duracao', type=float, default=30.0)
+    parser.add_argument('--pensar', type=float, default=2.0, help='Tempo médio (s) entre mensagens de um usuário')
+    parser.add_argument('--taxa-erros', type=float, default=0.05, help='Probabilidade de erro de digitação por mensagem')
+    parser.add_argument('--rampa', type=float, default=5.0, help='Segundos para todos os usuários entrarem')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--replay', help='historico_conversas gravado (.db, .json ou .jsonl)')
+    parser.add_argument('--velocidade', type=float, default=10.0, help='Aceleração dos intervalos no replay')
+    parser.add_argument('--pausa-maxima', type=float, default=5.0, help='Maior espera entre mensagens no replay (s)')
+    parser.add_argument('--conexoes', type=int, default=100)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--numero-twilio', default='+14155238886')
+    parser.add_argument('--saida', help='Grava o resumo em JSON')
+    args = parser.parse_args()
+    
+    resumo = asyncio.run(executar(args))
+    imprimir(resumo)
+    
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resumo, arquivo, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resumo salvo em {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
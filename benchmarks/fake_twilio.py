@@ -0,0 +1,216 @@
+# benchmarks/fake_twilio.py
+"""
+Servidor HTTP local que imita o endpoint de envio de mensagens da Twilio
+
+Implementa POST /2010-04-01/Accounts/<AccountSid>/Messages.json (form
+urlencoded, Basic Auth) com respostas no formato da API real, para testar e
+medir o envio pelo WhatsAppService sem rede e sem credenciais. Latência,
+erros 500 e 429 (com Retry-After) são injetados por configuração, assim como
+500 depois de aceitar a mensagem (o caso em que repetir o envio duplica).
+
+Aponte o serviço para ele com TWILIO_API_BASE_URL=http://127.0.0.1:<porta>
+(ou WhatsAppService(base_url=...)).
+
+Endpoints auxiliares:
+    GET  /_fake/estatisticas   Contagem de requisições por resultado
+    GET  /_fake/mensagens      Últimas mensagens aceitas
+    POST /_fake/configurar     Altera a injeção de falhas (JSON)
+
+Uso:
+    python benchmarks/fake_twilio.py --porta 5090 --latencia-ms 120 --jitter-ms 40 --taxa-429 0.05
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs
+
+ROTA_MENSAGENS = re.compile(r'^/2010-04-01/Accounts/(AC[0-9a-zA-Z]+)/Messages\.json$')
+
+
+class ConfiguracaoFalhas:
+    """Latência e falhas injetadas (alteráveis com o servidor no ar)"""
+    
+    def __init__(self, latencia_ms: float = 0.0, jitter_ms: float = 0.0, taxa_erros: float = 0.0,
+                 taxa_429: float = 0.0, retry_after: int = 1, taxa_erros_apos_aceitar: float = 0.0):
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.taxa_erros = taxa_erros
+        self.taxa_429 = taxa_429
+        self.retry_after = retry_after
+        self.taxa_erros_apos_aceitar = taxa_erros_apos_aceitar
+    
+    def atualizar(self, valores: dict):
+        for chave, valor in valores.items():
+            if hasattr(self, chave):
+                setattr(self, chave, type(getattr(self, chave))(valor))
+    
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class ServidorTwilioFalso(ThreadingHTTPServer):
+    """Servidor com estado compartilhado entre as threads de atendimento"""
+    
+    daemon_threads = True
+    request_queue_size = 1024
+    
+    def __init__(self, endereco: tuple, configuracao: Optional[ConfiguracaoFalhas] = None):
+        super().__init__(endereco, ManipuladorTwilio)
+        self.configuracao = configuracao or ConfiguracaoFalhas()
+        self.estatisticas = Counter()
+        self.mensagens = deque(maxlen=1000)
+        self.lock = threading.Lock()
+    
+    @property
+    def url(self) -> str:
+        host, porta = self.server_address[:2]
+        return f'http://{host}:{porta}'
+    
+    def iniciar_em_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class ManipuladorTwilio(BaseHTTPRequestHandler):
+    """Atende as rotas da API imitada"""
+    
+    protocol_version = 'HTTP/1.1'
+    server: ServidorTwilioFalso
+    
+    def log_message(self, formato, *args):
+        pass
+    
+    def do_GET(self):
+        if self.path == '/_fake/estatisticas':
+            with self.server.lock:
+                corpo = dict(self.server.estatisticas)
+            return self._json(200, dict(corpo, configuracao=self.server.configuracao.to_dict()))
+        if self.path == '/_fake/mensagens':
+            with self.server.lock:
+                return self._json(200, list(self.server.mensagens))
+        return self._erro_twilio(404, 20404, 'The requested resource was not found')
+    
+    def do_POST(self):
+        corpo = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        
+        if self.path == '/_fake/configurar':
+            self.server.configuracao.atualizar(json.loads(corpo or b'{}'))
+            return self._json(200, self.server.configuracao.to_dict())
+        
+        rota = ROTA_MENSAGENS.match(self.path)
+        if not rota:
+            return self._erro_twilio(404, 20404, 'The requested resource was not found')
+        if not self.headers.get('Authorization', '').startswith('Basic '):
+            return self._contar_e_responder('401', 401, 20003, 'Authenticate')
+        
+        configuracao = self.server.configuracao
+        atraso = configuracao.latencia_ms + random.uniform(-1, 1) * configuracao.jitter_ms
+        if atraso > 0:
+            time.sleep(atraso / 1000)
+        
+        sorteio = random.random()
+        if sorteio < configuracao.taxa_429:
+            return self._contar_e_responder('429', 429, 20429, 'Too Many Requests',
+                                            {'Retry-After': str(configuracao.retry_after)})
+        if sorteio < configuracao.taxa_429 + configuracao.taxa_erros:
+            return self._contar_e_responder('500', 500, 20500, 'Internal Server Error')
+        
+        dados = {chave: valores[0] for chave, valores in parse_qs(corpo.decode()).items()}
+        if not dados.get('To') or not (dados.get('Body') or dados.get('MediaUrl')):
+            return self._contar_e_responder('400', 400, 21602, 'Message body is required.')
+        
+        mensagem = self._mensagem(rota.group(1), dados)
+        aceita_com_erro = random.random() < configuracao.taxa_erros_apos_aceitar
+        with self.server.lock:
+            self.server.estatisticas['500_apos_aceitar' if aceita_com_erro else '201'] += 1
+            self.server.mensagens.append(mensagem)
+        if aceita_com_erro:
+            return self._erro_twilio(500, 20500, 'Internal Server Error')
+        return self._json(201, mensagem)
+    
+    def _mensagem(self, account_sid: str, dados: dict) -> dict:
+        sid = f'SM{uuid.uuid4().hex}'
+        agora = format_datetime(datetime.now(timezone.utc), usegmt=True)
+        return {
+            'sid': sid,
+            'account_sid': account_sid,
+            'messaging_service_sid': dados.get('MessagingServiceSid'),
+            'from': dados.get('From'),
+            'to': dados['To'],
+            'body': dados.get('Body', ''),
+            'status': 'queued',
+            'direction': 'outbound-api',
+            'num_segments': '1',
+            'num_media': '0',
+            'price': None,
+            'price_unit': 'USD',
+            'error_code': None,
+            'error_message': None,
+            'api_version': '2010-04-01',
+            'date_created': agora,
+            'date_updated': agora,
+            'date_sent': None,
+            'uri': f'/2010-04-01/Accounts/{account_sid}/Messages/{sid}.json',
+            'subresource_uris': {'media': f'/2010-04-01/Accounts/{account_sid}/Messages/{sid}/Media.json'}
+        }
+    
+    def _contar_e_responder(self, resultado: str, status: int, codigo: int, mensagem: str, headers: dict = None):
+        with self.server.lock:
+            self.server.estatisticas[resultado] += 1
+        return self._erro_twilio(status, codigo, mensagem, headers)
+    
+    def _erro_twilio(self, status: int, codigo: int, mensagem: str, headers: dict = None):
+        return self._json(status, {
+            'code': codigo,
+            'message': mensagem,
+            'more_info': f'https://www.twilio.com/docs/errors/{codigo}',
+            'status': status
+        }, headers)
+    
+    def _json(self, status: int, dados, headers: dict = None):
+        corpo = json.dumps(dados).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        for chave, valor in (headers or {}).items():
+            self.send_header(chave, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=5090)
+    parser.add_argument('--latencia-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--taxa-erros', type=float, default=0.0, help='Fração de respostas 500')
+    parser.add_argument('--taxa-429', type=float, default=0.0, help='Fração de respostas 429')
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--taxa-erros-apos-aceitar', type=float, default=0.0,
+                        help='Fração de mensagens aceitas respondidas com 500')
+    args = parser.parse_args()
+    
+    servidor = ServidorTwilioFalso((args.host, args.porta), ConfiguracaoFalhas(
+        args.latencia_ms, args.jitter_ms, args.taxa_erros, args.taxa_429, args.retry_after,
+        args.taxa_erros_apos_aceitar))
+    print(f"📞 Twilio falso em {servidor.url} (TWILIO_API_BASE_URL={servidor.url})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
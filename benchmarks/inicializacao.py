@@ -0,0 +1,100 @@
+# benchmarks/inicializacao.py
+"""
+Benchmark do tempo de inicialização (cold start de um worker)
+
+Cada amostra é um processo Python novo que importa app.py e chama
+create_app(), como um worker do Gunicorn ao subir. Mede separadamente
+o import e o create_app, com e sem a integração Twilio configurada e com
+banco novo (DDL completo) ou existente (caminho rápido do user_version).
+Com -X importtime, detalha o import por pacote e os módulos mais caros.
+
+Uso:
+    python benchmarks/inicializacao.py
+    python benchmarks/inicializacao.py --amostras 15 --top 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = '''
+import json, time
+inicio = time.perf_counter()
+from app import create_app
+importado = time.perf_counter()
+create_app()
+fim = time.perf_counter()
+print(json.dumps({"import_ms": (importado - inicio) * 1000, "create_app_ms": (fim - importado) * 1000}))
+'''
+
+TWILIO = {'TWILIO_ACCOUNT_SID': 'ACbenchmark', 'TWILIO_AUTH_TOKEN': 'benchmark', 'TWILIO_PHONE_NUMBER': '+14155238886'}
+SEM_TWILIO = {chave: '' for chave in TWILIO}
+
+
+def amostrar(banco: str, env_extra: dict, importtime: bool = False) -> Tuple[dict, str]:
+    """Roda um processo novo e devolve (tempos, saída do -X importtime)"""
+    env = dict(os.environ, PYTHONPATH=RAIZ, DATABASE_PATH=banco, **env_extra)
+    comando = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', SCRIPT]
+    resultado = subprocess.run(comando, cwd=RAIZ, env=env, capture_output=True, text=True, check=True)
+    tempos = json.loads(resultado.stdout.strip().splitlines()[-1])
+    return tempos, resultado.stderr
+
+
+def detalhar_imports(saida: str, top: int) -> Tuple[Dict[str, float], List[Tuple[str, float]]]:
+    """Soma o tempo próprio por pacote e lista os módulos de maior tempo acumulado"""
+    por_pacote: Dict[str, float] = defaultdict(float)
+    acumulados = []
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        proprio, acumulado, modulo = linha[len('import time:'):].split('|')
+        nome = modulo.strip()
+        por_pacote[nome.split('.')[0]] += int(proprio) / 1000
+        acumulados.append((nome, int(acumulado) / 1000))
+    mais_caros = sorted(acumulados, key=lambda item: item[1], reverse=True)[:top]
+    return dict(sorted(por_pacote.items(), key=lambda item: item[1], reverse=True)[:top]), mais_caros
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--amostras', type=int, default=7)
+    parser.add_argument('--top', type=int, default=12)
+    args = parser.parse_args()
+    
+    print(f"{'Cenário':<36} {'import ms':>10} {'create_app ms':>14} {'total ms':>9}")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for rotulo_twilio, env_extra in (('sem Twilio', SEM_TWILIO), ('com Twilio', TWILIO)):
+            for rotulo_banco in ('banco novo', 'banco existente'):
+                imports, criacoes = [], []
+                for i in range(args.amostras):
+                    banco = os.path.join(diretorio, f'{rotulo_twilio}-{rotulo_banco}-{i}.db'.replace(' ', '_'))
+                    if rotulo_banco == 'banco existente':
+                        amostrar(banco, env_extra)
+                    tempos, _ = amostrar(banco, env_extra)
+                    imports.append(tempos['import_ms'])
+                    criacoes.append(tempos['create_app_ms'])
+                importacao, criacao = statistics.median(imports), statistics.median(criacoes)
+                print(f"{rotulo_twilio + ', ' + rotulo_banco:<36} {importacao:>10.1f} {criacao:>14.1f} "
+                      f"{importacao + criacao:>9.1f}")
+        
+        _, saida = amostrar(os.path.join(diretorio, 'importtime.db'), TWILIO, importtime=True)
+    
+    por_pacote, mais_caros = detalhar_imports(saida, args.top)
+    print("\n📦 Tempo próprio de import por pacote (com Twilio, ms):")
+    for pacote, ms in por_pacote.items():
+        print(f"   {pacote:<28} {ms:>8.1f}")
+    print("\n🐢 Módulos com maior tempo acumulado (ms):")
+    for modulo, ms in mais_caros:
+        print(f"   {modulo:<40} {ms:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+# benchmarks/pipeline.py
+"""
+Suíte de benchmarks do pipeline do chatbot (em processo, sem servidor)
+
+Mede AIService, cada método dos repositories, conversas completas de
+agendamento no ChatbotService e os endpoints Flask via test client, contra um
+banco SQLite em arquivo temporário e/ou em memória. Reporta p50/p95/p99 e
+ops/s e, com --comparar, acusa regressões em relação a um baseline salvo.
+Os números dependem da máquina: o baseline guarda plataforma, CPUs e commit,
+e a comparação avisa quando a máquina atual é outra.
+
+Uso:
+    python benchmarks/pipeline.py
+    python benchmarks/pipeline.py --banco memoria --repeticoes 2000
+    python benchmarks/pipeline.py --salvar benchmarks/baseline.json
+    python benchmarks/pipeline.py --comparar benchmarks/baseline.json --tolerancia 0.3
+    python benchmarks/pipeline.py --rodadas 5 --salvar benchmarks/baseline.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from src.database.database_manager import DatabaseManager  # noqa: E402
+from src.database.consulta_repository import ConsultaRepository  # noqa: E402
+from src.database.conversa_repository import ConversaRepository  # noqa: E402
+from src.database.vaga_repository import VagaRepository  # noqa: E402
+from src.models.consulta import Consulta  # noqa: E402
+from src.models.conversa import Conversa, EstadoConversa  # noqa: E402
+from src.services.ai_service import AIService  # noqa: E402
+from src.services.chatbot_service import ChatbotService  # noqa: E402
+
+MENSAGENS_IA = ['oi', 'quero marcar uma consulta', 'João da Silva', '15/07/2030', 'de manhã',
+                'tarde por favor', 'ajuda', 'cancelar', 'obrigado', 'nova consulta']
+CAPACIDADE_ILIMITADA = 10 ** 9
+
+Cenario = Tuple[str, Callable[[int], object]]
+
+
+def maquina() -> dict:
+    """Identifica onde o baseline foi medido (os tempos só valem nessa máquina)"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'commit': commit
+    }
+
+
+def percentil(ordenadas: List[float], fracao: float) -> float:
+    return ordenadas[min(len(ordenadas) - 1, int(round(fracao * (len(ordenadas) - 1))))]
+
+
+def medir(funcao: Callable[[int], object], repeticoes: int, aquecimento: int) -> dict:
+    """Executa a função N vezes e resume as latências (ms)"""
+    for i in range(aquecimento):
+        funcao(-1 - i)
+    
+    duracoes = []
+    gc.collect()
+    inicio_total = time.perf_counter()
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(i)
+        duracoes.append(time.perf_counter() - inicio)
+    total = time.perf_counter() - inicio_total
+    
+    duracoes.sort()
+    return {
+        'repeticoes': repeticoes,
+        'ops_s': round(repeticoes / total, 1),
+        'p50_ms': round(percentil(duracoes, 0.50) * 1000, 4),
+        'p95_ms': round(percentil(duracoes, 0.95) * 1000, 4),
+        'p99_ms': round(percentil(duracoes, 0.99) * 1000, 4)
+    }
+
+
+def data_unica(i: int) -> str:
+    """Datas distintas por iteração (evita colisão no índice único)"""
+    return f'{1 + i % 28:02d}/{1 + (i // 28) % 12:02d}/{2030 + (i // 336) % 50}'
+
+
+def cenarios_servicos(database_path: str) -> List[Cenario]:
+    """AIService, repositories e conversas completas no ChatbotService"""
+    db = DatabaseManager(database_path)
+    vagas = VagaRepository(db, capacidade_padrao=CAPACIDADE_ILIMITADA)
+    consultas = ConsultaRepository(db, vagas)
+    conversas = ConversaRepository(db)
+    ai = AIService()
+    chatbot = ChatbotService(consultas, conversas, ai, vagas)
+    
+    # Massa inicial para as leituras
+    for i in range(200):
+        consultas.salvar(Consulta(nome=f'Paciente {i}', data=data_unica(i), periodo='tarde', user_id=f'base_{i % 20}'))
+        conversas.salvar_historico(f'base_{i % 20}', 'oi', 'Olá!', EstadoConversa.INICIAL)
+    conversa = Conversa(user_id='base_0', estado=EstadoConversa.AGUARDANDO_DATA, dados={'nome': 'Ana'})
+    conversas.salvar_estado(conversa)
+    
+    def conversa_completa(i: int):
+        user_id = f'conversa_{i}'
+        for mensagem in ('iniciar', 'Maria', data_unica(i), 'manhã', 'nova'):
+            chatbot.processar_mensagem(user_id, mensagem)
+    
+    return [
+        ('AIService.processar_intencao', lambda i: ai.processar_intencao(MENSAGENS_IA[i % len(MENSAGENS_IA)])),
+        ('ConsultaRepository.salvar', lambda i: consultas.salvar(
+            Consulta(nome='Bench', data=data_unica(i), periodo='manhã', user_id=f'salvar_{i}'))),
+        ('ConsultaRepository.buscar_todas', lambda i: consultas.buscar_todas()),
+        ('ConsultaRepository.buscar_por_usuario', lambda i: consultas.buscar_por_usuario(f'base_{i % 20}')),
+        ('ConsultaRepository.obter_estatisticas', lambda i: consultas.obter_estatisticas()),
+        ('ConversaRepository.salvar_estado', lambda i: conversas.salvar_estado(conversa)),
+        ('ConversaRepository.carregar_estado', lambda i: conversas.carregar_estado('base_0')),
+        ('ConversaRepository.salvar_historico', lambda i: conversas.salvar_historico(
+            f'hist_{i % 50}', 'mensagem', 'resposta', EstadoConversa.AGUARDANDO_NOME)),
+        ('ConversaRepository.buscar_historico', lambda i: conversas.buscar_historico(f'base_{i % 20}')),
+        ('VagaRepository.obter_vaga', lambda i: vagas.obter_vaga(data_unica(i), 'tarde')),
+        ('VagaRepository.proximas_vagas', lambda i: vagas.proximas_vagas(data_unica(i))),
+        ('ChatbotService.conversa_completa', conversa_completa),
+    ]
+
+
+def cenarios_http(database_path: str) -> List[Cenario]:
+    """Endpoints Flask via test client (inclui roteamento, JSON e cache HTTP)"""
+    os.environ.update(DATABASE_PATH=database_path, CAPACIDADE_POR_PERIODO=str(CAPACIDADE_ILIMITADA),
+                      TRACE_AMOSTRAGEM='0', TWILIO_ACCOUNT_SID='')
+    from app import create_app
+    cliente = create_app().test_client()
+    
+    for i in range(20):
+        for mensagem in ('iniciar', f'Paciente {i}', data_unica(i), 'tarde'):
+            cliente.post('/mensagem', json={'user_id': f'http_{i}', 'mensagem': mensagem})
+    
+    def post_mensagem(i: int):
+        passos = ('iniciar', 'Maria', data_unica(i // 5), 'manhã', 'nova')
+        cliente.post('/mensagem', json={'user_id': f'post_{i // 5}', 'mensagem': passos[i % 5]})
+    
+    etag = cliente.get('/consultas').headers.get('ETag', '')
+    
+    # Leituras antes da escrita: POST /mensagem invalida o ETag do cenário 304
+    return [
+        ('GET /consultas', lambda i: cliente.get('/consultas')),
+        ('GET /consultas (304)', lambda i: cliente.get('/consultas', headers={'If-None-Match': etag})),
+        ('GET /consultas/<user_id>', lambda i: cliente.get(f'/consultas/http_{i % 20}')),
+        ('GET /historico/<user_id>', lambda i: cliente.get(f'/historico/http_{i % 20}')),
+        ('GET /estatisticas', lambda i: cliente.get('/estatisticas')),
+        ('GET /conversa/status/<user_id>', lambda i: cliente.get(f'/conversa/status/http_{i % 20}')),
+        ('POST /mensagem', post_mensagem),
+    ]
+
+
+def executar(banco: str, repeticoes: int, aquecimento: int, filtro: str) -> Dict[str, dict]:
+    """Roda todos os cenários contra um tipo de banco"""
+    resultados = {}
+    with tempfile.TemporaryDirectory() as diretorio:
+        for grupo in (cenarios_servicos, cenarios_http):
+            caminho = ':memory:' if banco == 'memoria' else os.path.join(diretorio, f'{grupo.__name__}.db')
+            for nome, funcao in grupo(caminho):
+                if filtro and filtro.lower() not in nome.lower():
+                    continue
+                resultados[f'{banco}:{nome}'] = medir(funcao, repeticoes, aquecimento)
+                print(f"  {banco:<8} {nome:<40} {resultados[f'{banco}:{nome}']['p50_ms']:>9.3f} ms p50", flush=True)
+    return resultados
+
+
+def mediana_das_rodadas(rodadas: List[Dict[str, dict]]) -> Dict[str, dict]:
+    """Mediana de cada métrica entre rodadas (uma rodada ruidosa não vira regressão)"""
+    resultados = {}
+    for nome, primeira in rodadas[0].items():
+        medidas = [rodada[nome] for rodada in rodadas if nome in rodada]
+        resultados[nome] = {metrica: (round(statistics.median(m[metrica] for m in medidas), 4)
+                                      if metrica != 'repeticoes' else valor)
+                            for metrica, valor in primeira.items()}
+    return resultados
+
+
+def comparar(resultados: Dict[str, dict], baseline: Dict[str, dict], tolerancia: float,
+             minimo_ms: float = 0.0) -> List[str]:
+    """Lista os cenários cujo p50 ou p95 piorou além da tolerância (e de minimo_ms em valor absoluto)"""
+    regressoes = []
+    for nome, atual in resultados.items():
+        anterior = baseline.get(nome)
+        if not anterior:
+            continue
+        for metrica in ('p50_ms', 'p95_ms'):
+            if (anterior[metrica] and atual[metrica] > anterior[metrica] * (1 + tolerancia)
+                    and atual[metrica] - anterior[metrica] > minimo_ms):
+                regressoes.append(f"{nome}: {metrica} {anterior[metrica]:.3f} → {atual[metrica]:.3f} ms "
+                                  f"(+{(atual[metrica] / anterior[metrica] - 1) * 100:.0f}%)")
+    return regressoes
+
+
+def imprimir(resultados: Dict[str, dict], baseline: Dict[str, dict]):
+    print(f"\n{'Cenário':<50} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Δp50':>7}")
+    for nome, r in resultados.items():
+        anterior = baseline.get(nome)
+        delta = f"{(r['p50_ms'] / anterior['p50_ms'] - 1) * 100:+.0f}%" if anterior and anterior['p50_ms'] else ''
+        print(f"{nome:<50} {r['ops_s']:>10.1f} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f} {delta:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--banco', choices=['arquivo', 'memoria', 'ambos'], default='ambos')
+    parser.add_argument('--repeticoes', type=int, default=500)
+    parser.add_argument('--aquecimento', type=int, default=20)
+    parser.add_argument('--filtro', default='', help='Roda só cenários cujo nome contém o texto')
+    parser.add_argument('--salvar', help='Grava os resultados como baseline JSON')
+    parser.add_argument('--comparar', help='Baseline JSON para detectar regressões')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='Piora aceita no p50/p95 (0.25 = 25%%)')
+    parser.add_argument('--minimo-ms', type=float, default=0.02,
+                        help='Piora absoluta mínima para acusar regressão (ignora jitter de microssegundos)')
+    parser.add_argument('--rodadas', type=int, default=3, help='Repete a suíte e usa a mediana de cada métrica')
+    args = parser.parse_args()
+    
+    bancos = ['arquivo', 'memoria'] if args.banco == 'ambos' else [args.banco]
+    rodadas = []
+    for rodada in range(1, max(1, args.rodadas) + 1):
+        print(f"🔁 Rodada {rodada}/{max(1, args.rodadas)}")
+        resultados = {}
+        for banco in bancos:
+            resultados.update(executar(banco, args.repeticoes, args.aquecimento, args.filtro))
+        rodadas.append(resultados)
+    resultados = mediana_das_rodadas(rodadas)
+    
+    baseline = {}
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            salvo = json.load(arquivo)
+        baseline = salvo['resultados']
+        atual = maquina()
+        if any(salvo.get(chave) != atual[chave] for chave in ('python', 'plataforma', 'cpus')):
+            print(f"⚠️ Baseline medido em outra máquina ({salvo.get('plataforma')}, {salvo.get('cpus')} CPUs, "
+                  f"Python {salvo.get('python')}); gere um local com --salvar antes de confiar na comparação")
+    
+    imprimir(resultados, baseline)
+    
+    if args.salvar:
+        with open(args.salvar, 'w', encoding='utf-8') as arquivo:
+            json.dump({
+                **maquina(),
+                'repeticoes': args.repeticoes,
+                'rodadas': len(rodadas),
+                'resultados': resultados
+            }, arquivo, indent=2, ensure_ascii=False)
+            arquivo.write('\n')
+        print(f"\n💾 Baseline salvo em {args.salvar}")
+    
+    if args.comparar:
+        regressoes = comparar(resultados, baseline, args.tolerancia, args.minimo_ms)
+        if regressoes:
+            print(f"\n❌ {len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}:")
+            for linha in regressoes:
+                print(f"• {linha}")
+            sys.exit(1)
+        print(f"\n✅ Sem regressões acima de {args.tolerancia:.0%}")
+
+
+if __name__ == '__main__':
+    main()
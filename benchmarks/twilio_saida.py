@@ -0,0 +1,149 @@
+# benchmarks/twilio_saida.py
+"""
+Benchmark do envio de mensagens (saída para a Twilio) sem rede
+
+Sobe o servidor Twilio falso (fake_twilio.py) com latência e falhas
+injetadas e mede:
+
+    servico  WhatsAppService.enviar_mensagem em N threads: vazão, entregas,
+             tentativas extras (retry em 429) e latência por mensagem
+    http     A aplicação no Gunicorn apontada para o servidor falso: cada
+             iteração recebe um webhook e envia uma resposta por
+             POST /whatsapp/enviar (webhook + resposta de saída)
+
+Uso:
+    python benchmarks/twilio_saida.py --modo servico --clientes 16 --latencia-ms 150 --taxa-429 0.05
+    python benchmarks/twilio_saida.py --modo http --clientes 8 --taxa-erros 0.02
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_twilio import ConfiguracaoFalhas, ServidorTwilioFalso  # noqa: E402
+from wsgi_throughput import RAIZ, iniciar_servidor  # noqa: E402
+
+sys.path.insert(0, RAIZ)
+
+CREDENCIAIS = {'TWILIO_ACCOUNT_SID': 'ACbenchmark', 'TWILIO_AUTH_TOKEN': 'benchmark',
+               'TWILIO_PHONE_NUMBER': '+14155238886'}
+
+
+def resumir(latencias: list, falhas: int, duracao: float) -> dict:
+    latencias.sort()
+    total = len(latencias)
+    
+    def p(fracao: float):
+        return round(latencias[min(total - 1, int(total * fracao))] * 1000, 1) if total else None
+    
+    return {'operacoes': total, 'falhas': falhas, 'ops_por_segundo': round(total / duracao, 1),
+            'p50_ms': p(0.50), 'p95_ms': p(0.95), 'p99_ms': p(0.99)}
+
+
+def executar_em_threads(clientes: int, duracao: float, operacao) -> dict:
+    """Roda `operacao(indice, passo) -> bool` em N threads até o fim da duração"""
+    latencias, falhas = [], [0]
+    lock = threading.Lock()
+    fim = time.perf_counter() + duracao
+    
+    def cliente(indice: int):
+        locais, erros, passo = [], 0, 0
+        while time.perf_counter() < fim:
+            inicio = time.perf_counter()
+            if not operacao(indice, passo):
+                erros += 1
+            locais.append(time.perf_counter() - inicio)
+            passo += 1
+        with lock:
+            latencias.extend(locais)
+            falhas[0] += erros
+    
+    threads = [threading.Thread(target=cliente, args=(i,)) for i in range(clientes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return resumir(latencias, falhas[0], duracao)
+
+
+def modo_servico(url_twilio: str, clientes: int, duracao: float, tentativas: int) -> dict:
+    os.environ.update(CREDENCIAIS)
+    from src.services.metricas import TWILIO_RETENTATIVAS
+    from src.services.whatsapp_service import WhatsAppService
+    
+    servico = WhatsAppService(base_url=url_twilio, max_tentativas=tentativas, espera_base=0.05)
+    antes = TWILIO_RETENTATIVAS.valor(operacao='twilio.enviar_mensagem')
+    resultado = executar_em_threads(
+        clientes, duracao,
+        lambda indice, passo: servico.enviar_mensagem(f'+55119{indice:08d}', f'Lembrete {passo}') is not None
+    )
+    resultado['retentativas'] = int(TWILIO_RETENTATIVAS.valor(operacao='twilio.enviar_mensagem') - antes)
+    return resultado
+
+
+def modo_http(url_twilio: str, clientes: int, duracao: float, tentativas: int, porta: int) -> dict:
+    env = dict(CREDENCIAIS, TWILIO_API_BASE_URL=url_twilio, TWILIO_MAX_TENTATIVAS=str(tentativas))
+    sessoes = {}
+    
+    def webhook_e_resposta(indice: int, passo: int) -> bool:
+        sessao = sessoes.setdefault(indice, requests.Session())
+        numero = f'+55119{indice:08d}'
+        mensagens = ['oi', f'Paciente {indice}', '15/07/2030', 'tarde', 'nova']
+        try:
+            entrada = sessao.post(f'{base_url}/webhook/whatsapp', data={
+                'From': f'whatsapp:{numero}', 'To': 'whatsapp:+14155238886',
+                'Body': mensagens[passo % len(mensagens)], 'MessageSid': f'SM{indice}{passo}', 'NumMedia': '0'
+            })
+            saida = sessao.post(f'{base_url}/whatsapp/enviar', json={'numero': numero, 'mensagem': 'Confirmado ✅'})
+            return entrada.status_code == 200 and saida.status_code == 200
+        except requests.RequestException:
+            return False
+    
+    with tempfile.TemporaryDirectory() as diretorio:
+        processo = iniciar_servidor('gunicorn', porta, diretorio, env)
+        base_url = f'http://127.0.0.1:{porta}'
+        try:
+            return executar_em_threads(clientes, duracao, webhook_e_resposta)
+        finally:
+            processo.terminate()
+            processo.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modo', choices=['servico', 'http'], default='servico')
+    parser.add_argument('--clientes', type=int, default=8)
+    parser.add_argument('--duracao', type=float, default=5.0)
+    parser.add_argument('--latencia-ms', type=float, default=100.0)
+    parser.add_argument('--jitter-ms', type=float, default=30.0)
+    parser.add_argument('--taxa-erros', type=float, default=0.0)
+    parser.add_argument('--taxa-429', type=float, default=0.0)
+    parser.add_argument('--tentativas', type=int, default=3)
+    parser.add_argument('--porta', type=int, default=5096)
+    args = parser.parse_args()
+    
+    servidor = ServidorTwilioFalso(('127.0.0.1', 0), ConfiguracaoFalhas(
+        args.latencia_ms, args.jitter_ms, args.taxa_erros, args.taxa_429))
+    servidor.iniciar_em_thread()
+    
+    if args.modo == 'servico':
+        resultado = modo_servico(servidor.url, args.clientes, args.duracao, args.tentativas)
+    else:
+        resultado = modo_http(servidor.url, args.clientes, args.duracao, args.tentativas, args.porta)
+    servidor.shutdown()
+    
+    print(f"📤 {args.modo}: {resultado['ops_por_segundo']} ops/s  p50={resultado['p50_ms']}ms  "
+          f"p95={resultado['p95_ms']}ms  p99={resultado['p99_ms']}ms  "
+          f"falhas={resultado['falhas']}/{resultado['operacoes']}"
+          + (f"  retentativas={resultado['retentativas']}" if 'retentativas' in resultado else ''))
+    print(f"📞 Twilio falso: {dict(servidor.estatisticas)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+# benchmarks/wsgi_throughput.py
+"""
+Benchmark de vazão: servidor de desenvolvimento (Werkzeug) x Gunicorn
+
+Sobe cada servidor em um subprocesso, com banco SQLite temporário, e
+dispara requisições concorrentes por alguns segundos.
+
+Uso:
+    python benchmarks/wsgi_throughput.py --servidor dev
+    python benchmarks/wsgi_throughput.py --servidor gunicorn
+    python benchmarks/wsgi_throughput.py --servidor ambos --clientes 16 --duracao 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import requests
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def iniciar_servidor(tipo: str, porta: int, diretorio: str, env_extra: dict = None) -> subprocess.Popen:
+    """Inicia o servidor escolhido em um subprocesso"""
+    env = dict(os.environ, PYTHONPATH=RAIZ, DATABASE_PATH=os.path.join(diretorio, 'bench.db'),
+               TWILIO_ACCOUNT_SID='', GUNICORN_ACCESSLOG='', PORT=str(porta))
+    env.update(env_extra or {})
+    
+    if tipo == 'dev':
+        comando = [sys.executable, '-c',
+                   f"from app import create_app; create_app().run(host='127.0.0.1', port={porta})"]
+    elif tipo == 'uvicorn':
+        comando = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(porta),
+                   '--no-access-log', '--backlog', '4096']
+    else:
+        comando = [sys.executable, '-m', 'gunicorn', '-c', os.path.join(RAIZ, 'gunicorn.conf.py'),
+                   '--bind', f'127.0.0.1:{porta}', 'wsgi:app']
+    
+    processo = subprocess.Popen(comando, cwd=diretorio, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    
+    for _ in range(100):
+        try:
+            if requests.get(f'http://127.0.0.1:{porta}/health', timeout=0.5).status_code == 200:
+                return processo
+        except requests.exceptions.ConnectionError:
+            pass
+        time.sleep(0.1)
+    
+    processo.terminate()
+    raise RuntimeError(f"Servidor {tipo} não respondeu")
+
+
+def executar_carga(base_url: str, clientes: int, duracao: float) -> dict:
+    """Dispara requisições concorrentes (mix de leitura e escrita)"""
+    latencias = []
+    erros = [0]
+    lock = threading.Lock()
+    fim = time.perf_counter() + duracao
+    
+    def cliente(indice: int):
+        sessao = requests.Session()
+        user_id = f'bench_{indice}'
+        mensagens = ['iniciar', f'Paciente {indice}', '15/07/2030', 'tarde', 'nova']
+        passo = 0
+        locais = []
+        falhas = 0
+        
+        while time.perf_counter() < fim:
+            inicio = time.perf_counter()
+            try:
+                if passo % 3 == 0:
+                    resposta = sessao.get(f'{base_url}/estatisticas')
+                elif passo % 3 == 1:
+                    resposta = sessao.get(f'{base_url}/consultas/{user_id}')
+                else:
+                    resposta = sessao.post(f'{base_url}/mensagem', json={
+                        'user_id': user_id, 'mensagem': mensagens[(passo // 3) % len(mensagens)]
+                    })
+                if resposta.status_code >= 500:
+                    falhas += 1
+            except requests.exceptions.RequestException:
+                falhas += 1
+            locais.append(time.perf_counter() - inicio)
+            passo += 1
+        
+        with lock:
+            latencias.extend(locais)
+            erros[0] += falhas
+    
+    threads = [threading.Thread(target=cliente, args=(i,)) for i in range(clientes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    latencias.sort()
+    total = len(latencias)
+    return {
+        'requisicoes': total,
+        'erros': erros[0],
+        'req_por_segundo': round(total / duracao, 1),
+        'p50_ms': round(latencias[total // 2] * 1000, 2) if total else None,
+        'p99_ms': round(latencias[int(total * 0.99)] * 1000, 2) if total else None,
+        'media_ms': round(statistics.mean(latencias) * 1000, 2) if total else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--servidor', choices=['dev', 'gunicorn', 'ambos'], default='ambos')
+    parser.add_argument('--clientes', type=int, default=8)
+    parser.add_argument('--duracao', type=float, default=5.0)
+    parser.add_argument('--porta', type=int, default=5099)
+    args = parser.parse_args()
+    
+    tipos = ['dev', 'gunicorn'] if args.servidor == 'ambos' else [args.servidor]
+    
+    for tipo in tipos:
+        with tempfile.TemporaryDirectory() as diretorio:
+            processo = iniciar_servidor(tipo, args.porta, diretorio)
+            try:
+                resultado = executar_carga(f'http://127.0.0.1:{args.porta}', args.clientes, args.duracao)
+            finally:
+                processo.terminate()
+                processo.wait()
+        
+        print(f"📊 {tipo:<9} {resultado['req_por_segundo']:>8} req/s  "
+              f"p50={resultado['p50_ms']}ms  p99={resultado['p99_ms']}ms  "
+              f"erros={resultado['erros']}/{resultado['requisicoes']}")
+
+
+if __name__ == '__main__':
+    main()
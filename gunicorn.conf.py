@@ -0,0 +1,66 @@
+# gunicorn.conf.py
+"""
+Configuração do Gunicorn para produção
+
+Todos os valores podem ser sobrescritos por variáveis de ambiente.
+
+Processos x threads:
+- O ChatbotService mantém as conversas ativas em memória e o SQLite aceita
+  um único escritor por vez. Com vários processos, dois workers poderiam
+  atender mensagens do mesmo usuário com caches divergentes. Por isso o
+  padrão é 1 processo com várias threads (worker gthread), dimensionadas
+  pela quantidade de CPUs - o trabalho por requisição é quase todo I/O.
+- Cada dashboard aberto mantém um stream SSE (/eventos) que ocupa uma
+  thread enquanto estiver conectado; some isso a GUNICORN_THREADS. Com
+  WEB_CONCURRENCY > 1 o publicador de estatísticas sonda o banco em vez
+  de depender dos eventos do próprio processo.
+- Só aumente WEB_CONCURRENCY se o cache de sessão não for necessário ou
+  o armazenamento for trocado por um banco multi-processo.
+
+Reload sem downtime:
+- kill -HUP <master>  -> recarrega a configuração e recria os workers
+- kill -USR2 <master> e depois -TERM no master antigo -> troca de código
+  (necessário com preload_app, que carrega a aplicação antes do fork)
+"""
+
+import multiprocessing
+import os
+import sys
+
+# Rede
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+backlog = int(os.getenv('GUNICORN_BACKLOG', '2048'))
+
+# Processos e threads
+cpus = multiprocessing.cpu_count()
+workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', str(min(cpus * 4, 32))))
+
+# Carrega create_app() uma única vez no master (DDL do banco roda só aqui)
+preload_app = True
+
+# Tempo de vida das requisições e reload gracioso
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+# Reciclagem de workers (0 = desativada; reciclar descarta o cache de sessão)
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '0'))
+
+# Keep-alive: maior que o do proxy reverso evita conexões cortadas pelo app
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '75'))
+
+# Logs
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-') or None  # vazio desativa
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOGLEVEL', 'info')
+
+# Snapshot do cache de sessões (SNAPSHOT_SESSOES) no shutdown gracioso do worker.
+# Cada worker grava <SNAPSHOT_SESSOES>.<pid>, então com WEB_CONCURRENCY > 1 um
+# não sobrescreve o outro; o master junta os arquivos no boot (preload_app)
+# antes do fork.
+def worker_exit(server, worker):
+    wsgi = sys.modules.get('wsgi')
+    if wsgi is not None:
+        from app import salvar_sessoes
+        salvar_sessoes(wsgi.app, por_processo=True)
@@ -0,0 +1,76 @@
+# src/controllers/admin_controller.py
+"""
+Controller para endpoints de diagnóstico (administração)
+Princípio SRP: Apenas expõe dados de diagnóstico via HTTP
+Princípio DIP: Depende de abstrações (monitor de consultas, rastreador)
+"""
+
+import hmac
+import os
+from typing import Optional
+from flask import request, jsonify
+from ..database.monitor_sql import MonitorConsultas
+from ..services.rastreamento import Rastreador
+
+
+class AdminController:
+    """Controller para diagnóstico de desempenho"""
+    
+    def __init__(self, monitor_sql: MonitorConsultas, rastreador: Optional[Rastreador] = None,
+                 token: Optional[str] = None):
+        self.monitor_sql = monitor_sql
+        self.rastreador = rastreador
+        self.token = token if token is not None else os.getenv('ADMIN_TOKEN', '')
+    
+    def autorizado(self) -> bool:
+        """Sem ADMIN_TOKEN configurado o acesso é livre (desenvolvimento)"""
+        if not self.token:
+            return True
+        return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), self.token)
+    
+    def consultas_lentas(self):
+        """Endpoint com os statements mais custosos e os lentos recentes"""
+        try:
+            if not self.autorizado():
+                return jsonify({'erro': 'Não autorizado'}), 401
+            
+            ordem = request.args.get('ordem', 'total')
+            limite = request.args.get('limite', 20, type=int)
+            
+            if ordem not in ('total', 'p99'):
+                return jsonify({'erro': "Parâmetro ordem deve ser 'total' ou 'p99'"}), 400
+            
+            return jsonify({
+                'limiar_ms': self.monitor_sql.limiar * 1000,
+                'ordem': ordem,
+                'piores': self.monitor_sql.piores(ordem, limite),
+                'lentas_recentes': self.monitor_sql.lentas_recentes(limite)
+            })
+            
+        except Exception as e:
+            return jsonify({'erro': f'Erro interno: {str(e)}'}), 500
+    
+    def limpar_consultas_lentas(self):
+        """Endpoint para zerar as estatísticas (ex.: antes de um teste de carga)"""
+        if not self.autorizado():
+            return jsonify({'erro': 'Não autorizado'}), 401
+        
+        self.monitor_sql.limpar()
+        return jsonify({'sucesso': True})
+    
+    def traces(self):
+        """Endpoint com os traces amostrados no formato JSON do OTLP"""
+        try:
+            if not self.autorizado():
+                return jsonify({'erro': 'Não autorizado'}), 401
+            
+            if not self.rastreador:
+                return jsonify({'erro': 'Rastreamento não configurado'}), 404
+            
+            limite = request.args.get('limite', 50, type=int)
+            min_ms = request.args.get('min_ms', 0.0, type=float)
+            
+            return jsonify(self.rastreador.exportar_otlp(limite, min_ms))
+            
+        except Exception as e:
+            return jsonify({'erro': f'Erro interno: {str(e)}'}), 500
@@ -0,0 +1,57 @@
+# src/controllers/agenda_controller.py
+"""
+Controller para capacidade e disponibilidade de horários
+Princípio SRP: Apenas controle de requisições HTTP da agenda
+Princípio DIP: Depende de abstrações (repositories)
+"""
+
+from flask import request, jsonify
+from ..database.vaga_repository import VagaRepository
+
+
+class AgendaController:
+    """Controller para consultar e configurar vagas por horário"""
+    
+    def __init__(self, vaga_repo: VagaRepository):
+        self.vaga_repo = vaga_repo
+    
+    def disponibilidade(self):
+        """Endpoint para verificar um horário ou listar os próximos livres"""
+        try:
+            data = request.args.get('data', '')
+            periodo = request.args.get('periodo')
+            limite = request.args.get('limite', 5, type=int)
+            
+            if not data:
+                return jsonify({'erro': 'Parâmetro data é obrigatório'}), 400
+            
+            if periodo:
+                vaga = self.vaga_repo.obter_vaga(data, periodo)
+                alternativas = [] if vaga['disponiveis'] else self.vaga_repo.proximas_vagas(data, limite=limite)
+                return jsonify({'vaga': vaga, 'alternativas': alternativas})
+            
+            return jsonify(self.vaga_repo.proximas_vagas(data, limite=limite))
+            
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao consultar vagas: {str(e)}'}), 500
+    
+    def definir_capacidade(self):
+        """Endpoint para configurar a capacidade de um horário"""
+        try:
+            dados = request.json or {}
+            data = dados.get('data', '')
+            periodo = dados.get('periodo', '')
+            capacidade = dados.get('capacidade')
+            
+            if not data or not periodo or not isinstance(capacidade, int):
+                return jsonify({'erro': 'Data, período e capacidade (inteiro) são obrigatórios'}), 400
+            
+            vaga = self.vaga_repo.definir_capacidade(data, periodo, capacidade)
+            return jsonify(vaga)
+            
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao definir capacidade: {str(e)}'}), 500
@@ -0,0 +1,195 @@
+# src/controllers/async_chatbot_controller.py
+"""
+Controller assíncrono para endpoints do chatbot (Quart/ASGI)
+Princípio SRP: Apenas controle de requisições HTTP
+Princípio DIP: Depende de abstrações (services e adaptadores assíncronos)
+"""
+
+from quart import request, jsonify
+from ..services.async_chatbot_service import AsyncChatbotService
+from ..database.async_repositories import AsyncConsultaRepository, AsyncConversaRepository
+from .paginacao import cursor_conversas, ler_cursor_conversas, pagina_consultas, pagina_por_offset
+
+
+class AsyncChatbotController:
+    """Controller assíncrono para gerenciar as rotas do chatbot"""
+    
+    # Maiores páginas aceitas (mesmos valores do app WSGI)
+    LIMITE_MAXIMO_CONSULTAS = 100
+    LIMITE_MAXIMO_HISTORICO = 500
+    LIMITE_MAXIMO_CONVERSAS = 100
+    LIMITE_MAXIMO_BUSCA = 100
+    LIMITE_STATUS_LOTE = 1000
+    
+    def __init__(self, chatbot_service: AsyncChatbotService, consulta_repo: AsyncConsultaRepository,
+                 conversa_repo: AsyncConversaRepository):
+        self.chatbot_service = chatbot_service
+        self.consulta_repo = consulta_repo
+        self.conversa_repo = conversa_repo
+    
+    async def processar_mensagem(self):
+        """Endpoint para processar mensagens do usuário"""
+        try:
+            dados = await request.get_json()
+            user_id = dados.get('user_id', 'default')
+            mensagem_usuario = dados.get('mensagem', '')
+            
+            if not mensagem_usuario.strip():
+                return jsonify({'erro': 'Mensagem não pode estar vazia'}), 400
+            
+            resposta = await self.chatbot_service.processar_mensagem(user_id, mensagem_usuario)
+            status = await self.chatbot_service.obter_status_conversa(user_id)
+            
+            return jsonify({
+                'resposta': resposta,
+                'user_id': user_id,
+                'estado': status['estado']
+            })
+        
+        except Exception as e:
+            return jsonify({'erro': f'Erro interno: {str(e)}'}), 500
+    
+    async def listar_consultas(self):
+        """Endpoint para listar todas as consultas (?nome= busca pelo início do nome, com ?limite= e ?apos=)"""
+        try:
+            if 'nome' in request.args:
+                nome = request.args.get('nome', '')
+                limite = min(request.args.get('limite', 20, type=int), self.LIMITE_MAXIMO_CONSULTAS)
+                apos = request.args.get('apos', type=int)
+                
+                if limite < 1:
+                    return jsonify({'erro': 'Parâmetro limite deve ser positivo'}), 400
+                
+                consultas = await self.consulta_repo.buscar_por_nome(nome, limite, apos)
+                return jsonify(pagina_consultas(consultas, limite))
+            
+            consultas = await self.consulta_repo.buscar_todas()
+            return jsonify([consulta.to_dict() for consulta in consultas])
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao buscar consultas: {str(e)}'}), 500
+    
+    async def consultas_usuario(self, user_id: str):
+        """Endpoint para listar consultas de um usuário"""
+        try:
+            consultas = await self.consulta_repo.buscar_por_usuario(user_id)
+            return jsonify([consulta.to_dict() for consulta in consultas])
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao buscar consultas do usuário: {str(e)}'}), 500
+    
+    async def historico_conversa(self, user_id: str):
+        """Endpoint para obter histórico de conversa (?desde=<id>, ?antes=<id>, ?limite=)"""
+        try:
+            desde = request.args.get('desde', type=int)
+            antes = request.args.get('antes', type=int)
+            limite = request.args.get('limite', type=int)
+            
+            if limite is not None and limite < 1:
+                return jsonify({'erro': 'Parâmetro limite deve ser positivo'}), 400
+            if limite is not None:
+                limite = min(limite, self.LIMITE_MAXIMO_HISTORICO)
+            
+            historico = await self.conversa_repo.buscar_historico(user_id, desde, antes, limite)
+            return jsonify(historico)
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao buscar histórico: {str(e)}'}), 500
+    
+    async def buscar_historico(self):
+        """Endpoint de busca textual no histórico, por relevância (?q=, ?user_id=, ?limite=, ?offset=)"""
+        try:
+            texto = request.args.get('q', '')
+            user_id = request.args.get('user_id') or None
+            limite = min(request.args.get('limite', 20, type=int), self.LIMITE_MAXIMO_BUSCA)
+            offset = request.args.get('offset', 0, type=int)
+            
+            if limite < 1 or offset < 0:
+                return jsonify({'erro': 'Parâmetro limite deve ser positivo e offset não negativo'}), 400
+            
+            resultados = await self.conversa_repo.buscar_texto_historico(texto, limite, offset, user_id)
+            return jsonify(pagina_por_offset(resultados, limite, offset))
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao buscar no histórico: {str(e)}'}), 500
+    
+    async def conversas_ativas(self):
+        """Endpoint com as conversas ativas, das mais recentes às mais antigas (?horas=, ?limite=, ?apos=)"""
+        try:
+            horas = request.args.get('horas', 24, type=float)
+            limite = min(request.args.get('limite', 20, type=int), self.LIMITE_MAXIMO_CONVERSAS)
+            apos = ler_cursor_conversas(request.args.get('apos'))
+            
+            if horas <= 0 or limite < 1:
+                return jsonify({'erro': 'Parâmetros horas e limite devem ser positivos'}), 400
+            
+            conversas = await self.conversa_repo.listar_conversas_ativas(horas, limite, apos)
+            return jsonify({'conversas': conversas, 'proximo': cursor_conversas(conversas, limite)})
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao listar conversas ativas: {str(e)}'}), 500
+    
+    async def status_conversa(self, user_id: str):
+        """Endpoint para verificar status da conversa"""
+        try:
+            status = await self.chatbot_service.obter_status_conversa(user_id)
+            return jsonify(status)
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao obter status: {str(e)}'}), 500
+    
+    async def status_conversas_lote(self):
+        """Endpoint com o status de vários usuários: {"user_ids": [...]}"""
+        try:
+            dados = await request.get_json(silent=True) or {}
+            user_ids = dados.get('user_ids') if isinstance(dados, dict) else None
+            
+            if not isinstance(user_ids, list) or not all(isinstance(user_id, str) and user_id for user_id in user_ids):
+                return jsonify({'erro': 'Informe user_ids como uma lista de textos'}), 400
+            if len(user_ids) > self.LIMITE_STATUS_LOTE:
+                return jsonify({'erro': f'No máximo {self.LIMITE_STATUS_LOTE} user_ids por chamada'}), 400
+            
+            conversas = await self.chatbot_service.obter_status_conversas(user_ids)
+            return jsonify({'conversas': conversas})
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao obter status: {str(e)}'}), 500
+    
+    async def reiniciar_conversa(self, user_id: str):
+        """Endpoint para reiniciar conversa"""
+        try:
+            await self.chatbot_service.reiniciar_conversa(user_id)
+            return jsonify({'mensagem': 'Conversa reiniciada com sucesso!'})
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao reiniciar conversa: {str(e)}'}), 500
+    
+    async def estatisticas(self):
+        """Endpoint para obter estatísticas do sistema"""
+        try:
+            stats = await self.consulta_repo.obter_estatisticas()
+            return jsonify(stats)
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao obter estatísticas: {str(e)}'}), 500
+    
+    async def serie_consultas(self):
+        """Endpoint com a série de consultas por período (?granularidade=dia|semana|mes, ?de=, ?ate=)"""
+        try:
+            granularidade = request.args.get('granularidade', 'dia')
+            de = request.args.get('de')
+            ate = request.args.get('ate')
+            
+            serie = await self.consulta_repo.obter_serie(granularidade, de, ate)
+            return jsonify(serie)
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao obter série de consultas: {str(e)}'}), 500
+    
+    async def funil_conversas(self):
+        """Endpoint com o funil de agendamento, entradas e conversão por etapa (?de=, ?ate=)"""
+        try:
+            funil = await self.conversa_repo.obter_funil(request.args.get('de'), request.args.get('ate'))
+            return jsonify(funil)
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao obter funil: {str(e)}'}), 500
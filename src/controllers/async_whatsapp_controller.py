@@ -0,0 +1,64 @@
+# src/controllers/async_whatsapp_controller.py
+"""
+Controller assíncrono para integração com WhatsApp via Twilio (Quart/ASGI)
+Princípio SRP: Apenas responsável por requisições do WhatsApp
+Princípio DIP: Depende de abstrações (services)
+"""
+
+from quart import request
+from ..services.async_whatsapp_service import AsyncWhatsAppService
+from ..services.async_chatbot_service import AsyncChatbotService
+
+
+class AsyncWhatsAppController:
+    """Controller assíncrono para webhooks do WhatsApp via Twilio"""
+    
+    def __init__(self, whatsapp_service: AsyncWhatsAppService, chatbot_service: AsyncChatbotService):
+        self.whatsapp_service = whatsapp_service
+        self.chatbot_service = chatbot_service
+    
+    async def webhook_whatsapp(self):
+        """Endpoint para receber mensagens do WhatsApp via Twilio"""
+        try:
+            dados = self.whatsapp_service.extrair_dados_webhook(await request.form)
+            
+            numero_usuario = dados['from']
+            mensagem_usuario = dados['body']
+            
+            if not mensagem_usuario.strip():
+                return self.whatsapp_service.criar_resposta_webhook(
+                    "Desculpe, não recebi nenhuma mensagem. Tente novamente."
+                )
+            
+            # Usa o número como user_id (remove whatsapp: prefix)
+            user_id = numero_usuario.replace('whatsapp:', '')
+            
+            resposta = await self.chatbot_service.processar_mensagem(user_id, mensagem_usuario)
+            
+            return self.whatsapp_service.criar_resposta_webhook(resposta)
+            
+        except Exception as e:
+            print(f"Erro no webhook WhatsApp: {e}")
+            return self.whatsapp_service.criar_resposta_webhook(
+                "Desculpe, ocorreu um erro interno. Tente novamente mais tarde."
+            )
+    
+    async def enviar_mensagem_direta(self):
+        """Endpoint para enviar mensagens diretas via WhatsApp (para testes)"""
+        try:
+            dados = await request.get_json()
+            numero = dados.get('numero', '')
+            mensagem = dados.get('mensagem', '')
+            
+            if not numero or not mensagem:
+                return {'erro': 'Número e mensagem são obrigatórios'}, 400
+            
+            message_sid = await self.whatsapp_service.enviar_mensagem(numero, mensagem)
+            
+            if message_sid:
+                return {'sucesso': True, 'message_sid': message_sid}
+            else:
+                return {'erro': 'Falha ao enviar mensagem'}, 500
+                
+        except Exception as e:
+            return {'erro': f'Erro interno: {str(e)}'}, 500
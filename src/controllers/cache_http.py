@@ -0,0 +1,94 @@
+# src/controllers/cache_http.py
+"""
+Cache de respostas HTTP com ETag para endpoints de leitura
+Princípio SRP: Apenas validação condicional (If-None-Match) e cache de corpo
+Princípio DIP: Depende de abstração (contadores de alteração do DatabaseManager)
+
+O ETag é derivado dos contadores de alteração das tabelas lidas pelo
+endpoint. Se o cliente já tem a versão atual, a resposta é 304 sem consultar
+os repositories. Caso contrário, o corpo JSON é gerado uma vez por versão,
+comprimido com gzip e reaproveitado até a próxima escrita na tabela.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Iterable
+from flask import Response, request
+from ..database.database_manager import DatabaseManager
+
+
+class CacheRespostas:
+    """Cache LRU de respostas JSON validadas por ETag"""
+    
+    def __init__(self, db_manager: DatabaseManager, max_entradas: int = 256, nivel_gzip: int = 6):
+        self.db_manager = db_manager
+        self.max_entradas = max_entradas
+        self.nivel_gzip = nivel_gzip
+        self._entradas: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def responder(self, chave: str, tabelas: Iterable[str], gerar: Callable[[], Any], extra: str = '') -> Response:
+        """
+        Responde um GET com cache e validação condicional
+        
+        Args:
+            chave: Identifica o recurso (rota + parâmetros)
+            tabelas: Tabelas cujo conteúdo compõe a resposta
+            gerar: Função que produz o payload JSON (só chamada em cache miss)
+            extra: Entrada adicional do ETag (ex.: a data de hoje)
+        """
+        # A versão é lida antes de gerar o corpo: uma escrita concorrente
+        # muda o ETag seguinte e nunca produz um 304 desatualizado
+        versoes = self.db_manager.obter_versoes(tabelas)
+        etag = self._calcular_etag(chave, versoes, extra)
+        usar_gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+        
+        if self._cliente_atualizado(etag):
+            return self._montar(Response(status=304), etag, usar_gzip)
+        
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada and entrada[0] == etag:
+                self._entradas.move_to_end(chave)
+        
+        if not entrada or entrada[0] != etag:
+            corpo = json.dumps(gerar(), ensure_ascii=False).encode('utf-8')
+            entrada = (etag, corpo, gzip.compress(corpo, compresslevel=self.nivel_gzip))
+            with self._lock:
+                self._entradas[chave] = entrada
+                self._entradas.move_to_end(chave)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+        
+        _, corpo, corpo_gzip = entrada
+        resposta = Response(corpo_gzip if usar_gzip else corpo, mimetype='application/json')
+        if usar_gzip:
+            resposta.headers['Content-Encoding'] = 'gzip'
+        return self._montar(resposta, etag, usar_gzip)
+    
+    def limpar(self):
+        """Descarta todas as respostas em cache"""
+        with self._lock:
+            self._entradas.clear()
+    
+    def _calcular_etag(self, chave: str, versoes: dict, extra: str) -> str:
+        base = f"{chave}|{sorted(versoes.items())}|{extra}"
+        return hashlib.sha1(base.encode('utf-8')).hexdigest()[:20]
+    
+    def _cliente_atualizado(self, etag: str) -> bool:
+        """Compara o If-None-Match com as duas representações (gzip ou não)"""
+        cabecalho = request.headers.get('If-None-Match', '')
+        if not cabecalho:
+            return False
+        recebidas = {valor.strip().removeprefix('W/').strip('"') for valor in cabecalho.split(',')}
+        return '*' in recebidas or etag in recebidas or f'{etag}-gzip' in recebidas
+    
+    def _montar(self, resposta: Response, etag: str, usar_gzip: bool) -> Response:
+        # ETag forte distinto por codificação, como exige a RFC 9110
+        resposta.headers['ETag'] = f'"{etag}-gzip"' if usar_gzip else f'"{etag}"'
+        resposta.headers['Vary'] = 'Accept-Encoding'
+        resposta.headers['Cache-Control'] = 'no-cache'
+        return resposta
@@ -5,18 +5,44 @@ Princípio SRP: Apenas controle de requisições HTTP
 Princípio DIP: Depende de abstrações (services)
 """
 
+from contextlib import nullcontext
+from datetime import date
+from typing import Any, Callable, Optional, Tuple
 from flask import request, jsonify
 from ..services.chatbot_service import ChatbotService
+from ..services.rastreamento import Rastreador
 from ..database.consulta_repository import ConsultaRepository
 from ..database.conversa_repository import ConversaRepository
+from .cache_http import CacheRespostas
+from .paginacao import cursor_conversas, ler_cursor_conversas, pagina_consultas, pagina_por_offset
 
 class ChatbotController:
     """Controller para gerenciar as rotas do chatbot"""
     
-    def __init__(self, chatbot_service: ChatbotService, consulta_repo: ConsultaRepository, conversa_repo: ConversaRepository):
+    # Maior página aceita em /consultas?nome=&limite=
+    LIMITE_MAXIMO_CONSULTAS = 100
+    # Maior página aceita em /historico?limite=
+    LIMITE_MAXIMO_HISTORICO = 500
+    # Maior página aceita em /conversas/ativas?limite=
+    LIMITE_MAXIMO_CONVERSAS = 100
+    # Maior página aceita em /historico/busca?limite=
+    LIMITE_MAXIMO_BUSCA = 100
+    # Máximo de usuários em POST /conversa/status/lote
+    LIMITE_STATUS_LOTE = 1000
+    
+    def __init__(self, chatbot_service: ChatbotService, consulta_repo: ConsultaRepository, conversa_repo: ConversaRepository,
+                 cache: Optional[CacheRespostas] = None, rastreador: Optional[Rastreador] = None):
         self.chatbot_service = chatbot_service
         self.consulta_repo = consulta_repo
         self.conversa_repo = conversa_repo
+        self.cache = cache
+        self.rastreador = rastreador
+    
+    def _responder_leitura(self, tabelas: Tuple[str, ...], gerar: Callable[[], Any], extra: str = ''):
+        """Responde um GET pelo cache com ETag (se configurado)"""
+        if self.cache:
+            return self.cache.responder(request.full_path, tabelas, gerar, extra)
+        return jsonify(gerar())
     
     def processar_mensagem(self):
         """Endpoint para processar mensagens do usuário"""
@@ -28,42 +54,126 @@ class ChatbotController:
             if not mensagem_usuario.strip():
                 return jsonify({'erro': 'Mensagem não pode estar vazia'}), 400
             
-            resposta = self.chatbot_service.processar_mensagem(user_id, mensagem_usuario)
-            status = self.chatbot_service.obter_status_conversa(user_id)
+            rastreio = self.rastreador.trace('POST /mensagem', user_id) if self.rastreador else nullcontext()
+            with rastreio:
+                resposta = self.chatbot_service.processar_mensagem(user_id, mensagem_usuario)
+                status = self.chatbot_service.obter_status_conversa(user_id)
             
             return jsonify({
                 'resposta': resposta,
                 'user_id': user_id,
                 'estado': status['estado']
             })
-            
+        
         except Exception as e:
             return jsonify({'erro': f'Erro interno: {str(e)}'}), 500
     
     def listar_consultas(self):
-        """Endpoint para listar todas as consultas"""
+        """
+        Endpoint para listar todas as consultas
+        
+        Com ?nome= busca pelo início do nome do paciente (sem diferenciar
+        acentos e maiúsculas), paginado por ?limite= e ?apos=<proximo>.
+        """
         try:
-            consultas = self.consulta_repo.buscar_todas()
-            return jsonify([consulta.to_dict() for consulta in consultas])
+            if 'nome' in request.args:
+                nome = request.args.get('nome', '')
+                limite = min(request.args.get('limite', 20, type=int), self.LIMITE_MAXIMO_CONSULTAS)
+                apos = request.args.get('apos', type=int)
+                
+                if limite < 1:
+                    return jsonify({'erro': 'Parâmetro limite deve ser positivo'}), 400
+                
+                return self._responder_leitura(
+                    ('consultas',),
+                    lambda: pagina_consultas(self.consulta_repo.buscar_por_nome(nome, limite, apos), limite)
+                )
+            
+            return self._responder_leitura(
+                ('consultas',),
+                lambda: [consulta.to_dict() for consulta in self.consulta_repo.buscar_todas()]
+            )
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
         except Exception as e:
             return jsonify({'erro': f'Erro ao buscar consultas: {str(e)}'}), 500
     
     def consultas_usuario(self, user_id: str):
         """Endpoint para listar consultas de um usuário"""
         try:
-            consultas = self.consulta_repo.buscar_por_usuario(user_id)
-            return jsonify([consulta.to_dict() for consulta in consultas])
+            return self._responder_leitura(
+                ('consultas',),
+                lambda: [consulta.to_dict() for consulta in self.consulta_repo.buscar_por_usuario(user_id)]
+            )
         except Exception as e:
             return jsonify({'erro': f'Erro ao buscar consultas do usuário: {str(e)}'}), 500
     
     def historico_conversa(self, user_id: str):
-        """Endpoint para obter histórico de conversa"""
+        """Endpoint para obter histórico de conversa (?desde=<id>, ?antes=<id>, ?limite=)"""
         try:
-            historico = self.conversa_repo.buscar_historico(user_id)
-            return jsonify(historico)
+            desde = request.args.get('desde', type=int)
+            antes = request.args.get('antes', type=int)
+            limite = request.args.get('limite', type=int)
+            
+            if limite is not None and limite < 1:
+                return jsonify({'erro': 'Parâmetro limite deve ser positivo'}), 400
+            if limite is not None:
+                limite = min(limite, self.LIMITE_MAXIMO_HISTORICO)
+            
+            return self._responder_leitura(
+                ('historico_conversas',),
+                lambda: self.conversa_repo.buscar_historico(user_id, desde, antes, limite)
+            )
         except Exception as e:
             return jsonify({'erro': f'Erro ao buscar histórico: {str(e)}'}), 500
     
+    def buscar_historico(self):
+        """
+        Endpoint de busca textual no histórico, ordenada por relevância
+        
+        ?q= traz os termos (sem diferenciar acentos e maiúsculas), ?user_id=
+        restringe a um usuário e ?limite=/?offset= paginam o resultado.
+        """
+        try:
+            texto = request.args.get('q', '')
+            user_id = request.args.get('user_id') or None
+            limite = min(request.args.get('limite', 20, type=int), self.LIMITE_MAXIMO_BUSCA)
+            offset = request.args.get('offset', 0, type=int)
+            
+            if limite < 1 or offset < 0:
+                return jsonify({'erro': 'Parâmetro limite deve ser positivo e offset não negativo'}), 400
+            
+            return self._responder_leitura(
+                ('historico_conversas',),
+                lambda: pagina_por_offset(self.conversa_repo.buscar_texto_historico(texto, limite, offset, user_id), limite, offset)
+            )
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao buscar no histórico: {str(e)}'}), 500
+    
+    def conversas_ativas(self):
+        """
+        Endpoint com as conversas ativas, das mais recentes às mais antigas
+        
+        ?horas= (padrão 24) define a janela, ?limite= o tamanho da página e
+        ?apos= o cursor devolvido em 'proximo' pela página anterior.
+        """
+        try:
+            horas = request.args.get('horas', 24, type=float)
+            limite = min(request.args.get('limite', 20, type=int), self.LIMITE_MAXIMO_CONVERSAS)
+            apos = ler_cursor_conversas(request.args.get('apos'))
+            
+            if horas <= 0 or limite < 1:
+                return jsonify({'erro': 'Parâmetros horas e limite devem ser positivos'}), 400
+            
+            conversas = self.conversa_repo.listar_conversas_ativas(horas, limite, apos)
+            return jsonify({'conversas': conversas, 'proximo': cursor_conversas(conversas, limite)})
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao listar conversas ativas: {str(e)}'}), 500
+    
     def status_conversa(self, user_id: str):
         """Endpoint para verificar status da conversa"""
         try:
@@ -72,6 +182,22 @@ class ChatbotController:
         except Exception as e:
             return jsonify({'erro': f'Erro ao obter status: {str(e)}'}), 500
     
+    def status_conversas_lote(self):
+        """Endpoint com o status de vários usuários: {"user_ids": [...]}"""
+        try:
+            dados = request.get_json(silent=True) or {}
+            user_ids = dados.get('user_ids') if isinstance(dados, dict) else None
+            
+            if not isinstance(user_ids, list) or not all(isinstance(user_id, str) and user_id for user_id in user_ids):
+                return jsonify({'erro': 'Informe user_ids como uma lista de textos'}), 400
+            if len(user_ids) > self.LIMITE_STATUS_LOTE:
+                return jsonify({'erro': f'No máximo {self.LIMITE_STATUS_LOTE} user_ids por chamada'}), 400
+            
+            conversas = self.chatbot_service.obter_status_conversas(user_ids)
+            return jsonify({'conversas': conversas})
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao obter status: {str(e)}'}), 500
+    
     def reiniciar_conversa(self, user_id: str):
         """Endpoint para reiniciar conversa"""
         try:
@@ -83,7 +209,54 @@ class ChatbotController:
     def estatisticas(self):
         """Endpoint para obter estatísticas do sistema"""
         try:
-            stats = self.consulta_repo.obter_estatisticas()
-            return jsonify(stats)
+            # "Consultas de hoje" muda com a data, mesmo sem escritas
+            return self._responder_leitura(
+                ('consultas',),
+                self.consulta_repo.obter_estatisticas,
+                extra=date.today().isoformat()
+            )
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao obter estatísticas: {str(e)}'}), 500
+    
+    def serie_consultas(self):
+        """
+        Endpoint com a série de consultas por dia, semana ou mês e período
+        
+        ?granularidade= (dia, semana ou mes; padrão dia) e o intervalo
+        ?de=/?ate= pela data da consulta, inclusivo.
+        """
+        try:
+            granularidade = request.args.get('granularidade', 'dia')
+            de = request.args.get('de')
+            ate = request.args.get('ate')
+            
+            return self._responder_leitura(
+                ('consultas',),
+                lambda: self.consulta_repo.obter_serie(granularidade, de, ate)
+            )
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao obter série de consultas: {str(e)}'}), 500
+    
+    def funil_conversas(self):
+        """
+        Endpoint com o funil de agendamento (entradas e conversão por etapa)
+        
+        ?de=/?ate= recortam os dias (UTC) das transições, inclusivo. Lido dos
+        contadores pré-agregados, sem varrer o histórico.
+        """
+        try:
+            return jsonify(self.conversa_repo.obter_funil(request.args.get('de'), request.args.get('ate')))
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+        except Exception as e:
+            return jsonify({'erro': f'Erro ao obter funil: {str(e)}'}), 500
+    
+    def consultas_duplicadas(self):
+        """Endpoint com o relatório de consultas duplicadas (backfill)"""
+        try:
+            duplicadas = self.consulta_repo.relatorio_duplicadas()
+            return jsonify({'total': len(duplicadas), 'duplicadas': duplicadas})
         except Exception as e:
-            return jsonify({'erro': f'Erro ao obter estatísticas: {str(e)}'}), 500
\ No newline at end of file
+            return jsonify({'erro': f'Erro ao gerar relatório de duplicadas: {str(e)}'}), 500
\ No newline at end of file
@@ -0,0 +1,53 @@
+# src/controllers/eventos_controller.py
+"""
+Controller para o stream de eventos do dashboard (Server-Sent Events)
+Princípio SRP: Apenas converte eventos do barramento para o protocolo SSE
+Princípio DIP: Depende de abstrações (EventBus e publicador de estatísticas)
+"""
+
+import json
+import queue
+from flask import Response, stream_with_context
+from ..services.event_bus import EventBus
+from ..services.publicador_estatisticas import PublicadorEstatisticas
+
+
+def formatar_sse(evento: dict) -> str:
+    """Serializa um evento do barramento no formato text/event-stream"""
+    dados = json.dumps(evento['dados'], ensure_ascii=False)
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {dados}\n\n"
+
+
+class EventosController:
+    """Controller para o endpoint /eventos"""
+    
+    # Comentário SSE enviado periodicamente para manter a conexão viva em proxies
+    INTERVALO_HEARTBEAT = 15.0
+    
+    def __init__(self, event_bus: EventBus, publicador: PublicadorEstatisticas):
+        self.event_bus = event_bus
+        self.publicador = publicador
+    
+    def stream(self):
+        """Endpoint SSE: estatísticas iniciais e, depois, só as mudanças"""
+        self.publicador.iniciar()
+        fila = self.event_bus.assinar_fila()
+        
+        def gerar():
+            try:
+                yield "retry: 3000\n\n"
+                yield formatar_sse({'id': 0, 'tipo': 'estatisticas', 'dados': self.publicador.estatisticas_atuais()})
+                
+                while True:
+                    try:
+                        evento = fila.get(timeout=self.INTERVALO_HEARTBEAT)
+                        yield formatar_sse(evento)
+                    except queue.Empty:
+                        yield ": heartbeat\n\n"
+            finally:
+                self.event_bus.cancelar_fila(fila)
+        
+        return Response(stream_with_context(gerar()), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
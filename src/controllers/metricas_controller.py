@@ -0,0 +1,40 @@
+# src/controllers/metricas_controller.py
+"""
+Controller para exposição de métricas no formato Prometheus
+Princípio SRP: Apenas mede requisições HTTP e serve GET /metrics
+Princípio DIP: Depende do registro de métricas injetado
+"""
+
+import time
+from flask import Flask, Response, g, request
+from ..services.metricas import HTTP_DURACAO, HTTP_REQUISICOES, REGISTRO, RegistroMetricas
+
+
+class MetricasController:
+    """Controller para o endpoint /metrics e a medição das rotas"""
+    
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+    
+    def __init__(self, registro: RegistroMetricas = REGISTRO):
+        self.registro = registro
+    
+    def instrumentar(self, app: Flask):
+        """Registra hooks que medem cada requisição pelo padrão da rota"""
+        app.before_request(self._iniciar_medicao)
+        app.after_request(self._finalizar_medicao)
+    
+    def exportar(self):
+        """Endpoint de scrape do Prometheus"""
+        return Response(self.registro.exportar(), content_type=self.CONTENT_TYPE)
+    
+    def _iniciar_medicao(self):
+        g.inicio_requisicao = time.perf_counter()
+    
+    def _finalizar_medicao(self, response):
+        inicio = g.pop('inicio_requisicao', None)
+        # Rótulo pelo padrão (/consultas/<user_id>) para não explodir a cardinalidade
+        rota = request.url_rule.rule if request.url_rule else 'nao_encontrada'
+        if inicio is not None:
+            HTTP_DURACAO.observar(time.perf_counter() - inicio, rota=rota, metodo=request.method)
+        HTTP_REQUISICOES.inc(rota=rota, metodo=request.method, status=str(response.status_code))
+        return response
@@ -0,0 +1,42 @@
+# src/controllers/paginacao.py
+"""
+Cursores de paginação dos endpoints de listagem
+Princípio SRP: Apenas codifica e valida cursores e páginas (compartilhados pelos apps WSGI e ASGI)
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+
+def cursor_conversas(conversas: List[dict], limite: int) -> Optional[str]:
+    """Cursor da próxima página de /conversas/ativas ('<ultima_atividade>|<user_id>')"""
+    if len(conversas) < limite:
+        return None
+    ultima = conversas[-1]
+    return f"{ultima['ultima_atividade']}|{ultima['user_id']}"
+
+
+def pagina_consultas(consultas: list, limite: int) -> dict:
+    """Página de /consultas?nome= com o cursor da próxima (id da última consulta)"""
+    return {
+        'consultas': [consulta.to_dict() for consulta in consultas],
+        'proximo': consultas[-1].id if len(consultas) == limite else None
+    }
+
+
+def ler_cursor_conversas(cursor: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Interpreta o cursor de cursor_conversas; levanta ValueError se malformado"""
+    if not cursor:
+        return None
+    ultima_atividade, separador, user_id = cursor.partition('|')
+    if not separador or not re.fullmatch(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}', ultima_atividade):
+        raise ValueError('Cursor apos inválido')
+    return ultima_atividade, user_id
+
+
+def pagina_por_offset(resultados: List[dict], limite: int, offset: int) -> dict:
+    """Página de /historico/busca com o offset da próxima (None na última)"""
+    return {
+        'resultados': resultados,
+        'proximo_offset': offset + limite if len(resultados) == limite else None
+    }
@@ -5,17 +5,26 @@ Princípio SRP: Apenas responsável por requisições do WhatsApp
 Princípio DIP: Depende de abstrações (services)
 """
 
+from contextlib import nullcontext
+from typing import Optional
 from flask import request
 from ..services.whatsapp_service import WhatsAppService
 from ..services.chatbot_service import ChatbotService
+from ..services.rastreamento import Rastreador
 
 
 class WhatsAppController:
     """Controller para gerenciar webhooks do WhatsApp via Twilio"""
     
-    def __init__(self, whatsapp_service: WhatsAppService, chatbot_service: ChatbotService):
+    def __init__(self, whatsapp_service: WhatsAppService, chatbot_service: ChatbotService,
+                 rastreador: Optional[Rastreador] = None):
         self.whatsapp_service = whatsapp_service
         self.chatbot_service = chatbot_service
+        self.rastreador = rastreador
+    
+    def _rastrear(self, nome: str, user_id: str):
+        """Abre um trace amostrado da requisição (se configurado)"""
+        return self.rastreador.trace(nome, user_id) if self.rastreador else nullcontext()
     
     def webhook_whatsapp(self):
         """Endpoint para receber mensagens do WhatsApp via Twilio"""
@@ -35,7 +44,8 @@ class WhatsAppController:
             user_id = numero_usuario.replace('whatsapp:', '')
             
             # Processa a mensagem com o chatbot
-            resposta = self.chatbot_service.processar_mensagem(user_id, mensagem_usuario)
+            with self._rastrear('POST /webhook/whatsapp', user_id):
+                resposta = self.chatbot_service.processar_mensagem(user_id, mensagem_usuario)
             
             # Retorna resposta TwiML
             return self.whatsapp_service.criar_resposta_webhook(resposta)
@@ -56,7 +66,8 @@ class WhatsAppController:
             if not numero or not mensagem:
                 return {'erro': 'Número e mensagem são obrigatórios'}, 400
             
-            message_sid = self.whatsapp_service.enviar_mensagem(numero, mensagem)
+            with self._rastrear('POST /whatsapp/enviar', numero):
+                message_sid = self.whatsapp_service.enviar_mensagem(numero, mensagem)
             
             if message_sid:
                 return {'sucesso': True, 'message_sid': message_sid}
@@ -0,0 +1,275 @@
+# src/database/arquivo_historico.py
+"""
+Arquivo frio do histórico de conversas em segmentos comprimidos
+Princípio SRP: Apenas grava e lê os segmentos de histórico arquivado
+
+Um segmento por mês (historico-AAAA-MM.seg), com um bloco zlib por usuário e
+um índice user_id -> (offset, tamanho, crc32, menor id, maior id) no final do
+arquivo. Ler o histórico de um usuário descomprime só o bloco dele em cada
+segmento, e só nos segmentos cuja faixa de ids cruza o cursor pedido.
+
+Formato (big-endian):
+    b'ATHS' | versão (1 byte) | blocos... | índice zlib(JSON)
+    | rodapé: offset do índice (uint64), tamanho (uint32), crc32 (uint32), b'ATHS'
+(a versão 1 não tinha a faixa de ids no índice e continua legível)
+
+Cada anexar grava só as linhas novas em uma parte do mês
+(historico-AAAA-MM.NNNN.seg), sem regravar o que já está arquivado; compactar
+junta as partes no segmento do mês uma vez por rodada de arquivamento. As
+linhas guardam o id original de historico_conversas e a leitura descarta ids
+repetidos entre partes, então uma varredura interrompida pode simplesmente
+ser repetida.
+"""
+
+import glob
+import json
+import os
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+MAGIC = b'ATHS'
+VERSAO_FORMATO = 2
+CABECALHO = struct.Struct('>4sB')
+RODAPE = struct.Struct('>QII4s')
+
+# (id, mensagem_usuario, resposta_bot, estado, timestamp)
+Linha = Tuple[int, str, str, str, str]
+
+
+class SegmentoInvalidoError(ValueError):
+    """Levantada quando um segmento está truncado, corrompido ou em formato desconhecido"""
+
+
+class ArquivoHistorico:
+    """Segmentos mensais e comprimidos do histórico, indexados por user_id"""
+    
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+        self._indices: Dict[str, Tuple[tuple, dict]] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def periodo(timestamp: str) -> str:
+        """Período (AAAA-MM) do segmento de uma linha, a partir do timestamp do SQLite"""
+        return timestamp[:7]
+    
+    def periodos(self) -> List[str]:
+        """Períodos com segmento gravado, do mais antigo ao mais recente"""
+        caminhos = glob.glob(os.path.join(self.diretorio, 'historico-*.seg'))
+        return sorted({os.path.basename(caminho)[len('historico-'):len('historico-AAAA-MM')] for caminho in caminhos})
+    
+    def buscar(self, user_id: str, desde_id: Optional[int] = None, antes_id: Optional[int] = None) -> List[Linha]:
+        """
+        Linhas arquivadas de um usuário, em ordem de período e id
+        
+        Com desde_id/antes_id, só as linhas com id no intervalo aberto; blocos
+        cuja faixa de ids fica fora dele não são descomprimidos.
+        """
+        linhas = []
+        for periodo in self.periodos():
+            do_periodo: Dict[int, Linha] = {}
+            for caminho in self._segmentos(periodo):
+                for linha in self._ler_usuario(caminho, user_id, desde_id, antes_id):
+                    do_periodo.setdefault(linha[0], linha)
+            linhas.extend(do_periodo[linha_id] for linha_id in sorted(do_periodo))
+        return linhas
+    
+    def anexar(self, linhas: Iterable[Tuple[str, Linha]]) -> int:
+        """
+        Grava linhas (user_id, linha) numa nova parte do segmento de cada período
+        
+        Só as linhas novas são gravadas: os blocos já arquivados são lidos
+        apenas quando a faixa de ids deles cobre algum id recebido (varredura
+        repetida). Retorna quantas linhas novas entraram no arquivo.
+        """
+        por_periodo: Dict[str, Dict[str, Dict[int, Linha]]] = {}
+        for user_id, linha in linhas:
+            por_periodo.setdefault(self.periodo(linha[4]), {}).setdefault(user_id, {})[linha[0]] = linha
+        
+        novas = 0
+        with self._bloqueio():
+            for periodo, usuarios in por_periodo.items():
+                for caminho in self._segmentos(periodo):
+                    self._descartar_arquivadas(caminho, usuarios)
+                usuarios = {user_id: do_usuario for user_id, do_usuario in usuarios.items() if do_usuario}
+                if usuarios:
+                    self._gravar(self._nova_parte(periodo), usuarios)
+                    novas += sum(len(do_usuario) for do_usuario in usuarios.values())
+        return novas
+    
+    def compactar(self) -> int:
+        """
+        Junta as partes de cada período no segmento do mês
+        
+        O segmento compactado substitui o antigo antes de as partes serem
+        removidas, então um leitor concorrente nunca perde linhas (no máximo
+        as vê repetidas, e a leitura descarta ids repetidos). Retorna quantos
+        períodos foram compactados.
+        """
+        compactados = 0
+        with self._bloqueio():
+            for periodo in self.periodos():
+                segmentos = self._segmentos(periodo)
+                partes = [caminho for caminho in segmentos if caminho != self._caminho(periodo)]
+                if not partes:
+                    continue
+                
+                usuarios: Dict[str, Dict[int, Linha]] = {}
+                for caminho in segmentos:
+                    for user_id, do_usuario in self._ler_todos(caminho):
+                        destino = usuarios.setdefault(user_id, {})
+                        for linha_id, linha in do_usuario.items():
+                            destino.setdefault(linha_id, linha)
+                
+                self._gravar(self._caminho(periodo), usuarios)
+                for caminho in partes:
+                    os.remove(caminho)
+                    self._indices.pop(caminho, None)
+                compactados += 1
+        return compactados
+    
+    def _caminho(self, periodo: str) -> str:
+        return os.path.join(self.diretorio, f'historico-{periodo}.seg')
+    
+    def _partes(self, periodo: str) -> List[Tuple[int, str]]:
+        """Partes (número, caminho) ainda não compactadas de um período"""
+        partes = []
+        for caminho in glob.glob(os.path.join(self.diretorio, f'historico-{periodo}.*.seg')):
+            numero = os.path.basename(caminho)[len(f'historico-{periodo}.'):-len('.seg')]
+            if numero.isdigit():
+                partes.append((int(numero), caminho))
+        return sorted(partes)
+    
+    def _segmentos(self, periodo: str) -> List[str]:
+        """
+        Arquivos de um período na ordem segura de leitura
+        
+        Partes da mais nova para a mais antiga e o segmento do mês por
+        último: se compactar remover uma parte no meio da leitura, o
+        segmento do mês lido depois já contém as linhas dela.
+        """
+        caminhos = [caminho for _, caminho in reversed(self._partes(periodo))]
+        return caminhos + [self._caminho(periodo)]
+    
+    def _nova_parte(self, periodo: str) -> str:
+        partes = self._partes(periodo)
+        numero = partes[-1][0] + 1 if partes else 1
+        return os.path.join(self.diretorio, f'historico-{periodo}.{numero:04d}.seg')
+    
+    def _descartar_arquivadas(self, caminho: str, usuarios: Dict[str, Dict[int, Linha]]):
+        """Remove de `usuarios` as linhas que já estão no segmento"""
+        try:
+            with open(caminho, 'rb') as arquivo:
+                indice = self._indice(caminho, arquivo)
+                for user_id, do_usuario in usuarios.items():
+                    posicao = indice.get(user_id)
+                    if not posicao or not do_usuario:
+                        continue
+                    if len(posicao) == 5 and not any(posicao[3] <= linha_id <= posicao[4] for linha_id in do_usuario):
+                        continue
+                    for linha in self._ler_bloco(caminho, arquivo, posicao):
+                        do_usuario.pop(linha[0], None)
+        except FileNotFoundError:
+            pass
+    
+    @contextmanager
+    def _bloqueio(self) -> Iterator[None]:
+        """Serializa escritores da mesma pasta (threads e processos)"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.diretorio, '.lock'), 'w') as trava:
+                fcntl.flock(trava, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(trava, fcntl.LOCK_UN)
+    
+    def _gravar(self, caminho: str, usuarios: Dict[str, Dict[int, Linha]]):
+        """Grava o segmento inteiro de forma atômica"""
+        indice = {}
+        temporario = f'{caminho}.{os.getpid()}.tmp'
+        
+        with open(temporario, 'wb') as arquivo:
+            arquivo.write(CABECALHO.pack(MAGIC, VERSAO_FORMATO))
+            for user_id in sorted(usuarios):
+                linhas = [list(usuarios[user_id][linha_id]) for linha_id in sorted(usuarios[user_id])]
+                bloco = zlib.compress(json.dumps(linhas, separators=(',', ':')).encode('utf-8'))
+                indice[user_id] = [arquivo.tell(), len(bloco), zlib.crc32(bloco), linhas[0][0], linhas[-1][0]]
+                arquivo.write(bloco)
+            
+            inicio_indice = arquivo.tell()
+            dados_indice = zlib.compress(json.dumps(indice, separators=(',', ':')).encode('utf-8'))
+            arquivo.write(dados_indice)
+            arquivo.write(RODAPE.pack(inicio_indice, len(dados_indice), zlib.crc32(dados_indice), MAGIC))
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        
+        os.replace(temporario, caminho)
+    
+    def _indice(self, caminho: str, arquivo) -> dict:
+        """Índice do segmento, em cache enquanto o arquivo não for regravado"""
+        estado = os.fstat(arquivo.fileno())
+        assinatura = (estado.st_ino, estado.st_mtime_ns, estado.st_size)
+        
+        em_cache = self._indices.get(caminho)
+        if em_cache and em_cache[0] == assinatura:
+            return em_cache[1]
+        
+        if estado.st_size < CABECALHO.size + RODAPE.size:
+            raise SegmentoInvalidoError(f"{caminho}: arquivo truncado")
+        arquivo.seek(-RODAPE.size, os.SEEK_END)
+        inicio, tamanho, crc, magic = RODAPE.unpack(arquivo.read(RODAPE.size))
+        if magic != MAGIC:
+            raise SegmentoInvalidoError(f"{caminho}: rodapé desconhecido")
+        
+        arquivo.seek(inicio)
+        dados = arquivo.read(tamanho)
+        if zlib.crc32(dados) != crc:
+            raise SegmentoInvalidoError(f"{caminho}: checksum do índice inválido")
+        
+        indice = json.loads(zlib.decompress(dados))
+        self._indices[caminho] = (assinatura, indice)
+        return indice
+    
+    def _ler_bloco(self, caminho: str, arquivo, posicao: list) -> List[Linha]:
+        offset, tamanho, crc = posicao[:3]
+        arquivo.seek(offset)
+        bloco = arquivo.read(tamanho)
+        if zlib.crc32(bloco) != crc:
+            raise SegmentoInvalidoError(f"{caminho}: checksum de bloco inválido")
+        return [tuple(linha) for linha in json.loads(zlib.decompress(bloco))]
+    
+    def _ler_usuario(self, caminho: str, user_id: str, desde_id: Optional[int] = None,
+                     antes_id: Optional[int] = None) -> List[Linha]:
+        try:
+            with open(caminho, 'rb') as arquivo:
+                posicao = self._indice(caminho, arquivo).get(user_id)
+                if not posicao:
+                    return []
+                if len(posicao) == 5 and ((desde_id is not None and posicao[4] <= desde_id)
+                                          or (antes_id is not None and posicao[3] >= antes_id)):
+                    return []
+                linhas = self._ler_bloco(caminho, arquivo, posicao)
+        except FileNotFoundError:
+            return []
+        return [linha for linha in linhas
+                if (desde_id is None or linha[0] > desde_id) and (antes_id is None or linha[0] < antes_id)]
+    
+    def _ler_todos(self, caminho: str) -> Iterator[Tuple[str, Dict[int, Linha]]]:
+        try:
+            with open(caminho, 'rb') as arquivo:
+                for user_id, posicao in self._indice(caminho, arquivo).items():
+                    yield user_id, {linha[0]: linha for linha in self._ler_bloco(caminho, arquivo, posicao)}
+        except FileNotFoundError:
+            return
@@ -0,0 +1,91 @@
+# src/database/async_repositories.py
+"""
+Adaptadores assíncronos para os repositories SQLite
+Princípio SRP: Apenas ponte entre asyncio e o acesso bloqueante ao banco
+Princípio DIP: Envolvem os repositories síncronos existentes (sem duplicar SQL)
+
+O módulo sqlite3 é bloqueante, então cada chamada roda em um executor de
+threads dedicado ao banco. O event loop fica livre para atender outras
+conexões enquanto a consulta executa.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Optional, Tuple
+from ..models.consulta import Consulta
+from ..models.conversa import Conversa
+from .consulta_repository import ConsultaRepository
+from .conversa_repository import ConversaRepository
+
+
+def criar_executor_banco(max_threads: int = 4) -> ThreadPoolExecutor:
+    """Cria o executor de threads reservado para operações SQLite"""
+    return ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='sqlite')
+
+
+class _AdaptadorAsync:
+    """Base: executa funções bloqueantes no executor do banco"""
+    
+    def __init__(self, executor: ThreadPoolExecutor):
+        self.executor = executor
+    
+    async def _executar(self, funcao, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(funcao, *args, **kwargs))
+
+
+class AsyncConsultaRepository(_AdaptadorAsync):
+    """Versão assíncrona do ConsultaRepository"""
+    
+    def __init__(self, consulta_repo: ConsultaRepository, executor: ThreadPoolExecutor):
+        super().__init__(executor)
+        self.repo = consulta_repo
+    
+    async def salvar(self, consulta: Consulta) -> int:
+        return await self._executar(self.repo.salvar, consulta)
+    
+    async def buscar_todas(self) -> List[Consulta]:
+        return await self._executar(self.repo.buscar_todas)
+    
+    async def buscar_por_usuario(self, user_id: str) -> List[Consulta]:
+        return await self._executar(self.repo.buscar_por_usuario, user_id)
+    
+    async def buscar_por_nome(self, nome: str, limite: int = 20, apos: Optional[int] = None) -> List[Consulta]:
+        return await self._executar(self.repo.buscar_por_nome, nome, limite, apos)
+    
+    async def obter_serie(self, granularidade: str = 'dia', de: Optional[str] = None,
+                          ate: Optional[str] = None) -> List[dict]:
+        return await self._executar(self.repo.obter_serie, granularidade, de, ate)
+    
+    async def obter_estatisticas(self) -> dict:
+        return await self._executar(self.repo.obter_estatisticas)
+
+
+class AsyncConversaRepository(_AdaptadorAsync):
+    """Versão assíncrona do ConversaRepository"""
+    
+    def __init__(self, conversa_repo: ConversaRepository, executor: ThreadPoolExecutor):
+        super().__init__(executor)
+        self.repo = conversa_repo
+    
+    async def carregar_estado(self, user_id: str) -> Optional[Conversa]:
+        return await self._executar(self.repo.carregar_estado, user_id)
+    
+    async def remover_estado(self, user_id: str):
+        return await self._executar(self.repo.remover_estado, user_id)
+    
+    async def buscar_historico(self, user_id: str, desde_id: Optional[int] = None, antes_id: Optional[int] = None,
+                               limite: Optional[int] = None) -> List[dict]:
+        return await self._executar(self.repo.buscar_historico, user_id, desde_id, antes_id, limite)
+    
+    async def buscar_texto_historico(self, texto: str, limite: int = 20, offset: int = 0,
+                                     user_id: Optional[str] = None) -> List[dict]:
+        return await self._executar(self.repo.buscar_texto_historico, texto, limite, offset, user_id)
+    
+    async def obter_funil(self, de: Optional[str] = None, ate: Optional[str] = None) -> dict:
+        return await self._executar(self.repo.obter_funil, de, ate)
+    
+    async def listar_conversas_ativas(self, horas: float = 24, limite: int = 20,
+                                      apos: Optional[Tuple[str, str]] = None) -> List[dict]:
+        return await self._executar(self.repo.listar_conversas_ativas, horas, limite, apos)
@@ -6,32 +6,125 @@ Princípio DIP: Depende de abstração (DatabaseManager)
 """
 
 import json
+import sqlite3
 from typing import List, Optional
 from ..models.consulta import Consulta
+from ..services.metricas import instrumentar_repositorio
+from ..utils.normalizacao import chave_data, chave_nome, interpretar_data, normalizar_data, normalizar_periodo
 from .database_manager import DatabaseManager
+from .exceptions import ConsultaDuplicadaError
+from .vaga_repository import VagaRepository
 from datetime import datetime
 
+@instrumentar_repositorio
 class ConsultaRepository:
     """Repository para operações com consultas"""
     
-    def __init__(self, db_manager: DatabaseManager):
+    # Início do bucket de cada granularidade de /estatisticas/serie (semanas começam na segunda)
+    INICIO_BUCKET = {
+        'dia': 'data',
+        'semana': "date(data, 'weekday 0', '-6 days')",
+        'mes': "substr(data, 1, 7) || '-01'"
+    }
+    
+    def __init__(self, db_manager: DatabaseManager, vaga_repo: Optional[VagaRepository] = None):
         self.db_manager = db_manager
+        self.vaga_repo = vaga_repo
     
     def salvar(self, consulta: Consulta) -> int:
-        """Salva uma consulta e retorna o ID"""
+        """
+        Salva uma consulta e retorna o ID
+        
+        O INSERT passa pelo índice único (user_id, data_normalizada, periodo),
+        então detectar um agendamento repetido custa uma única sondagem no
+        índice. Com controle de vagas, a reserva do horário acontece na mesma
+        transação: ou ambos são gravados, ou nenhum. O mesmo vale para o
+        bucket do dia em consultas_por_dia (série de /estatisticas/serie).
+        
+        Raises:
+            ConsultaDuplicadaError: Se o usuário já tem consulta no horário
+            VagaIndisponivelError: Se o horário já está lotado
+        """
+        data_normalizada = chave_data(consulta.data)
+        periodo = normalizar_periodo(consulta.periodo) or consulta.periodo
+        
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            
+            try:
+                cursor.execute('''
+                    INSERT INTO consultas (nome, data, periodo, user_id, data_normalizada, nome_normalizado)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (consulta.nome, consulta.data, periodo, consulta.user_id, data_normalizada, chave_nome(consulta.nome)))
+            except sqlite3.IntegrityError as e:
+                if 'UNIQUE' not in str(e):
+                    raise
+                cursor.execute('''
+                    SELECT id FROM consultas
+                    WHERE user_id = ? AND data_normalizada = ? AND periodo = ?
+                ''', (consulta.user_id, data_normalizada, periodo))
+                existente = cursor.fetchone()
+                raise ConsultaDuplicadaError(consulta.data, periodo, existente[0] if existente else None)
+            
+            consulta_id = cursor.lastrowid
+            
+            if self.vaga_repo:
+                self.vaga_repo.reservar(cursor, consulta.data, periodo)
+            
+            if normalizar_data(consulta.data):
+                cursor.execute('''
+                    INSERT INTO consultas_por_dia (data, periodo, total) VALUES (?, ?, 1)
+                    ON CONFLICT(data, periodo) DO UPDATE SET total = total + 1
+                ''', (data_normalizada, periodo))
+            
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        return consulta_id
+    
+    def relatorio_duplicadas(self) -> List[dict]:
+        """
+        Lista as consultas duplicadas encontradas no backfill do índice único
+        
+        Cada item traz a consulta repetida e o ID da consulta original mantida.
+        """
         conn = self.db_manager.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
-            INSERT INTO consultas (nome, data, periodo, user_id)
-            VALUES (?, ?, ?, ?)
-        ''', (consulta.nome, consulta.data, consulta.periodo, consulta.user_id))
+            SELECT id, nome, data, periodo, data_criacao, user_id
+            FROM consultas
+            WHERE data_normalizada IS NULL
+            ORDER BY id
+        ''')
         
-        consulta_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        relatorio = []
+        for row in cursor.fetchall():
+            cursor.execute('''
+                SELECT id FROM consultas
+                WHERE user_id = ? AND data_normalizada = ? AND periodo = ?
+            ''', (row[5], chave_data(row[2]), normalizar_periodo(row[3]) or row[3]))
+            original = cursor.fetchone()
+            
+            relatorio.append({
+                'id': row[0],
+                'nome': row[1],
+                'data': row[2],
+                'periodo': row[3],
+                'data_criacao': row[4],
+                'user_id': row[5],
+                'duplicada_de': original[0] if original else None
+            })
         
-        return consulta_id
+        conn.close()
+        return relatorio
     
     def buscar_todas(self) -> List[Consulta]:
         """Busca todas as consultas"""
@@ -86,6 +179,99 @@ class ConsultaRepository:
         conn.close()
         return consultas
     
+    def buscar_por_nome(self, nome: str, limite: int = 20, apos: Optional[int] = None) -> List[Consulta]:
+        """
+        Busca consultas cujo nome do paciente começa com o texto informado
+        
+        Sem diferenciar acentos e maiúsculas ('jose' encontra 'José Silva').
+        O prefixo vira um intervalo no índice (nome_normalizado, id), então o
+        custo depende só do tamanho da página. Ordena por nome e id; apos é o
+        id da última consulta da página anterior. Levanta ValueError se o
+        nome estiver vazio.
+        """
+        prefixo = chave_nome(nome)
+        if not prefixo:
+            raise ValueError('Informe o nome para a busca')
+        # Menor texto maior que todos os que começam com o prefixo
+        limite_superior = prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+        
+        filtros = ['nome_normalizado >= ?', 'nome_normalizado < ?']
+        parametros: list = [prefixo, limite_superior]
+        if apos is not None:
+            filtros.append('(nome_normalizado, id) > (SELECT nome_normalizado, id FROM consultas WHERE id = ?)')
+            parametros.append(apos)
+        parametros.append(limite)
+        
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT id, nome, data, periodo, data_criacao, user_id
+            FROM consultas
+            WHERE {' AND '.join(filtros)}
+            ORDER BY nome_normalizado, id
+            LIMIT ?
+        ''', parametros)
+        
+        consultas = [
+            Consulta(id=row[0], nome=row[1], data=row[2], periodo=row[3], data_criacao=row[4], user_id=row[5])
+            for row in cursor.fetchall()
+        ]
+        
+        conn.close()
+        return consultas
+    
+    def obter_serie(self, granularidade: str = 'dia', de: Optional[str] = None,
+                    ate: Optional[str] = None) -> List[dict]:
+        """
+        Série de consultas por data da consulta e período, por dia, semana ou mês
+        
+        Lida do rollup consultas_por_dia: o custo depende do número de dias no
+        intervalo, não do número de consultas. de/ate (inclusivos, dd/mm/aaaa
+        ou aaaa-mm-dd) recortam os dias, mesmo no meio de uma semana ou mês.
+        Buckets sem consultas não aparecem. Levanta ValueError para
+        granularidade ou datas inválidas.
+        """
+        if granularidade not in self.INICIO_BUCKET:
+            raise ValueError(f"Granularidade deve ser uma de: {', '.join(self.INICIO_BUCKET)}")
+        
+        filtros = []
+        parametros = []
+        for operador, texto in (('>=', de), ('<=', ate)):
+            if texto:
+                filtros.append(f'data {operador} ?')
+                parametros.append(self._data_iso(texto))
+        where = f"WHERE {' AND '.join(filtros)}" if filtros else ''
+        
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT {self.INICIO_BUCKET[granularidade]} AS inicio, periodo, SUM(total)
+            FROM consultas_por_dia
+            {where}
+            GROUP BY inicio, periodo
+            ORDER BY inicio, periodo
+        ''', parametros)
+        
+        serie = []
+        for inicio, periodo, total in cursor.fetchall():
+            if not serie or serie[-1]['inicio'] != inicio:
+                serie.append({'inicio': inicio, 'total': 0, 'por_periodo': {}})
+            serie[-1]['total'] += total
+            serie[-1]['por_periodo'][periodo] = total
+        
+        conn.close()
+        return serie
+    
+    @staticmethod
+    def _data_iso(texto: str) -> str:
+        """Data dd/mm/aaaa ou aaaa-mm-dd em ISO; levanta ValueError se inválida"""
+        iso = interpretar_data(texto)
+        if not iso:
+            raise ValueError(f"Data inválida: {texto} (use dd/mm/aaaa ou aaaa-mm-dd)")
+        return iso
+    
     def obter_estatisticas(self) -> dict:
         """Obtém estatísticas das consultas"""
         conn = self.db_manager.get_connection()
@@ -5,30 +5,77 @@ Princípio SRP: Apenas operações de conversa no banco
 """
 
 import json
-from typing import List, Optional
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from ..models.conversa import Conversa, EstadoConversa
-from .database_manager import DatabaseManager
+from ..services.metricas import instrumentar_repositorio
+from ..utils.normalizacao import interpretar_data, normalizar_texto
+from .arquivo_historico import ArquivoHistorico
+from .database_manager import DatabaseManager, hash_resposta
 
+@instrumentar_repositorio
 class ConversaRepository:
     """Repository para operações com estado de conversas e histórico"""
     
-    def __init__(self, db_manager: DatabaseManager):
+    # Textos de resposta -> id em respostas_bot mantidos em memória, em LRU: os
+    # templates do ChatbotService se repetem e ficam; os com parâmetros (nomes,
+    # datas) variam e são os primeiros a sair
+    MAX_IDS_RESPOSTAS = 2048
+    
+    # Etapas do funil de agendamento, na ordem (INICIAL é o ponto de partida)
+    ETAPAS_FUNIL = (
+        EstadoConversa.AGUARDANDO_NOME,
+        EstadoConversa.AGUARDANDO_DATA,
+        EstadoConversa.AGUARDANDO_PERIODO,
+        EstadoConversa.FINALIZADO
+    )
+    
+    def __init__(self, db_manager: DatabaseManager, arquivo: Optional[ArquivoHistorico] = None):
         self.db_manager = db_manager
+        self.arquivo = arquivo
+        self._ids_respostas: 'OrderedDict[str, int]' = OrderedDict()
+        self._lock_ids = threading.Lock()
     
-    def salvar_estado(self, conversa: Conversa):
-        """Salva o estado atual da conversa"""
+    def salvar_estado(self, conversa: Conversa, anterior: Optional[EstadoConversa] = None):
+        """
+        Salva o estado atual da conversa e marca a ultima_atividade (usada na expiração)
+        
+        Se anterior for informado e diferente do estado atual, a transição
+        entra em transicoes_por_dia na mesma transação.
+        """
         conn = self.db_manager.get_connection()
         cursor = conn.cursor()
         
         dados_json = json.dumps(conversa.dados)
         
+        try:
+            cursor.execute('''
+                INSERT INTO estados_conversa (user_id, estado, dados_coletados, ultima_atividade)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    estado = excluded.estado,
+                    dados_coletados = excluded.dados_coletados,
+                    ultima_atividade = excluded.ultima_atividade
+            ''', (conversa.user_id, conversa.estado.value, dados_json))
+            self._contar_transicao(cursor, anterior, conversa.estado)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def _contar_transicao(self, cursor, de: Optional[EstadoConversa], para: EstadoConversa):
+        """Incrementa o contador do dia (UTC) da transição de -> para, na transação do cursor"""
+        if de is None or de == para:
+            return
         cursor.execute('''
-            INSERT OR REPLACE INTO estados_conversa (user_id, estado, dados_coletados)
-            VALUES (?, ?, ?)
-        ''', (conversa.user_id, conversa.estado.value, dados_json))
-        
-        conn.commit()
-        conn.close()
+            INSERT INTO transicoes_por_dia (dia, de, para, total)
+            VALUES (date('now'), ?, ?, 1)
+            ON CONFLICT (dia, de, para) DO UPDATE SET total = total + 1
+        ''', (de.value, para.value))
     
     def carregar_estado(self, user_id: str) -> Optional[Conversa]:
         """Carrega o estado da conversa do banco"""
@@ -55,56 +102,455 @@ class ConversaRepository:
         
         return None
     
-    def remover_estado(self, user_id: str):
-        """Remove o estado da conversa"""
+    def carregar_estados_recentes(self, horas: float, limite: int = 5000, lote: int = 500) -> Iterator[Conversa]:
+        """
+        Percorre as conversas ativas nas últimas `horas`, das mais recentes às mais antigas
+        
+        Uma única consulta pelo índice de ultima_atividade, lida em lotes
+        (fetchmany): a memória usada não depende do total de conversas.
+        """
+        conn = self.db_manager.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT user_id, estado, dados_coletados FROM estados_conversa
+                WHERE ultima_atividade >= datetime('now', ?)
+                ORDER BY ultima_atividade DESC
+                LIMIT ?
+            ''', (f'-{float(horas)} hours', limite))
+            
+            while True:
+                linhas = cursor.fetchmany(lote)
+                if not linhas:
+                    break
+                for user_id, estado_str, dados_json in linhas:
+                    yield Conversa(
+                        user_id=user_id,
+                        estado=EstadoConversa(estado_str),
+                        dados=json.loads(dados_json) if dados_json else {}
+                    )
+        finally:
+            conn.close()
+    
+    def carregar_estados(self, user_ids: Iterable[str], lote: int = 500) -> Dict[str, Tuple[Conversa, str]]:
+        """
+        Carrega o estado e a ultima_atividade de vários usuários de uma vez
+        
+        Uma consulta IN pela chave primária a cada `lote` ids (abaixo do limite
+        de parâmetros do SQLite). Usuários sem estado salvo ficam de fora.
+        """
+        user_ids = list(user_ids)
+        estados = {}
+        conn = self.db_manager.get_connection()
+        try:
+            cursor = conn.cursor()
+            for inicio in range(0, len(user_ids), lote):
+                parte = user_ids[inicio:inicio + lote]
+                marcadores = ', '.join('?' for _ in parte)
+                cursor.execute(f'''
+                    SELECT user_id, estado, dados_coletados, ultima_atividade FROM estados_conversa
+                    WHERE user_id IN ({marcadores})
+                ''', parte)
+                for user_id, estado_str, dados_json, ultima_atividade in cursor.fetchall():
+                    conversa = Conversa(
+                        user_id=user_id,
+                        estado=EstadoConversa(estado_str),
+                        dados=json.loads(dados_json) if dados_json else {}
+                    )
+                    estados[user_id] = (conversa, ultima_atividade)
+        finally:
+            conn.close()
+        return estados
+    
+    def listar_conversas_ativas(self, horas: float = 24, limite: int = 20,
+                                apos: Optional[Tuple[str, str]] = None) -> List[dict]:
+        """
+        Conversas com atividade nas últimas `horas`, das mais recentes às mais antigas
+        
+        Paginação por chave (ultima_atividade, user_id): passe em `apos` o par
+        da última conversa da página anterior. A ordem vem do índice de
+        recência e a última interação de cada conversa é uma busca pontual
+        pelo índice (user_id, id) do histórico, sem varrer o histórico.
+        """
+        filtros = ["e.ultima_atividade >= datetime('now', ?)"]
+        parametros: list = [f'-{float(horas)} hours']
+        if apos is not None:
+            filtros.append('(e.ultima_atividade, e.user_id) < (?, ?)')
+            parametros.extend(apos)
+        parametros.append(limite)
+        
         conn = self.db_manager.get_connection()
         cursor = conn.cursor()
-        cursor.execute('DELETE FROM estados_conversa WHERE user_id = ?', (user_id,))
-        conn.commit()
+        cursor.execute(f'''
+            SELECT e.user_id, e.estado, e.ultima_atividade,
+                   h.id, h.mensagem_usuario, COALESCE(r.texto, h.resposta_bot), h.timestamp
+            FROM estados_conversa e
+            LEFT JOIN historico_conversas h
+                ON h.id = (SELECT MAX(id) FROM historico_conversas WHERE user_id = e.user_id)
+            LEFT JOIN respostas_bot r ON r.id = h.resposta_id
+            WHERE {' AND '.join(filtros)}
+            ORDER BY e.ultima_atividade DESC, e.user_id DESC
+            LIMIT ?
+        ''', parametros)
+        linhas = cursor.fetchall()
         conn.close()
+        
+        conversas = []
+        for user_id, estado, ultima_atividade, interacao_id, mensagem, resposta, timestamp in linhas:
+            conversas.append({
+                'user_id': user_id,
+                'estado': estado,
+                'ultima_atividade': ultima_atividade,
+                'ultima_interacao': {
+                    'id': interacao_id,
+                    'mensagem_usuario': mensagem,
+                    'resposta_bot': resposta,
+                    'timestamp': timestamp
+                } if interacao_id is not None else None
+            })
+        return conversas
+    
+    def expirar_estados(self, horas: float, lote: int = 500, arquivar: bool = False) -> List[str]:
+        """
+        Remove até `lote` estados sem atividade há mais de `horas` e retorna seus user_ids
+        
+        Cada chamada é uma transação curta (BEGIN IMMEDIATE), para não segurar
+        o lock de escrita enquanto há mensagens chegando; chame em loop até
+        voltar menos que `lote`. Com arquivar, as linhas são copiadas para
+        estados_conversa_expirados antes de sair da tabela.
+        """
+        conn = self.db_manager.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+                SELECT user_id FROM estados_conversa
+                WHERE ultima_atividade < datetime('now', ?)
+                LIMIT ?
+            ''', (f'-{float(horas)} hours', lote))
+            user_ids = [row[0] for row in cursor.fetchall()]
+            
+            if user_ids:
+                marcadores = ', '.join('?' for _ in user_ids)
+                if arquivar:
+                    cursor.execute(f'''
+                        INSERT INTO estados_conversa_expirados (user_id, estado, dados_coletados, ultima_atividade)
+                        SELECT user_id, estado, dados_coletados, ultima_atividade FROM estados_conversa
+                        WHERE user_id IN ({marcadores})
+                    ''', user_ids)
+                cursor.execute(f'DELETE FROM estados_conversa WHERE user_id IN ({marcadores})', user_ids)
+            
+            conn.commit()
+            return user_ids
+        finally:
+            conn.close()
+    
+    def remover_estado(self, user_id: str, anterior: Optional[EstadoConversa] = None):
+        """Remove o estado da conversa (com anterior, conta a volta para INICIAL no funil)"""
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('DELETE FROM estados_conversa WHERE user_id = ?', (user_id,))
+            self._contar_transicao(cursor, anterior, EstadoConversa.INICIAL)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
     
     def salvar_historico(self, user_id: str, mensagem_usuario: str, resposta_bot: str, estado: EstadoConversa):
-        """Salva uma interação no histórico"""
+        """
+        Salva uma interação no histórico
+        
+        O texto da resposta vai uma única vez para respostas_bot (deduplicado
+        por hash); a linha do histórico guarda apenas o resposta_id.
+        """
         conn = self.db_manager.get_connection()
         cursor = conn.cursor()
         
+        resposta_id = self._id_resposta(cursor, resposta_bot) if resposta_bot else None
         cursor.execute('''
-            INSERT INTO historico_conversas (user_id, mensagem_usuario, resposta_bot, estado)
-            VALUES (?, ?, ?, ?)
-        ''', (user_id, mensagem_usuario, resposta_bot, estado.value))
+            INSERT INTO historico_conversas (user_id, mensagem_usuario, resposta_bot, resposta_id, estado)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (user_id, mensagem_usuario, None if resposta_id else resposta_bot, resposta_id, estado.value))
         
         conn.commit()
         conn.close()
     
-    def buscar_historico(self, user_id: str) -> List[dict]:
-        """Busca o histórico de conversas de um usuário"""
+    def _id_resposta(self, cursor, texto: str) -> int:
+        """Id da resposta em respostas_bot, inserindo o texto na primeira vez"""
+        with self._lock_ids:
+            resposta_id = self._ids_respostas.get(texto)
+            if resposta_id is not None:
+                self._ids_respostas.move_to_end(texto)
+                return resposta_id
+        
+        chave = hash_resposta(texto)
+        cursor.execute('INSERT OR IGNORE INTO respostas_bot (hash, texto) VALUES (?, ?)', (chave, texto))
+        cursor.execute('SELECT id FROM respostas_bot WHERE hash = ?', (chave,))
+        resposta_id = cursor.fetchone()[0]
+        
+        with self._lock_ids:
+            self._ids_respostas[texto] = resposta_id
+            self._ids_respostas.move_to_end(texto)
+            if len(self._ids_respostas) > self.MAX_IDS_RESPOSTAS:
+                self._ids_respostas.popitem(last=False)
+        return resposta_id
+    
+    def buscar_historico(self, user_id: str, desde_id: Optional[int] = None, antes_id: Optional[int] = None,
+                         limite: Optional[int] = None) -> List[dict]:
+        """
+        Busca o histórico de conversas de um usuário (arquivo frio + tabela)
+        
+        Sem parâmetros devolve tudo, em ordem cronológica. Os cursores usam o
+        id de cada interação (campo 'id' das entradas):
+        - desde_id: só interações mais novas (atualização incremental)
+        - antes_id: só interações mais antigas (paginar para trás)
+        - limite: no máximo N interações; as primeiras após desde_id ou, sem
+          ele, as N mais recentes
+        A consulta usa o índice (user_id, id), então o custo depende do
+        tamanho da página e não do histórico inteiro do usuário. O
+        arquivamento segue a ordem dos ids, então o arquivo frio só guarda
+        interações anteriores à mais antiga da tabela: ele nem é lido quando
+        a tabela já responde o cursor (desde_id a partir dela, ou a página
+        mais recente cheia) e, quando é lido, só os blocos da faixa pedida.
+        """
+        filtros = ['h.user_id = ?']
+        parametros: list = [user_id]
+        if desde_id is not None:
+            filtros.append('h.id > ?')
+            parametros.append(desde_id)
+        if antes_id is not None:
+            filtros.append('h.id < ?')
+            parametros.append(antes_id)
+        
+        # Página mais recente (ou anterior a antes_id): lê de trás para frente
+        recentes_primeiro = limite is not None and desde_id is None
+        sql = f'''
+            SELECT h.id, h.mensagem_usuario, COALESCE(r.texto, h.resposta_bot), h.estado, h.timestamp
+            FROM historico_conversas h
+            LEFT JOIN respostas_bot r ON r.id = h.resposta_id
+            WHERE {' AND '.join(filtros)}
+            ORDER BY h.id {'DESC' if recentes_primeiro else 'ASC'}
+        '''
+        if limite is not None:
+            sql += ' LIMIT ?'
+            parametros.append(limite)
+        
         conn = self.db_manager.get_connection()
         cursor = conn.cursor()
+        cursor.execute(sql, parametros)
+        linhas = cursor.fetchall()
+        menor_na_tabela = None
+        if self.arquivo:
+            cursor.execute('SELECT MIN(id) FROM historico_conversas WHERE user_id = ?', (user_id,))
+            menor_na_tabela = cursor.fetchone()[0]
+        conn.close()
         
-        cursor.execute('''
-            SELECT mensagem_usuario, resposta_bot, estado, timestamp 
-            FROM historico_conversas 
-            WHERE user_id = ?
-            ORDER BY timestamp ASC
-        ''', (user_id,))
+        if recentes_primeiro:
+            linhas.reverse()
+        
+        if self.arquivo and not (recentes_primeiro and len(linhas) >= limite):
+            # Linhas a partir da mais antiga da tabela já vieram dela (inclusive as
+            # que ficaram nos dois lados por um arquivamento interrompido)
+            ate_id = antes_id
+            if menor_na_tabela is not None:
+                ate_id = menor_na_tabela if antes_id is None else min(antes_id, menor_na_tabela)
+            arquivadas = []
+            if desde_id is None or ate_id is None or desde_id < ate_id:
+                arquivadas = self.arquivo.buscar(user_id, desde_id, ate_id)
+            if arquivadas:
+                linhas = sorted(arquivadas + linhas, key=lambda row: row[0])
+                if limite is not None:
+                    linhas = linhas[-limite:] if recentes_primeiro else linhas[:limite]
         
         historico = []
-        for row in cursor.fetchall():
+        for row in linhas:
             # Adiciona a mensagem do usuário
-            if row[0]:  # Se há mensagem do usuário
+            if row[1]:  # Se há mensagem do usuário
                 historico.append({
+                    'id': row[0],
                     'remetente': 'user',
-                    'mensagem': row[0],
-                    'timestamp': row[3]
+                    'mensagem': row[1],
+                    'timestamp': row[4]
                 })
             
             # Adiciona a resposta do bot
-            if row[1]:  # Se há resposta do bot
+            if row[2]:  # Se há resposta do bot
                 historico.append({
+                    'id': row[0],
                     'remetente': 'bot',
-                    'mensagem': row[1],
-                    'timestamp': row[3]
+                    'mensagem': row[2],
+                    'timestamp': row[4]
                 })
         
+        return historico
+    
+    def buscar_texto_historico(self, texto: str, limite: int = 20, offset: int = 0,
+                               user_id: Optional[str] = None) -> List[dict]:
+        """
+        Busca textual no histórico (mensagens e respostas), por relevância
+        
+        Os termos são normalizados como no índice (sem acentos e maiúsculas)
+        e todos precisam aparecer; o último também casa como prefixo, para
+        buscas enquanto se digita ("cancel" encontra "cancelamento"). A
+        ordenação é o bm25 do FTS5 (coluna rank, ordenada dentro da própria
+        tabela virtual). Levanta ValueError se não houver termos.
+        Linhas já movidas para o arquivo frio não entram na busca.
+        """
+        termos = re.findall(r'\w+', normalizar_texto(texto))
+        if not termos:
+            raise ValueError('Informe ao menos um termo para a busca')
+        consulta = ' '.join(f'"{termo}"' for termo in termos) + '*'
+        
+        filtros = ['historico_fts MATCH ?']
+        parametros: list = [consulta]
+        if user_id:
+            filtros.append('h.user_id = ?')
+            parametros.append(user_id)
+        parametros.extend([limite, offset])
+        
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT h.id, h.user_id, h.timestamp, h.estado,
+                   snippet(historico_fts, 0, '[', ']', '…', 12),
+                   snippet(historico_fts, 1, '[', ']', '…', 12),
+                   historico_fts.rank
+            FROM historico_fts
+            JOIN historico_conversas h ON h.id = historico_fts.rowid
+            WHERE {' AND '.join(filtros)}
+            ORDER BY historico_fts.rank
+            LIMIT ? OFFSET ?
+        ''', parametros)
+        linhas = cursor.fetchall()
+        conn.close()
+        
+        return [
+            {
+                'id': interacao_id,
+                'user_id': user_id_linha,
+                'timestamp': timestamp,
+                'estado': estado,
+                'mensagem_usuario': trecho_usuario,
+                'resposta_bot': trecho_bot,
+                'relevancia': round(-pontuacao, 4)
+            }
+            for interacao_id, user_id_linha, timestamp, estado, trecho_usuario, trecho_bot, pontuacao in linhas
+        ]
+    
+    def obter_funil(self, de: Optional[str] = None, ate: Optional[str] = None) -> dict:
+        """
+        Funil de agendamento a partir dos contadores de transicoes_por_dia
+        
+        Cada etapa conta as entradas vindas de uma etapa anterior: voltar de
+        AGUARDANDO_PERIODO para AGUARDANDO_DATA (horário lotado ou consulta
+        duplicada) não conta de novo, e só um agendamento gravado leva a
+        FINALIZADO. A entrada no funil é a passagem para AGUARDANDO_NOME, inclusive
+        a partir de FINALIZADO ('nova'). 'conversao' é a fração da etapa
+        anterior que chegou à etapa. de/ate (inclusivos, dd/mm/aaaa ou
+        aaaa-mm-dd) recortam os dias; levanta ValueError se inválidos.
+        """
+        filtros = []
+        parametros = []
+        for operador, texto in (('>=', de), ('<=', ate)):
+            if texto:
+                iso = interpretar_data(texto)
+                if not iso:
+                    raise ValueError(f"Data inválida: {texto} (use dd/mm/aaaa ou aaaa-mm-dd)")
+                filtros.append(f'dia {operador} ?')
+                parametros.append(iso)
+        where = f"WHERE {' AND '.join(filtros)}" if filtros else ''
+        
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT dia, de, para, total FROM transicoes_por_dia
+            {where}
+            ORDER BY dia, de, para
+        ''', parametros)
+        linhas = cursor.fetchall()
         conn.close()
-        return historico
\ No newline at end of file
+        
+        ordem = {estado.value: posicao for posicao, estado in enumerate(self.ETAPAS_FUNIL)}
+        primeira = self.ETAPAS_FUNIL[0].value
+        
+        entradas = dict.fromkeys(ordem, 0)
+        por_dia: Dict[str, Dict[str, int]] = {}
+        transicoes: Dict[Tuple[str, str], int] = {}
+        for dia, estado_de, estado_para, total in linhas:
+            transicoes[(estado_de, estado_para)] = transicoes.get((estado_de, estado_para), 0) + total
+            avancou = estado_para in ordem and (estado_para == primeira or ordem.get(estado_de, -1) < ordem[estado_para])
+            if avancou:
+                entradas[estado_para] += total
+                do_dia = por_dia.setdefault(dia, dict.fromkeys(ordem, 0))
+                do_dia[estado_para] += total
+        
+        etapas = []
+        anterior = None
+        for estado, total in entradas.items():
+            etapas.append({
+                'estado': estado,
+                'entradas': total,
+                'conversao': round(total / anterior, 4) if anterior else None
+            })
+            anterior = total
+        
+        return {
+            'etapas': etapas,
+            'por_dia': [{'dia': dia, 'entradas': do_dia} for dia, do_dia in por_dia.items()],
+            'transicoes': [
+                {'de': estado_de, 'para': estado_para, 'total': total}
+                for (estado_de, estado_para), total in sorted(transicoes.items())
+            ]
+        }
+    
+    def arquivar_historico(self, dias: float, lote: int = 5000) -> int:
+        """
+        Move para o arquivo frio as linhas do histórico com mais de `dias` dias
+        
+        Em lotes pela chave primária (as linhas antigas ficam no começo da
+        tabela, então o filtro por timestamp não precisa de índice). Cada lote
+        é gravado numa nova parte dos segmentos antes de sair da tabela; se o
+        processo cair entre os dois passos, a próxima execução regrava sem
+        duplicar. As partes são compactadas uma vez, no fim da rodada.
+        Retorna quantas linhas saíram da tabela.
+        """
+        if self.arquivo is None:
+            raise RuntimeError("ConversaRepository sem ArquivoHistorico configurado")
+        
+        movidas = 0
+        while True:
+            conn = self.db_manager.get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT h.id, h.user_id, h.mensagem_usuario, COALESCE(r.texto, h.resposta_bot), h.estado, h.timestamp
+                    FROM historico_conversas h
+                    LEFT JOIN respostas_bot r ON r.id = h.resposta_id
+                    WHERE h.timestamp < datetime('now', ?)
+                    ORDER BY h.id
+                    LIMIT ?
+                ''', (f'-{float(dias)} days', lote))
+                linhas = cursor.fetchall()
+                if not linhas:
+                    break
+                
+                self.arquivo.anexar((row[1], (row[0],) + tuple(row[2:])) for row in linhas)
+                
+                ids = [row[0] for row in linhas]
+                for inicio in range(0, len(ids), 500):
+                    parte = ids[inicio:inicio + 500]
+                    marcadores = ', '.join('?' for _ in parte)
+                    cursor.execute(f'DELETE FROM historico_conversas WHERE id IN ({marcadores})', parte)
+                conn.commit()
+            finally:
+                conn.close()
+            
+            movidas += len(linhas)
+            if len(linhas) < lote:
+                break
+        
+        self.arquivo.compactar()
+        return movidas
\ No newline at end of file
@@ -4,25 +4,87 @@ Gerenciador de banco de dados SQLite
 Princípio SRP: Apenas configuração e inicialização do banco
 """
 
+import hashlib
+import itertools
 import sqlite3
-from typing import Optional
+from typing import Dict, Iterable, Optional
+from ..utils.normalizacao import chave_data, chave_nome, normalizar_periodo
+from .monitor_sql import ConexaoMonitorada, MonitorConsultas
+
+# Datas aaaa-mm-dd (as que entram no rollup consultas_por_dia)
+GLOB_DATA_ISO = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+
+
+def hash_resposta(texto: str) -> bytes:
+    """Chave de deduplicação de respostas_bot (BLAKE2b de 128 bits do texto)"""
+    return hashlib.blake2b(texto.encode('utf-8'), digest_size=16).digest()
 
 class DatabaseManager:
     """Gerencia conexões e inicialização do banco SQLite"""
     
-    def __init__(self, database_path: str = 'chatbot.db'):
+    # Tabelas com contador de alterações mantido por triggers (usado em ETags)
+    TABELAS_VERSIONADAS = ('consultas', 'historico_conversas')
+    
+    # Versão do schema gravada em PRAGMA user_version. Incremente ao mudar
+    # init_database (tabela, índice, trigger ou migração) para que bancos
+    # existentes passem de novo pelo DDL no próximo boot.
+    VERSAO_SCHEMA = 12
+    
+    _bancos_memoria = itertools.count()
+    
+    def __init__(self, database_path: str = 'chatbot.db', timeout: float = 10.0,
+                 monitor: Optional[MonitorConsultas] = None):
         self.database_path = database_path
+        self.timeout = timeout
+        self.monitor = monitor
+        self._uri = False
+        self._ancora: Optional[sqlite3.Connection] = None
+        
+        if database_path == ':memory:':
+            # Cada conexão ':memory:' seria um banco vazio: usa um banco em memória
+            # compartilhado (por nome), mantido vivo por uma conexão âncora
+            self.database_path = f'file:atende-memoria-{next(self._bancos_memoria)}?mode=memory&cache=shared'
+            self._uri = True
+            self._ancora = sqlite3.connect(self.database_path, uri=True, check_same_thread=False)
+        
         self.init_database()
     
     def get_connection(self) -> sqlite3.Connection:
-        """Retorna uma nova conexão com o banco"""
-        return sqlite3.connect(self.database_path)
+        """
+        Retorna uma nova conexão com o banco
+        
+        Cada operação abre a própria conexão, então nada é compartilhado entre
+        processos após o fork dos workers. O timeout faz escritores concorrentes
+        aguardarem o lock em vez de falhar com 'database is locked'.
+        Com um monitor configurado, os cursores medem cada statement.
+        """
+        if self.monitor is None:
+            return sqlite3.connect(self.database_path, timeout=self.timeout, uri=self._uri)
+        
+        conn = sqlite3.connect(self.database_path, timeout=self.timeout, uri=self._uri, factory=ConexaoMonitorada)
+        conn.monitor = self.monitor
+        return conn
     
     def init_database(self):
-        """Inicializa as tabelas do banco de dados"""
+        """
+        Inicializa as tabelas do banco de dados
+        
+        Se o banco já está na VERSAO_SCHEMA, o boot custa uma única leitura de
+        PRAGMA user_version, sem DDL nem as migrações. Um banco de uma versão
+        mais nova (rollback do deploy) também é aberto sem DDL: rodar as
+        migrações antigas nele e gravar a versão menor o faria ser migrado de
+        novo, sobre dados já migrados, no próximo deploy.
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        if cursor.execute('PRAGMA user_version').fetchone()[0] >= self.VERSAO_SCHEMA:
+            conn.close()
+            return
+        
+        # WAL: leitores não bloqueiam o escritor (persistente no arquivo)
+        cursor.execute('PRAGMA journal_mode=WAL')
+        
         # Tabela para consultas
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS consultas (
@@ -47,6 +109,22 @@ class DatabaseManager:
             )
         ''')
         
+        # Páginas do histórico por usuário (/historico?desde=&antes=&limite=)
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_historico_usuario_id
+            ON historico_conversas (user_id, id)
+        ''')
+        
+        # Respostas do bot deduplicadas: o histórico guarda só o id (resposta_id)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS respostas_bot (
+                id INTEGER PRIMARY KEY,
+                hash BLOB NOT NULL UNIQUE,
+                texto TEXT NOT NULL
+            )
+        ''')
+        self._migrar_respostas_deduplicadas(conn, cursor)
+        
         # Tabela para estado das conversas
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS estados_conversa (
@@ -57,5 +135,306 @@ class DatabaseManager:
             )
         ''')
         
+        # Conversas por recência (pré-carga no boot, expiração e /conversas/ativas);
+        # o user_id no índice desempata a paginação sem ordenar em memória
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_estados_conversa_atividade_usuario
+            ON estados_conversa (ultima_atividade, user_id)
+        ''')
+        cursor.execute('DROP INDEX IF EXISTS idx_estados_conversa_ultima_atividade')
+        
+        # Estados removidos por inatividade (EXPIRAR_CONVERSAS_ARQUIVAR)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS estados_conversa_expirados (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                estado TEXT NOT NULL,
+                dados_coletados TEXT,
+                ultima_atividade TIMESTAMP,
+                expirado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Transições de estado por dia (UTC), base de /estatisticas/funil
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transicoes_por_dia (
+                dia TEXT NOT NULL,
+                de TEXT NOT NULL,
+                para TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                PRIMARY KEY (dia, de, para)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Tabela de capacidade por horário (data ISO, período);
+        # capacidade NULL = capacidade padrão do VagaRepository
+        self._migrar_capacidade_padrao_vagas(cursor)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS vagas (
+                data TEXT NOT NULL,
+                periodo TEXT NOT NULL,
+                capacidade INTEGER,
+                reservadas INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (data, periodo)
+            )
+        ''')
+        
+        # Regra de unicidade: um agendamento por (usuário, data, período)
+        self._migrar_chave_unica_consultas(cursor)
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_consultas_usuario_data_periodo
+            ON consultas (user_id, data_normalizada, periodo)
+        ''')
+        cursor.execute('DROP INDEX IF EXISTS idx_consultas_data_periodo')
+        self._semear_reservas(cursor)
+        
+        # Busca por prefixo do nome (/consultas?nome=), sem acentos e maiúsculas;
+        # o id no índice dá a ordem estável da paginação
+        self._migrar_nome_normalizado(cursor)
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_consultas_nome_normalizado
+            ON consultas (nome_normalizado, id)
+        ''')
+        
+        self._criar_serie_consultas(cursor)
+        self._criar_contadores_alteracao(cursor)
+        self._criar_busca_textual(cursor)
+        
+        cursor.execute(f'PRAGMA user_version = {int(self.VERSAO_SCHEMA)}')
         conn.commit()
-        conn.close()
\ No newline at end of file
+        conn.close()
+    
+    def _criar_serie_consultas(self, cursor: sqlite3.Cursor):
+        """
+        Cria o rollup diário de consultas por (data da consulta, período)
+        
+        ConsultaRepository.salvar incrementa o bucket na mesma transação do
+        INSERT; na criação da tabela os buckets são preenchidos a partir das
+        consultas existentes. Consultas com data fora do formato ISO (texto
+        livre legado) não entram na série.
+        """
+        existia = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'consultas_por_dia'"
+        ).fetchone()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS consultas_por_dia (
+                data TEXT NOT NULL,
+                periodo TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                PRIMARY KEY (data, periodo)
+            ) WITHOUT ROWID
+        ''')
+        
+        if not existia:
+            cursor.execute(f'''
+                INSERT INTO consultas_por_dia (data, periodo, total)
+                SELECT data_normalizada, periodo, COUNT(*) FROM consultas
+                WHERE data_normalizada GLOB '{GLOB_DATA_ISO}'
+                GROUP BY data_normalizada, periodo
+            ''')
+    
+    def _criar_contadores_alteracao(self, cursor: sqlite3.Cursor):
+        """
+        Cria um contador por tabela, incrementado por triggers a cada escrita
+        
+        O contador vale entre processos (fica no próprio arquivo) e permite
+        saber se uma tabela mudou com uma leitura pontual, sem contar linhas.
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS versoes_tabelas (
+                tabela TEXT PRIMARY KEY,
+                versao INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        
+        for tabela in self.TABELAS_VERSIONADAS:
+            cursor.execute('INSERT OR IGNORE INTO versoes_tabelas (tabela, versao) VALUES (?, 0)', (tabela,))
+            for operacao in ('INSERT', 'UPDATE', 'DELETE'):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_versao_{tabela}_{operacao.lower()}
+                    AFTER {operacao} ON {tabela}
+                    BEGIN
+                        UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = '{tabela}';
+                    END
+                ''')
+    
+    def _criar_busca_textual(self, cursor: sqlite3.Cursor):
+        """
+        Cria o índice FTS5 do histórico (mensagem do usuário e resposta do bot)
+        
+        Tabela de conteúdo externo sobre a view historico_textos, que já
+        resolve o texto deduplicado de respostas_bot; triggers mantêm o índice
+        a cada escrita. O tokenizer ignora maiúsculas e acentos, como
+        normalizar_texto. Sem FTS5 no SQLite, a busca fica indisponível.
+        """
+        cursor.execute('''
+            CREATE VIEW IF NOT EXISTS historico_textos AS
+            SELECT h.id, h.mensagem_usuario, COALESCE(r.texto, h.resposta_bot) AS resposta_bot
+            FROM historico_conversas h
+            LEFT JOIN respostas_bot r ON r.id = h.resposta_id
+        ''')
+        
+        existia = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'historico_fts'"
+        ).fetchone()
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS historico_fts USING fts5(
+                    mensagem_usuario, resposta_bot,
+                    content = 'historico_textos', content_rowid = 'id',
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"⚠️  Busca textual do histórico indisponível (SQLite sem FTS5): {e}")
+            return
+        
+        texto_resposta = "COALESCE((SELECT texto FROM respostas_bot WHERE id = {0}.resposta_id), {0}.resposta_bot)"
+        inserir = f'''
+            INSERT INTO historico_fts (rowid, mensagem_usuario, resposta_bot)
+            VALUES (new.id, new.mensagem_usuario, {texto_resposta.format('new')});
+        '''
+        remover = f'''
+            INSERT INTO historico_fts (historico_fts, rowid, mensagem_usuario, resposta_bot)
+            VALUES ('delete', old.id, old.mensagem_usuario, {texto_resposta.format('old')});
+        '''
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS trg_historico_fts_insert AFTER INSERT ON historico_conversas BEGIN {inserir} END')
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS trg_historico_fts_delete AFTER DELETE ON historico_conversas BEGIN {remover} END')
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS trg_historico_fts_update AFTER UPDATE ON historico_conversas BEGIN {remover} {inserir} END')
+        
+        if not existia:
+            # Indexa o histórico já existente
+            cursor.execute("INSERT INTO historico_fts (historico_fts) VALUES ('rebuild')")
+    
+    def obter_versoes(self, tabelas: Iterable[str]) -> Dict[str, int]:
+        """Retorna o contador de alterações de cada tabela informada"""
+        tabelas = list(tabelas)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        marcadores = ', '.join('?' for _ in tabelas)
+        cursor.execute(f'SELECT tabela, versao FROM versoes_tabelas WHERE tabela IN ({marcadores})', tabelas)
+        versoes = dict(cursor.fetchall())
+        
+        conn.close()
+        return versoes
+    
+    def _colunas(self, cursor: sqlite3.Cursor, tabela: str) -> set:
+        """Retorna os nomes das colunas de uma tabela"""
+        cursor.execute(f'PRAGMA table_info({tabela})')
+        return {row[1] for row in cursor.fetchall()}
+    
+    def _migrar_respostas_deduplicadas(self, conn: sqlite3.Connection, cursor: sqlite3.Cursor):
+        """
+        Adiciona historico_conversas.resposta_id e move os textos para respostas_bot
+        
+        Linhas antigas passam a apontar para a resposta deduplicada e ficam com
+        resposta_bot NULL; ConversaRepository lê o texto pelo JOIN.
+        """
+        if 'resposta_id' in self._colunas(cursor, 'historico_conversas'):
+            return
+        
+        cursor.execute('ALTER TABLE historico_conversas ADD COLUMN resposta_id INTEGER REFERENCES respostas_bot (id)')
+        
+        conn.create_function('hash_resposta', 1, hash_resposta, deterministic=True)
+        cursor.execute('''
+            INSERT OR IGNORE INTO respostas_bot (hash, texto)
+            SELECT hash_resposta(resposta_bot), resposta_bot FROM historico_conversas
+            WHERE resposta_bot IS NOT NULL
+        ''')
+        cursor.execute('''
+            UPDATE historico_conversas
+            SET resposta_id = (SELECT id FROM respostas_bot WHERE hash = hash_resposta(historico_conversas.resposta_bot)),
+                resposta_bot = NULL
+            WHERE resposta_bot IS NOT NULL
+        ''')
+        
+        if cursor.rowcount > 0:
+            print(f"🗜️  {cursor.rowcount} resposta(s) do histórico deduplicada(s) em respostas_bot")
+    
+    def _migrar_capacidade_padrao_vagas(self, cursor: sqlite3.Cursor):
+        """
+        Torna vagas.capacidade opcional em bancos antigos (NULL = capacidade padrão)
+        
+        O SQLite não remove NOT NULL de uma coluna: a tabela é recriada com os
+        mesmos dados.
+        """
+        cursor.execute('PRAGMA table_info(vagas)')
+        capacidade = [row for row in cursor.fetchall() if row[1] == 'capacidade']
+        if not capacidade or not capacidade[0][3]:
+            return
+        
+        cursor.execute('ALTER TABLE vagas RENAME TO vagas_antiga')
+        cursor.execute('''
+            CREATE TABLE vagas (
+                data TEXT NOT NULL,
+                periodo TEXT NOT NULL,
+                capacidade INTEGER,
+                reservadas INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (data, periodo)
+            )
+        ''')
+        cursor.execute('INSERT INTO vagas SELECT data, periodo, capacidade, reservadas FROM vagas_antiga')
+        cursor.execute('DROP TABLE vagas_antiga')
+    
+    def _semear_reservas(self, cursor: sqlite3.Cursor):
+        """
+        Conta em vagas.reservadas as consultas gravadas antes do controle de vagas
+        
+        Roda uma vez por migração de schema; daí em diante o VagaRepository
+        lê e incrementa só a linha do horário, sem contar consultas. Horários
+        sem linha ganham uma com a capacidade padrão (NULL).
+        """
+        cursor.execute('''
+            INSERT INTO vagas (data, periodo, capacidade, reservadas)
+            SELECT data_normalizada, periodo, NULL, COUNT(*) FROM consultas
+            WHERE data_normalizada IS NOT NULL
+            GROUP BY data_normalizada, periodo
+            ON CONFLICT(data, periodo) DO UPDATE SET reservadas = MAX(reservadas, excluded.reservadas)
+        ''')
+    
+    def _migrar_nome_normalizado(self, cursor: sqlite3.Cursor):
+        """Adiciona e preenche consultas.nome_normalizado (chave_nome) em bancos antigos"""
+        if 'nome_normalizado' in self._colunas(cursor, 'consultas'):
+            return
+        
+        cursor.execute('ALTER TABLE consultas ADD COLUMN nome_normalizado TEXT')
+        cursor.execute('SELECT id, nome FROM consultas')
+        cursor.executemany(
+            'UPDATE consultas SET nome_normalizado = ? WHERE id = ?',
+            [(chave_nome(nome), consulta_id) for consulta_id, nome in cursor.fetchall()]
+        )
+    
+    def _migrar_chave_unica_consultas(self, cursor: sqlite3.Cursor):
+        """
+        Adiciona e preenche consultas.data_normalizada em bancos antigos
+        
+        A primeira consulta de cada (usuário, data, período) recebe a chave;
+        as repetições ficam com data_normalizada NULL para que o índice único
+        possa ser criado, e aparecem em ConsultaRepository.relatorio_duplicadas().
+        """
+        if 'data_normalizada' in self._colunas(cursor, 'consultas'):
+            return
+        
+        cursor.execute('ALTER TABLE consultas ADD COLUMN data_normalizada TEXT')
+        cursor.execute('SELECT id, user_id, data, periodo FROM consultas ORDER BY id')
+        
+        vistas = set()
+        atualizacoes = []
+        duplicadas = 0
+        for consulta_id, user_id, data, periodo in cursor.fetchall():
+            periodo = normalizar_periodo(periodo) or periodo
+            chave = (user_id, chave_data(data), periodo)
+            if chave in vistas:
+                duplicadas += 1
+                continue
+            vistas.add(chave)
+            atualizacoes.append((chave[1], periodo, consulta_id))
+        
+        cursor.executemany(
+            'UPDATE consultas SET data_normalizada = ?, periodo = ? WHERE id = ?',
+            atualizacoes
+        )
+        
+        if duplicadas:
+            print(f"⚠️  {duplicadas} consulta(s) duplicada(s) encontrada(s) no backfill - veja GET /estatisticas/duplicadas")
\ No newline at end of file
@@ -0,0 +1,24 @@
+# src/database/exceptions.py
+"""
+Exceções de domínio levantadas pelos repositories
+Princípio SRP: Apenas sinaliza regras de negócio violadas na persistência
+"""
+
+
+class VagaIndisponivelError(Exception):
+    """Levantada quando o horário (data, período) já atingiu a capacidade"""
+    
+    def __init__(self, data: str, periodo: str):
+        self.data = data
+        self.periodo = periodo
+        super().__init__(f"Sem vagas para {data} no período da {periodo}")
+
+
+class ConsultaDuplicadaError(Exception):
+    """Levantada quando o usuário já tem consulta no mesmo (data, período)"""
+    
+    def __init__(self, data: str, periodo: str, consulta_id: int = None):
+        self.data = data
+        self.periodo = periodo
+        self.consulta_id = consulta_id
+        super().__init__(f"Consulta já marcada para {data} no período da {periodo}")
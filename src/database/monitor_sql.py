@@ -0,0 +1,193 @@
+# src/database/monitor_sql.py
+"""
+Monitor de consultas SQL lentas
+Princípio SRP: Apenas mede statements e guarda os lentos para diagnóstico
+Princípio OCP: Entra via factory de conexão, sem alterar os repositories
+
+Toda conexão aberta pelo DatabaseManager usa ConexaoMonitorada, cujos cursores
+medem execute/executemany. Cada statement (texto normalizado) acumula total e
+uma janela das últimas durações para o p99; os que passam do limiar entram num
+buffer circular com EXPLAIN QUERY PLAN e o formato dos parâmetros (tipos, nunca
+valores, para não vazar dados de pacientes). Listas IN (?, ?, ...) de tamanho
+variável viram IN (?+), e os dois mapas por statement guardam no máximo
+max_statements entradas (as menos usadas saem primeiro), então a memória não
+cresce com a variedade de SQL gerado.
+
+Observação: num SELECT o execute cobre o planejamento e o primeiro passo da
+busca; linhas lidas depois, no fetchall, não entram na medida.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Deque, List, Optional
+from ..services.rastreamento import registrar_span, trace_ativo
+
+_ESPACOS = re.compile(r'\s+')
+_LISTA_PARAMETROS = re.compile(r'\bIN \( ?\?(?: ?, ?\?)* ?\)', re.IGNORECASE)
+_EXPLICAVEIS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+
+
+class _Agregado:
+    """Tempo acumulado de um statement"""
+    
+    __slots__ = ('sql', 'execucoes', 'total', 'maximo', 'lentas', 'duracoes')
+    
+    def __init__(self, sql: str, janela: int):
+        self.sql = sql
+        self.execucoes = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.lentas = 0
+        self.duracoes: Deque[float] = deque(maxlen=janela)
+    
+    def p99(self) -> float:
+        ordenadas = sorted(self.duracoes)
+        if not ordenadas:
+            return 0.0
+        return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.99))]
+    
+    def to_dict(self) -> dict:
+        return {
+            'sql': self.sql,
+            'execucoes': self.execucoes,
+            'lentas': self.lentas,
+            'total_ms': round(self.total * 1000, 3),
+            'media_ms': round(self.total * 1000 / self.execucoes, 3) if self.execucoes else 0.0,
+            'p99_ms': round(self.p99() * 1000, 3),
+            'max_ms': round(self.maximo * 1000, 3)
+        }
+
+
+class MonitorConsultas:
+    """Agrega tempos por statement e guarda os statements lentos"""
+    
+    def __init__(self, limiar_ms: float = 50.0, capacidade: int = 200, janela_p99: int = 1024,
+                 max_statements: int = 500):
+        self.limiar = limiar_ms / 1000
+        self.janela_p99 = janela_p99
+        self.max_statements = max_statements
+        self._lentas: Deque[dict] = deque(maxlen=capacidade)
+        self._agregados: 'OrderedDict[str, _Agregado]' = OrderedDict()
+        self._normalizados: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def normalizar(sql: str) -> str:
+        """Texto agregado do statement: espaços colapsados e listas IN (?, ...) como IN (?+)"""
+        return _LISTA_PARAMETROS.sub('IN (?+)', _ESPACOS.sub(' ', sql).strip())
+    
+    def registrar(self, conexao: sqlite3.Connection, sql: str, parametros: Any, duracao: float, lote: int = 0):
+        """Contabiliza uma execução; se lenta, captura plano e parâmetros"""
+        lenta = duracao >= self.limiar
+        with self._lock:
+            normalizado = self._normalizados.get(sql)
+            if normalizado is None:
+                normalizado = self._normalizados[sql] = self.normalizar(sql)
+                if len(self._normalizados) > self.max_statements:
+                    self._normalizados.popitem(last=False)
+            else:
+                self._normalizados.move_to_end(sql)
+            
+            agregado = self._agregados.get(normalizado)
+            if agregado is None:
+                agregado = self._agregados[normalizado] = _Agregado(normalizado, self.janela_p99)
+                if len(self._agregados) > self.max_statements:
+                    self._agregados.popitem(last=False)
+            else:
+                self._agregados.move_to_end(normalizado)
+            agregado.execucoes += 1
+            agregado.total += duracao
+            agregado.maximo = max(agregado.maximo, duracao)
+            agregado.duracoes.append(duracao)
+            if lenta:
+                agregado.lentas += 1
+        
+        if lenta:
+            registro = {
+                'sql': normalizado,
+                'duracao_ms': round(duracao * 1000, 3),
+                'parametros': self._formato_parametros(parametros, lote),
+                'plano': self._plano(conexao, sql, parametros),
+                'timestamp': datetime.now().isoformat()
+            }
+            with self._lock:
+                self._lentas.append(registro)
+        
+        if trace_ativo():
+            registrar_span('sql', duracao, **{'db.system': 'sqlite', 'db.statement': normalizado})
+    
+    def piores(self, ordem: str = 'total', limite: int = 20) -> List[dict]:
+        """Statements com maior tempo total ou maior p99"""
+        with self._lock:
+            agregados = [agregado.to_dict() for agregado in self._agregados.values()]
+        chave = 'p99_ms' if ordem == 'p99' else 'total_ms'
+        return sorted(agregados, key=lambda item: item[chave], reverse=True)[:limite]
+    
+    def lentas_recentes(self, limite: int = 50) -> List[dict]:
+        """Últimos statements acima do limiar, do mais recente ao mais antigo"""
+        with self._lock:
+            return list(self._lentas)[::-1][:limite]
+    
+    def limpar(self):
+        with self._lock:
+            self._lentas.clear()
+            self._agregados.clear()
+            self._normalizados.clear()
+    
+    def _formato_parametros(self, parametros: Any, lote: int) -> dict:
+        if isinstance(parametros, dict):
+            formato = {chave: type(valor).__name__ for chave, valor in parametros.items()}
+        else:
+            formato = [type(valor).__name__ for valor in (parametros or ())]
+        return {'tipos': formato, 'lote': lote} if lote else {'tipos': formato}
+    
+    def _plano(self, conexao: sqlite3.Connection, sql: str, parametros: Any) -> Optional[List[str]]:
+        # Os statements dos repositórios começam com quebra de linha e indentação
+        if not sql.lstrip().upper().startswith(_EXPLICAVEIS):
+            return None
+        try:
+            # Cursor base: o EXPLAIN não deve ser medido nem registrado de novo
+            cursor = sqlite3.Cursor(conexao)
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', parametros or ())
+            return [linha[3] for linha in cursor.fetchall()]
+        except sqlite3.Error:
+            return None
+
+
+class CursorMonitorado(sqlite3.Cursor):
+    """Cursor que reporta a duração de cada statement ao monitor da conexão"""
+    
+    def execute(self, sql, parametros=()):
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            self.connection.monitor.registrar(self.connection, sql, parametros, time.perf_counter() - inicio)
+    
+    def executemany(self, sql, sequencia):
+        sequencia = list(sequencia)
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, sequencia)
+        finally:
+            self.connection.monitor.registrar(self.connection, sql, sequencia[0] if sequencia else (),
+                                              time.perf_counter() - inicio, lote=len(sequencia))
+
+
+class ConexaoMonitorada(sqlite3.Connection):
+    """Conexão cujos cursores são monitorados (use como factory do sqlite3.connect)"""
+    
+    monitor: MonitorConsultas
+    
+    def cursor(self, factory=CursorMonitorado):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+    
+    def executemany(self, sql, sequencia):
+        return self.cursor().executemany(sql, sequencia)
@@ -0,0 +1,160 @@
+# src/database/vaga_repository.py
+"""
+Repository para capacidade e disponibilidade de horários
+Princípio SRP: Apenas controle de vagas por (data, período)
+Princípio DIP: Depende de abstração (DatabaseManager)
+
+Cada horário é uma linha em `vagas` com a capacidade e o contador de
+reservas, indexada pela chave primária (data, periodo). Assim, saber se
+um horário está livre é uma busca pontual e listar os próximos horários
+é uma varredura de intervalo no índice - nunca um COUNT(*) em consultas.
+Capacidade NULL é a capacidade padrão deste repository; horários sem linha
+usam a capacidade padrão e estão livres. As consultas gravadas antes do
+controle de vagas entram em `reservadas` uma única vez, na migração do
+DatabaseManager.
+"""
+
+import sqlite3
+from datetime import date, timedelta
+from typing import List, Optional
+from .database_manager import DatabaseManager
+from .exceptions import VagaIndisponivelError
+from ..services.metricas import instrumentar_repositorio
+from ..utils.normalizacao import PERIODOS, chave_data, formatar_data, normalizar_data, normalizar_periodo
+
+
+@instrumentar_repositorio
+class VagaRepository:
+    """Repository para capacidade e reservas de horários"""
+    
+    def __init__(self, db_manager: DatabaseManager, capacidade_padrao: int = 10):
+        self.db_manager = db_manager
+        self.capacidade_padrao = capacidade_padrao
+    
+    def definir_capacidade(self, data: str, periodo: str, capacidade: int) -> dict:
+        """Define a capacidade de um horário (mantém as reservas existentes)"""
+        if capacidade < 0:
+            raise ValueError("Capacidade não pode ser negativa")
+        
+        chave, periodo = self._chave(data, periodo)
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT INTO vagas (data, periodo, capacidade, reservadas)
+            VALUES (?, ?, ?, 0)
+            ON CONFLICT(data, periodo) DO UPDATE SET capacidade = excluded.capacidade
+        ''', (chave, periodo, capacidade))
+        
+        conn.commit()
+        conn.close()
+        
+        return self.obter_vaga(data, periodo)
+    
+    def obter_vaga(self, data: str, periodo: str) -> dict:
+        """Retorna capacidade, reservas e vagas restantes de um horário"""
+        chave, periodo = self._chave(data, periodo)
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT COALESCE(capacidade, ?), reservadas FROM vagas WHERE data = ? AND periodo = ?
+        ''', (self.capacidade_padrao, chave, periodo))
+        
+        resultado = cursor.fetchone()
+        conn.close()
+        
+        capacidade, reservadas = resultado if resultado else (self.capacidade_padrao, 0)
+        return self._para_dict(chave, periodo, capacidade, reservadas)
+    
+    def esta_disponivel(self, data: str, periodo: str) -> bool:
+        """Verifica se o horário ainda tem vagas"""
+        return self.obter_vaga(data, periodo)['disponiveis'] > 0
+    
+    def proximas_vagas(self, data: str, periodo: Optional[str] = None, limite: int = 3, dias: int = 30) -> List[dict]:
+        """
+        Lista os próximos horários livres a partir de uma data
+        
+        Args:
+            data: Data inicial (inclusive)
+            periodo: Se informado, considera apenas este período
+            limite: Quantidade máxima de horários retornados
+            dias: Janela de busca em dias
+            
+        Returns:
+            Lista de horários livres em ordem cronológica
+        """
+        periodos = [normalizar_periodo(periodo)] if periodo else list(PERIODOS)
+        data_iso = normalizar_data(data)
+        
+        if data_iso:
+            inicio = date.fromisoformat(data_iso)
+            datas = [(inicio + timedelta(days=i)).isoformat() for i in range(dias)]
+        else:
+            # Datas em texto livre não têm "próximo dia"; só os outros períodos
+            datas = [chave_data(data)]
+        
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        
+        # Uma única varredura de intervalo no índice (data, periodo)
+        cursor.execute('''
+            SELECT data, periodo, COALESCE(capacidade, ?), reservadas FROM vagas
+            WHERE data BETWEEN ? AND ?
+        ''', (self.capacidade_padrao, datas[0], datas[-1]))
+        
+        ocupacao = {(row[0], row[1]): (row[2], row[3]) for row in cursor.fetchall()}
+        conn.close()
+        
+        livres = []
+        for chave in datas:
+            for p in periodos:
+                capacidade, reservadas = ocupacao.get((chave, p), (self.capacidade_padrao, 0))
+                if reservadas < capacidade:
+                    livres.append(self._para_dict(chave, p, capacidade, reservadas))
+                    if len(livres) >= limite:
+                        return livres
+        
+        return livres
+    
+    def reservar(self, cursor: sqlite3.Cursor, data: str, periodo: str):
+        """
+        Reserva uma vaga dentro da transação do cursor informado
+        
+        A reserva é um UPDATE condicional: só incrementa se ainda houver
+        vaga, de forma atômica mesmo com requisições concorrentes.
+        
+        Raises:
+            VagaIndisponivelError: Se o horário já está lotado
+        """
+        chave, periodo_normalizado = self._chave(data, periodo)
+        
+        cursor.execute('''
+            INSERT OR IGNORE INTO vagas (data, periodo, capacidade, reservadas)
+            VALUES (?, ?, NULL, 0)
+        ''', (chave, periodo_normalizado))
+        
+        cursor.execute('''
+            UPDATE vagas SET reservadas = reservadas + 1
+            WHERE data = ? AND periodo = ? AND reservadas < COALESCE(capacidade, ?)
+        ''', (chave, periodo_normalizado, self.capacidade_padrao))
+        
+        if cursor.rowcount == 0:
+            raise VagaIndisponivelError(data, periodo_normalizado)
+    
+    def _chave(self, data: str, periodo: str) -> tuple:
+        """Normaliza (data, período) para a chave da tabela"""
+        periodo_normalizado = normalizar_periodo(periodo)
+        if not periodo_normalizado:
+            raise ValueError(f"Período inválido: {periodo}")
+        return chave_data(data), periodo_normalizado
+    
+    def _para_dict(self, chave: str, periodo: str, capacidade: int, reservadas: int) -> dict:
+        """Monta a representação de um horário"""
+        return {
+            'data': formatar_data(chave),
+            'periodo': periodo,
+            'capacidade': capacidade,
+            'reservadas': reservadas,
+            'disponiveis': max(capacidade - reservadas, 0)
+        }
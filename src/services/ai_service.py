@@ -7,6 +7,7 @@ Princípio OCP: Aberto para extensão (diferentes engines de IA)
 
 import re
 from typing import Dict, List
+from ..utils.normalizacao import normalizar_texto
 
 
 class AIService:
@@ -144,19 +145,7 @@ class AIService:
     
     def _limpar_texto(self, texto: str) -> str:
         """Remove acentos e normaliza texto"""
-        texto = texto.lower().strip()
-        # Substitui acentos comuns
-        acentos = {
-            'á': 'a', 'à': 'a', 'ã': 'a', 'â': 'a',
-            'é': 'e', 'ê': 'e',
-            'í': 'i', 'î': 'i',
-            'ó': 'o', 'ô': 'o', 'õ': 'o',
-            'ú': 'u', 'û': 'u',
-            'ç': 'c'
-        }
-        for acento, letra in acentos.items():
-            texto = texto.replace(acento, letra)
-        return texto
+        return normalizar_texto(texto)
     
     def _contem_palavras(self, palavras: List[str], lista_palavras: List[str]) -> bool:
         """Verifica se alguma palavra da lista está presente"""
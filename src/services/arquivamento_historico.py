@@ -0,0 +1,54 @@
+# src/services/arquivamento_historico.py
+"""
+Arquivamento periódico do histórico de conversas
+Princípio SRP: Apenas agenda a movimentação do histórico antigo para o arquivo frio
+
+historico_conversas só cresce. Uma thread move, em intervalos, as linhas com
+mais de `dias` para os segmentos comprimidos de ArquivoHistorico; as leituras
+de ConversaRepository.buscar_historico continuam vendo tudo.
+"""
+
+import threading
+from typing import Optional
+from ..database.conversa_repository import ConversaRepository
+
+
+class ArquivadorHistorico:
+    """Move periodicamente o histórico antigo da tabela para o arquivo frio"""
+    
+    def __init__(self, conversa_repo: ConversaRepository, dias: float, intervalo: float = 3600.0, lote: int = 5000):
+        self.conversa_repo = conversa_repo
+        self.dias = dias
+        self.intervalo = intervalo
+        self.lote = lote
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+    
+    def iniciar(self):
+        """Inicia a thread de arquivamento (idempotente; seguro após o fork)"""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name='arquivador-historico', daemon=True)
+            self._thread.start()
+    
+    def parar(self):
+        """Sinaliza a thread para terminar após o lote em andamento"""
+        self._parar.set()
+    
+    def arquivar(self) -> int:
+        """Executa um arquivamento completo e retorna quantas linhas foram movidas"""
+        return self.conversa_repo.arquivar_historico(self.dias, self.lote)
+    
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                movidas = self.arquivar()
+                if movidas:
+                    print(f"🗄️  {movidas} linha(s) do histórico com mais de {self.dias:g} dias arquivada(s)")
+            except Exception as e:
+                print(f"Erro ao arquivar histórico: {e}")
@@ -0,0 +1,56 @@
+# src/services/async_chatbot_service.py
+"""
+Fachada assíncrona do ChatbotService
+Princípio OCP: Reaproveita o fluxo de conversa existente sem modificá-lo
+Princípio SRP: Apenas agenda o processamento fora do event loop
+
+O fluxo de uma mensagem é CPU leve e intercalado com escritas SQLite, então
+a mensagem inteira roda no executor do banco. Um lock por usuário garante
+que duas mensagens simultâneas do mesmo usuário não disputem a mesma Conversa.
+"""
+
+import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List
+from .chatbot_service import ChatbotService
+
+
+class AsyncChatbotService:
+    """Versão assíncrona do ChatbotService"""
+    
+    def __init__(self, chatbot_service: ChatbotService, executor: ThreadPoolExecutor):
+        self.chatbot_service = chatbot_service
+        self.executor = executor
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+    
+    async def processar_mensagem(self, user_id: str, mensagem: str) -> str:
+        """Processa uma mensagem do usuário e retorna a resposta"""
+        async with self._lock(user_id):
+            return await self._executar(self.chatbot_service.processar_mensagem, user_id, mensagem)
+    
+    async def reiniciar_conversa(self, user_id: str):
+        """Reinicia a conversa de um usuário"""
+        async with self._lock(user_id):
+            return await self._executar(self.chatbot_service.reiniciar_conversa, user_id)
+    
+    async def obter_status_conversa(self, user_id: str) -> dict:
+        """Obtém o status atual da conversa"""
+        return await self._executar(self.chatbot_service.obter_status_conversa, user_id)
+    
+    async def obter_status_conversas(self, user_ids: List[str]) -> List[dict]:
+        """Status de vários usuários de uma vez (cache + consulta IN)"""
+        return await self._executar(self.chatbot_service.obter_status_conversas, user_ids)
+    
+    def _lock(self, user_id: str) -> asyncio.Lock:
+        """Lock por usuário (liberado da memória quando ninguém o usa)"""
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[user_id] = lock
+        return lock
+    
+    async def _executar(self, funcao, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(funcao, *args))
@@ -0,0 +1,93 @@
+# src/services/async_whatsapp_service.py
+"""
+Serviço assíncrono para envio de mensagens WhatsApp via Twilio
+Princípio LSP: Mesma interface do WhatsAppService, com envio aguardável
+Princípio SRP: Apenas troca o transporte HTTP para aiohttp
+
+O cliente Twilio usa AsyncTwilioHttpClient, então o envio não bloqueia o
+event loop enquanto a API da Twilio responde.
+"""
+
+import asyncio
+from typing import Optional
+import aiohttp
+from twilio.http.async_http_client import AsyncTwilioHttpClient
+from twilio.rest import Client
+from .metricas import TWILIO, TWILIO_ERROS, TWILIO_RETENTATIVAS, cronometrar
+from .whatsapp_service import RETRY_AFTER, WhatsAppService, redirecionar_url, registrar_retry_after
+
+
+class AsyncTwilioHttpClientRedirecionado(AsyncTwilioHttpClient):
+    """Versão assíncrona do TwilioHttpClientRedirecionado"""
+    
+    def __init__(self, base_url: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+    
+    async def request(self, method: str, url: str, *args, **kwargs):
+        resposta = await super().request(method, redirecionar_url(url, self.base_url), *args, **kwargs)
+        registrar_retry_after(resposta.status_code, resposta.headers)
+        return resposta
+
+
+class AsyncWhatsAppService(WhatsAppService):
+    """Serviço WhatsApp com envio assíncrono"""
+    
+    def __init__(self, base_url: Optional[str] = None, max_tentativas: Optional[int] = None,
+                 espera_base: float = 0.5):
+        super().__init__(base_url, max_tentativas, espera_base)
+        self.http_client: Optional[AsyncTwilioHttpClient] = None
+        self.async_client: Optional[Client] = None
+    
+    def _obter_cliente(self) -> Client:
+        """Cria o cliente assíncrono na primeira chamada (exige event loop ativo)"""
+        if self.async_client is None:
+            self.http_client = AsyncTwilioHttpClientRedirecionado(self.base_url)
+            self.async_client = Client(self.account_sid, self.auth_token, http_client=self.http_client)
+        return self.async_client
+    
+    async def enviar_mensagem(self, para: str, mensagem: str) -> Optional[str]:
+        """
+        Envia uma mensagem via WhatsApp sem bloquear o event loop
+        
+        Args:
+            para: Número do destinatário (formato: whatsapp:+5511999999999)
+            mensagem: Texto da mensagem
+            
+        Returns:
+            SID da mensagem se enviada com sucesso, None caso contrário
+        """
+        try:
+            if not para.startswith('whatsapp:'):
+                para = f'whatsapp:{para}'
+            
+            for tentativa in range(1, self.max_tentativas + 1):
+                RETRY_AFTER.set(None)
+                try:
+                    with cronometrar(TWILIO, operacao='twilio.enviar_mensagem'):
+                        message = await self._obter_cliente().messages.create_async(
+                            body=mensagem,
+                            from_=f'whatsapp:{self.phone_number}',
+                            to=para
+                        )
+                    return message.sid
+                except Exception as e:
+                    if tentativa == self.max_tentativas or not self._deve_repetir(e):
+                        raise
+                    TWILIO_RETENTATIVAS.inc(operacao='twilio.enviar_mensagem')
+                    await asyncio.sleep(self._espera(tentativa))
+            
+        except Exception as e:
+            TWILIO_ERROS.inc(operacao='twilio.enviar_mensagem')
+            print(f"Erro ao enviar mensagem WhatsApp: {e}")
+            return None
+    
+    def _deve_repetir(self, erro: Exception) -> bool:
+        """Além dos casos do WhatsAppService, falhas do aiohttp ao conectar (nunca timeouts de leitura)"""
+        return super()._deve_repetir(erro) or isinstance(erro, (aiohttp.ClientConnectorError,
+                                                                aiohttp.ConnectionTimeoutError))
+    
+    async def fechar(self):
+        """Fecha a sessão HTTP do cliente Twilio"""
+        if self.http_client:
+            await self.http_client.close()
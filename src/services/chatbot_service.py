@@ -5,58 +5,137 @@ Princípio SRP: Apenas lógica de processamento de mensagens
 Princípio OCP: Aberto para extensão (novos tipos de fluxo)
 """
 
-from typing import Dict
+import time
+from typing import Dict, Iterable, List, Optional
 from ..models.conversa import Conversa, EstadoConversa
 from ..models.consulta import Consulta
 from ..database.consulta_repository import ConsultaRepository
 from ..database.conversa_repository import ConversaRepository
+from ..database.vaga_repository import VagaRepository
+from ..database.exceptions import ConsultaDuplicadaError, VagaIndisponivelError
 from .ai_service import AIService
+from .event_bus import EventBus
+from .metricas import ETAPAS_MENSAGEM, MENSAGENS, cronometrar
 
 class ChatbotService:
     """Serviço principal para processamento de mensagens do chatbot"""
     
-    def __init__(self, consulta_repo: ConsultaRepository, conversa_repo: ConversaRepository, ai_service: AIService = None):
+    def __init__(self, consulta_repo: ConsultaRepository, conversa_repo: ConversaRepository, ai_service: AIService = None,
+                 vaga_repo: Optional[VagaRepository] = None, event_bus: Optional[EventBus] = None):
         self.consulta_repo = consulta_repo
         self.conversa_repo = conversa_repo
         self.ai_service = ai_service or AIService()
+        self.vaga_repo = vaga_repo
+        self.event_bus = event_bus
         self._conversas_ativas: Dict[str, Conversa] = {}
+        self._ultimo_acesso: Dict[str, float] = {}
     
     def processar_mensagem(self, user_id: str, mensagem: str) -> str:
         """Processa uma mensagem do usuário e retorna a resposta"""
-        conversa = self._obter_conversa(user_id)
+        with cronometrar(MENSAGENS):
+            return self._processar_mensagem(user_id, mensagem)
+    
+    def _processar_mensagem(self, user_id: str, mensagem: str) -> str:
+        """Fluxo de processar_mensagem, com cada etapa medida em ETAPAS_MENSAGEM"""
+        with cronometrar(ETAPAS_MENSAGEM, etapa='carregar_conversa'):
+            conversa = self._obter_conversa(user_id)
+        estado_anterior = conversa.estado
         
         # Analisa intenção com IA
-        intencao = self.ai_service.processar_intencao(mensagem)
+        with cronometrar(ETAPAS_MENSAGEM, etapa='intencao'):
+            intencao = self.ai_service.processar_intencao(mensagem)
         
-        # Se a IA tem uma resposta sugerida e não estamos no meio de um fluxo
-        if intencao.get('resposta_sugerida') and conversa.estado == EstadoConversa.INICIAL:
-            if intencao['intencao'] == 'iniciar_conversa':
-                resposta = self._iniciar_conversa(conversa)
+        with cronometrar(ETAPAS_MENSAGEM, etapa='fluxo'):
+            # Se a IA tem uma resposta sugerida e não estamos no meio de um fluxo
+            if intencao.get('resposta_sugerida') and conversa.estado == EstadoConversa.INICIAL:
+                if intencao['intencao'] == 'iniciar_conversa':
+                    resposta = self._iniciar_conversa(conversa)
+                else:
+                    resposta = intencao['resposta_sugerida']
             else:
-                resposta = intencao['resposta_sugerida']
-        else:
-            # Processa pelo fluxo normal
-            resposta = self._processar_por_estado(conversa, mensagem, intencao)
+                # Processa pelo fluxo normal
+                resposta = self._processar_por_estado(conversa, mensagem, intencao)
+            
+            # Melhora a resposta com IA
+            resposta = self.ai_service.melhorar_resposta(resposta, intencao)
         
-        # Melhora a resposta com IA
-        resposta = self.ai_service.melhorar_resposta(resposta, intencao)
+        # Salva o estado (com a transição do funil, se houve) e o histórico
+        with cronometrar(ETAPAS_MENSAGEM, etapa='salvar_estado'):
+            self.conversa_repo.salvar_estado(conversa, estado_anterior)
+        with cronometrar(ETAPAS_MENSAGEM, etapa='salvar_historico'):
+            self.conversa_repo.salvar_historico(user_id, mensagem, resposta, conversa.estado)
         
-        # Salva o estado e histórico
-        self.conversa_repo.salvar_estado(conversa)
-        self.conversa_repo.salvar_historico(user_id, mensagem, resposta, conversa.estado)
+        if conversa.estado != estado_anterior:
+            self._registrar_transicao(user_id, estado_anterior, conversa.estado)
         
         return resposta
     
+    def _registrar_transicao(self, user_id: str, de: EstadoConversa, para: EstadoConversa):
+        """Notifica a mudança de estado de uma conversa"""
+        self._publicar('transicao_estado', {'user_id': user_id, 'de': de.value, 'para': para.value})
+    
+    def _publicar(self, tipo: str, dados: dict):
+        """Publica um evento no barramento, se configurado"""
+        if self.event_bus:
+            self.event_bus.publicar(tipo, dados)
+    
+    def aquecer_cache(self, horas: float, limite: int = 5000) -> int:
+        """
+        Pré-carrega no cache as conversas ativas nas últimas `horas`
+        
+        Feito no boot, evita que a primeira mensagem de cada usuário após um
+        deploy vire uma consulta pontual ao banco. Conversas já em memória
+        não são sobrescritas. Retorna quantas foram carregadas.
+        """
+        return self.restaurar_sessoes(self.conversa_repo.carregar_estados_recentes(horas, limite))
+    
+    def exportar_sessoes(self) -> List[Conversa]:
+        """Retorna as conversas do cache em memória (para o snapshot de shutdown)"""
+        return list(self._conversas_ativas.values())
+    
+    def restaurar_sessoes(self, conversas: Iterable[Conversa]) -> int:
+        """
+        Coloca conversas no cache sem sobrescrever as que já estão em memória
+        
+        Retorna quantas foram adicionadas.
+        """
+        carregadas = 0
+        agora = time.monotonic()
+        for conversa in conversas:
+            if conversa.user_id not in self._conversas_ativas:
+                self._conversas_ativas[conversa.user_id] = conversa
+                self._ultimo_acesso[conversa.user_id] = agora
+                carregadas += 1
+        return carregadas
+    
+    def descartar_sessoes(self, user_ids: Iterable[str]) -> int:
+        """Remove conversas do cache (ex.: estados expirados no banco); retorna quantas saíram"""
+        descartadas = 0
+        for user_id in user_ids:
+            self._ultimo_acesso.pop(user_id, None)
+            if self._conversas_ativas.pop(user_id, None) is not None:
+                descartadas += 1
+        return descartadas
+    
+    def expirar_sessoes(self, ociosas_ha_segundos: float) -> int:
+        """Remove do cache as conversas sem acesso há mais de `ociosas_ha_segundos`"""
+        limite = time.monotonic() - ociosas_ha_segundos
+        ociosas = [user_id for user_id, acesso in list(self._ultimo_acesso.items()) if acesso < limite]
+        return self.descartar_sessoes(ociosas)
+    
     def _obter_conversa(self, user_id: str) -> Conversa:
         """Obtém ou cria uma conversa para o usuário"""
-        if user_id not in self._conversas_ativas:
+        conversa = self._conversas_ativas.get(user_id)
+        if conversa is None:
             # Tenta carregar do banco
             conversa = self.conversa_repo.carregar_estado(user_id)
             if not conversa:
                 conversa = Conversa(user_id=user_id)
             self._conversas_ativas[user_id] = conversa
         
-        return self._conversas_ativas[user_id]
+        # Lido pela expiração do cache (expirar_sessoes)
+        self._ultimo_acesso[user_id] = time.monotonic()
+        return conversa
     
     def _processar_por_estado(self, conversa: Conversa, mensagem: str, intencao: Dict) -> str:
         """Processa a mensagem baseada no estado atual"""
@@ -115,9 +194,6 @@ class ChatbotService:
             if periodo not in ['manhã', 'manha', 'tarde']:
                 return "Por favor, digite apenas 'manhã' ou 'tarde' para o período da consulta."
         
-        conversa.adicionar_dado('periodo', periodo)
-        conversa.estado = EstadoConversa.FINALIZADO
-        
         # Cria e salva a consulta
         consulta = Consulta(
             nome=conversa.dados['nome'],
@@ -126,7 +202,19 @@ class ChatbotService:
             user_id=conversa.user_id
         )
         
-        consulta_id = self.consulta_repo.salvar(consulta)
+        try:
+            with cronometrar(ETAPAS_MENSAGEM, etapa='salvar_consulta'):
+                consulta_id = self.consulta_repo.salvar(consulta)
+        except ConsultaDuplicadaError as e:
+            return self._informar_duplicada(conversa, periodo, e.consulta_id)
+        except VagaIndisponivelError:
+            return self._oferecer_alternativas(conversa, periodo)
+        
+        conversa.adicionar_dado('periodo', periodo)
+        conversa.estado = EstadoConversa.FINALIZADO
+        
+        consulta.id = consulta_id
+        self._publicar('consulta_criada', consulta.to_dict())
         
         resposta = "🎉 Consulta marcada com sucesso!\n\n"
         resposta += "📋 **Resumo da sua consulta:**\n"
@@ -138,6 +226,33 @@ class ChatbotService:
         
         return resposta
     
+    def _informar_duplicada(self, conversa: Conversa, periodo: str, consulta_id: Optional[int]) -> str:
+        """Informa que o usuário já tem consulta no mesmo horário e volta a pedir a data"""
+        data = conversa.dados.pop('data')
+        conversa.estado = EstadoConversa.AGUARDANDO_DATA
+        
+        resposta = f"⚠️ Você já tem uma consulta marcada para {data} no período da {periodo}"
+        resposta += f" (🆔 ID: {consulta_id}).\n\n" if consulta_id else ".\n\n"
+        resposta += "Não registramos um novo agendamento. Por favor, informe outra data para a consulta. (exemplo: 15/06/2025)"
+        return resposta
+    
+    def _oferecer_alternativas(self, conversa: Conversa, periodo: str) -> str:
+        """Informa que o horário está lotado e sugere os próximos livres"""
+        data = conversa.dados.pop('data')
+        conversa.estado = EstadoConversa.AGUARDANDO_DATA
+        
+        resposta = f"😕 Não há mais vagas para {data} no período da {periodo}.\n\n"
+        
+        alternativas = self.vaga_repo.proximas_vagas(data) if self.vaga_repo else []
+        if alternativas:
+            resposta += "📅 Próximos horários disponíveis:\n"
+            for vaga in alternativas:
+                resposta += f"• {vaga['data']} - {vaga['periodo']}\n"
+            resposta += "\n"
+        
+        resposta += "Por favor, informe outra data para a consulta. (exemplo: 15/06/2025)"
+        return resposta
+    
     def _processar_finalizado(self, conversa: Conversa, mensagem: str) -> str:
         """Processa mensagens quando a conversa está finalizada"""
         if mensagem.strip().lower() in ['nova', 'iniciar', 'novo', 'começar']:
@@ -148,11 +263,36 @@ class ChatbotService:
     
     def reiniciar_conversa(self, user_id: str):
         """Reinicia a conversa de um usuário"""
+        estado_anterior = None
         if user_id in self._conversas_ativas:
-            self._conversas_ativas[user_id].reiniciar()
-        self.conversa_repo.remover_estado(user_id)
+            conversa = self._conversas_ativas[user_id]
+            estado_anterior = conversa.estado
+            conversa.reiniciar()
+        self.conversa_repo.remover_estado(user_id, estado_anterior)
+        if estado_anterior not in (None, EstadoConversa.INICIAL):
+            self._registrar_transicao(user_id, estado_anterior, EstadoConversa.INICIAL)
     
     def obter_status_conversa(self, user_id: str) -> dict:
         """Obtém o status atual da conversa"""
         conversa = self._obter_conversa(user_id)
-        return conversa.to_dict()
\ No newline at end of file
+        return conversa.to_dict()
+    
+    def obter_status_conversas(self, user_ids: Iterable[str]) -> List[dict]:
+        """
+        Status de vários usuários, na ordem recebida (sem repetições)
+        
+        Resolve primeiro pelo cache de sessões e busca as faltantes no banco
+        de uma vez (consultas IN). Ao contrário de obter_status_conversa, as
+        conversas lidas do banco não entram no cache: uma sincronização em
+        massa não deve empurrar as sessões ativas para fora dele. Usuários sem
+        estado salvo aparecem no estado inicial.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        conversas = {user_id: self._conversas_ativas.get(user_id) for user_id in user_ids}
+        
+        faltantes = [user_id for user_id, conversa in conversas.items() if conversa is None]
+        if faltantes:
+            for user_id, (conversa, _) in self.conversa_repo.carregar_estados(faltantes).items():
+                conversas[user_id] = conversa
+        
+        return [(conversas[user_id] or Conversa(user_id=user_id)).to_dict() for user_id in user_ids]
\ No newline at end of file
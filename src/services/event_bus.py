@@ -0,0 +1,88 @@
+# src/services/event_bus.py
+"""
+Barramento de eventos em processo (publish/subscribe)
+Princípio SRP: Apenas distribui eventos entre publicadores e assinantes
+Princípio DIP: Services publicam sem conhecer quem consome (SSE, métricas...)
+
+Assinantes são callbacks chamados na thread de quem publica, então devem
+ser rápidos: o padrão é apenas enfileirar o evento (assinar_fila).
+"""
+
+import itertools
+import queue
+import threading
+import time
+from typing import Callable, Dict, List
+
+Assinante = Callable[[dict], None]
+
+
+class FilaEventos(queue.Queue):
+    """Fila de eventos de um assinante (guarda o callback para cancelamento)"""
+    callback: Assinante
+
+
+class EventBus:
+    """Barramento de eventos thread-safe"""
+    
+    def __init__(self):
+        self._assinantes: List[Assinante] = []
+        self._lock = threading.Lock()
+        self._sequencia = itertools.count(1)
+    
+    def assinar(self, callback: Assinante) -> Assinante:
+        """Registra um callback para todos os eventos publicados"""
+        with self._lock:
+            self._assinantes.append(callback)
+        return callback
+    
+    def cancelar(self, callback: Assinante):
+        """Remove um callback registrado"""
+        with self._lock:
+            if callback in self._assinantes:
+                self._assinantes.remove(callback)
+    
+    def assinar_fila(self, tamanho: int = 100) -> FilaEventos:
+        """
+        Assina o barramento com uma fila limitada
+        
+        Se o consumidor ficar para trás e a fila encher, os eventos novos são
+        descartados para esse assinante (nunca bloqueiam quem publica).
+        """
+        fila = FilaEventos(maxsize=tamanho)
+        
+        def enfileirar(evento: dict):
+            try:
+                fila.put_nowait(evento)
+            except queue.Full:
+                pass
+        
+        fila.callback = self.assinar(enfileirar)
+        return fila
+    
+    def cancelar_fila(self, fila: FilaEventos):
+        """Remove a assinatura criada por assinar_fila"""
+        self.cancelar(fila.callback)
+    
+    def publicar(self, tipo: str, dados: Dict):
+        """Publica um evento para todos os assinantes"""
+        evento = {
+            'id': next(self._sequencia),
+            'tipo': tipo,
+            'dados': dados,
+            'timestamp': time.time()
+        }
+        
+        with self._lock:
+            assinantes = list(self._assinantes)
+        
+        for callback in assinantes:
+            try:
+                callback(evento)
+            except Exception as e:
+                print(f"Erro ao entregar evento {tipo}: {e}")
+    
+    @property
+    def total_assinantes(self) -> int:
+        with self._lock:
+            return len(self._assinantes)
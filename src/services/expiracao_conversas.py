@@ -0,0 +1,75 @@
+# src/services/expiracao_conversas.py
+"""
+Expiração de conversas abandonadas
+Princípio SRP: Apenas remove estados de conversa ociosos do banco e do cache
+
+Conversas largadas no meio do fluxo ficariam para sempre em estados_conversa
+e no cache do ChatbotService. Uma thread varre periodicamente os estados sem
+atividade há mais de ttl_horas, em lotes (uma transação curta por lote), e
+descarta as mesmas conversas da memória.
+"""
+
+import threading
+from typing import Optional
+from ..database.conversa_repository import ConversaRepository
+from .chatbot_service import ChatbotService
+from .metricas import CONVERSAS_EXPIRADAS
+
+
+class ExpiradorConversas:
+    """Remove (ou arquiva) estados de conversa ociosos além do TTL"""
+    
+    def __init__(self, conversa_repo: ConversaRepository, chatbot_service: ChatbotService, ttl_horas: float,
+                 intervalo: float = 300.0, lote: int = 500, arquivar: bool = False):
+        self.conversa_repo = conversa_repo
+        self.chatbot_service = chatbot_service
+        self.ttl_horas = ttl_horas
+        self.intervalo = intervalo
+        self.lote = lote
+        self.arquivar = arquivar
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+    
+    def iniciar(self):
+        """Inicia a thread de varredura (idempotente; seguro após o fork)"""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name='expirador-conversas', daemon=True)
+            self._thread.start()
+    
+    def parar(self):
+        """Sinaliza a thread para terminar após a varredura em andamento"""
+        self._parar.set()
+    
+    def varrer(self) -> int:
+        """
+        Executa uma varredura completa e retorna quantos estados saíram do banco
+        
+        Também descarta do cache as conversas sem acesso há mais de ttl_horas,
+        inclusive as que nunca chegaram a ser salvas.
+        """
+        removidos = 0
+        while not self._parar.is_set():
+            user_ids = self.conversa_repo.expirar_estados(self.ttl_horas, self.lote, self.arquivar)
+            self.chatbot_service.descartar_sessoes(user_ids)
+            removidos += len(user_ids)
+            if len(user_ids) < self.lote:
+                break
+        
+        CONVERSAS_EXPIRADAS.inc(removidos, origem='banco')
+        CONVERSAS_EXPIRADAS.inc(self.chatbot_service.expirar_sessoes(self.ttl_horas * 3600), origem='cache')
+        return removidos
+    
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                removidos = self.varrer()
+                if removidos:
+                    print(f"🧹 {removidos} conversa(s) ociosa(s) há mais de {self.ttl_horas:g}h expirada(s)")
+            except Exception as e:
+                print(f"Erro ao expirar conversas: {e}")
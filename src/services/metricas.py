@@ -0,0 +1,231 @@
+# src/services/metricas.py
+"""
+Métricas em memória no formato de exposição do Prometheus
+Princípio SRP: Apenas agrega contadores e histogramas e os serializa
+Princípio OCP: Novas métricas são registradas sem alterar o exportador
+
+O custo por observação é um perf_counter, um bisect e um lock curto, baixo
+o bastante para ficar ligado em produção. Como no prometheus_client, há um
+registro padrão por processo (REGISTRO) compartilhado pelos módulos.
+"""
+
+import bisect
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from .rastreamento import span, trace_ativo
+
+# Buckets (segundos) adequados a operações de SQLite e chamadas HTTP
+BUCKETS_PADRAO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+Rotulos = Tuple[Tuple[str, str], ...]
+
+
+def _formatar_rotulos(rotulos: Rotulos, extra: Optional[Tuple[str, str]] = None) -> str:
+    pares = list(rotulos) + ([extra] if extra else [])
+    if not pares:
+        return ''
+    conteudo = ','.join(f'{chave}="{str(valor).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                        for chave, valor in pares)
+    return '{' + conteudo + '}'
+
+
+class Contador:
+    """Contador monotônico com rótulos"""
+    
+    tipo = 'counter'
+    
+    def __init__(self, nome: str, ajuda: str):
+        self.nome = nome
+        self.ajuda = ajuda
+        self._valores: Dict[Rotulos, float] = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, valor: float = 1.0, **rotulos):
+        chave = tuple(sorted(rotulos.items()))
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0.0) + valor
+    
+    def valor(self, **rotulos) -> float:
+        return self._valores.get(tuple(sorted(rotulos.items())), 0.0)
+    
+    def exportar(self) -> List[str]:
+        with self._lock:
+            itens = sorted(self._valores.items())
+        return [f'{self.nome}{_formatar_rotulos(rotulos)} {valor:g}' for rotulos, valor in itens]
+
+
+class Histograma:
+    """Histograma cumulativo com rótulos"""
+    
+    tipo = 'histogram'
+    
+    def __init__(self, nome: str, ajuda: str, buckets: Sequence[float] = BUCKETS_PADRAO):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.buckets = tuple(sorted(buckets))
+        # rotulos -> [contagem por bucket (+Inf no fim), soma, total]
+        self._series: Dict[Rotulos, list] = {}
+        self._lock = threading.Lock()
+    
+    def observar(self, valor: float, **rotulos):
+        chave = tuple(sorted(rotulos.items()))
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+    
+    def contagem(self, **rotulos) -> int:
+        serie = self._series.get(tuple(sorted(rotulos.items())))
+        return serie[2] if serie else 0
+    
+    def soma(self, **rotulos) -> float:
+        serie = self._series.get(tuple(sorted(rotulos.items())))
+        return serie[1] if serie else 0.0
+    
+    def exportar(self) -> List[str]:
+        with self._lock:
+            itens = sorted((rotulos, (list(serie[0]), serie[1], serie[2])) for rotulos, serie in self._series.items())
+        
+        linhas = []
+        for rotulos, (contagens, soma, total) in itens:
+            acumulado = 0
+            for limite, quantidade in zip(self.buckets + (float('inf'),), contagens):
+                acumulado += quantidade
+                le = '+Inf' if limite == float('inf') else f'{limite:g}'
+                linhas.append(f'{self.nome}_bucket{_formatar_rotulos(rotulos, ("le", le))} {acumulado}')
+            linhas.append(f'{self.nome}_sum{_formatar_rotulos(rotulos)} {soma:.6f}')
+            linhas.append(f'{self.nome}_count{_formatar_rotulos(rotulos)} {total}')
+        return linhas
+
+
+class RegistroMetricas:
+    """Registro de métricas de um processo"""
+    
+    def __init__(self):
+        self._metricas: Dict[str, object] = {}
+        self._lock = threading.Lock()
+    
+    def contador(self, nome: str, ajuda: str) -> Contador:
+        return self._registrar(nome, lambda: Contador(nome, ajuda))
+    
+    def histograma(self, nome: str, ajuda: str, buckets: Sequence[float] = BUCKETS_PADRAO) -> Histograma:
+        return self._registrar(nome, lambda: Histograma(nome, ajuda, buckets))
+    
+    def exportar(self) -> str:
+        """Serializa todas as métricas no formato texto do Prometheus (0.0.4)"""
+        with self._lock:
+            metricas = sorted(self._metricas.items())
+        
+        linhas = []
+        for nome, metrica in metricas:
+            linhas.append(f'# HELP {nome} {metrica.ajuda}')
+            linhas.append(f'# TYPE {nome} {metrica.tipo}')
+            linhas.extend(metrica.exportar())
+        return '\n'.join(linhas) + '\n'
+    
+    def _registrar(self, nome: str, criar):
+        with self._lock:
+            if nome not in self._metricas:
+                self._metricas[nome] = criar()
+            return self._metricas[nome]
+
+
+REGISTRO = RegistroMetricas()
+
+# Métricas do caminho quente
+ETAPAS_MENSAGEM = REGISTRO.histograma(
+    'atende_mensagem_etapa_segundos', 'Duração de cada etapa de ChatbotService.processar_mensagem')
+MENSAGENS = REGISTRO.histograma(
+    'atende_mensagem_segundos', 'Duração total de ChatbotService.processar_mensagem')
+REPOSITORIOS = REGISTRO.histograma(
+    'atende_repositorio_segundos', 'Duração de cada operação dos repositories')
+TWILIO = REGISTRO.histograma(
+    'atende_twilio_segundos', 'Duração das chamadas à API da Twilio')
+TWILIO_ERROS = REGISTRO.contador(
+    'atende_twilio_erros_total', 'Chamadas à API da Twilio que falharam')
+TWILIO_RETENTATIVAS = REGISTRO.contador(
+    'atende_twilio_retentativas_total', 'Novas tentativas após 429 ou falha ao conectar na Twilio')
+CONVERSAS_EXPIRADAS = REGISTRO.contador(
+    'atende_conversas_expiradas_total', 'Estados de conversa removidos por inatividade (banco e cache)')
+HTTP_REQUISICOES = REGISTRO.contador(
+    'atende_http_requisicoes_total', 'Requisições HTTP atendidas por rota e status')
+HTTP_DURACAO = REGISTRO.histograma(
+    'atende_http_segundos', 'Duração das requisições HTTP por rota')
+
+
+@contextmanager
+def cronometrar(histograma: Histograma, **rotulos) -> Iterator[None]:
+    """
+    Mede o bloco e registra a duração no histograma (mesmo com exceção)
+    
+    Dentro de um trace amostrado o bloco também vira um span, nomeado pelo
+    rótulo (etapa/operação) ou, sem rótulos, pelo nome da métrica.
+    """
+    if trace_ativo():
+        nome_span = next(iter(rotulos.values()), histograma.nome)
+        contexto = span(nome_span, metrica=histograma.nome, **rotulos)
+    else:
+        contexto = nullcontext()
+    
+    inicio = time.perf_counter()
+    try:
+        with contexto:
+            yield
+    finally:
+        histograma.observar(time.perf_counter() - inicio, **rotulos)
+
+
+def instrumentar_repositorio(cls):
+    """
+    Decorator de classe: mede todos os métodos públicos do repository
+    
+    Cada método vira uma série de atende_repositorio_segundos com o rótulo
+    operacao="<Classe>.<método>". Métodos geradores são medidos até o fim da
+    iteração, somando só o tempo gasto dentro deles (não o do consumidor).
+    """
+    for nome, metodo in list(vars(cls).items()):
+        if nome.startswith('_') or not callable(metodo):
+            continue
+        setattr(cls, nome, _medir_metodo(metodo, f'{cls.__name__}.{nome}'))
+    return cls
+
+
+def _medir_metodo(metodo, operacao: str):
+    if inspect.isgeneratorfunction(metodo):
+        return _medir_gerador(metodo, operacao)
+    
+    @functools.wraps(metodo)
+    def medido(*args, **kwargs):
+        with cronometrar(REPOSITORIOS, operacao=operacao):
+            return metodo(*args, **kwargs)
+    return medido
+
+
+def _medir_gerador(metodo, operacao: str):
+    """Mede cada next() do gerador e registra o total quando ele termina ou é descartado"""
+    @functools.wraps(metodo)
+    def medido(*args, **kwargs):
+        gerador = metodo(*args, **kwargs)
+        duracao = 0.0
+        try:
+            while True:
+                inicio = time.perf_counter()
+                try:
+                    item = next(gerador)
+                except StopIteration as fim:
+                    return fim.value
+                finally:
+                    duracao += time.perf_counter() - inicio
+                yield item
+        finally:
+            gerador.close()
+            REPOSITORIOS.observar(duracao, operacao=operacao)
+    return medido
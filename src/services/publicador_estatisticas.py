@@ -0,0 +1,99 @@
+# src/services/publicador_estatisticas.py
+"""
+Publicador de estatísticas para o barramento de eventos
+Princípio SRP: Apenas recalcula e publica estatísticas quando os dados mudam
+
+As estatísticas são recalculadas uma única vez por mudança (com um intervalo
+mínimo entre recálculos), não uma vez por dashboard aberto. O último resultado
+fica em memória para quem acabou de se conectar, mas expira na virada do dia
+(consultas de hoje) e após `validade` segundos.
+
+O barramento é por processo: com vários workers, as consultas criadas nos
+outros processos não geram eventos aqui. Nesse caso o publicador não depende
+dos eventos e sonda o banco a cada `intervalo_minimo`, publicando só quando
+o resultado muda.
+"""
+
+import threading
+import time
+from datetime import date
+from typing import Optional
+from ..database.consulta_repository import ConsultaRepository
+from .event_bus import EventBus
+
+# Eventos que alteram o resultado de obter_estatisticas
+EVENTOS_QUE_ALTERAM = {'consulta_criada'}
+
+
+class PublicadorEstatisticas:
+    """Recalcula estatísticas após mudanças e publica o evento 'estatisticas'"""
+    
+    def __init__(self, event_bus: EventBus, consulta_repo: ConsultaRepository, intervalo_minimo: float = 2.0,
+                 validade: float = 60.0, processos: int = 1):
+        self.event_bus = event_bus
+        self.consulta_repo = consulta_repo
+        self.intervalo_minimo = intervalo_minimo
+        # Com vários processos, sondagem no intervalo mínimo substitui os eventos locais
+        self.intervalo_sondagem = intervalo_minimo if processos > 1 else validade
+        self._ultimas: Optional[dict] = None
+        self._dia: Optional[date] = None
+        self._calculadas_em = 0.0
+        self._pendente = threading.Event()
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        # Assinatura única: reiniciar a thread (após parar ou no worker depois
+        # do fork com preload_app) não pode duplicar o callback no barramento
+        self.event_bus.assinar(self._ao_receber_evento)
+    
+    def iniciar(self):
+        """Inicia a thread de recálculo (idempotente; seguro após o fork)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name='publicador-estatisticas', daemon=True)
+            self._thread.start()
+    
+    def parar(self, timeout: float = 5.0):
+        """Encerra a thread de recálculo e aguarda o fim dela"""
+        self._parar.set()
+        self._pendente.set()
+        with self._lock:
+            thread = self._thread
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout)
+    
+    def estatisticas_atuais(self) -> dict:
+        """Últimas estatísticas calculadas (recalcula se expiraram ou o dia mudou)"""
+        if self._expiradas():
+            self._recalcular()
+        return self._ultimas
+    
+    def _expiradas(self) -> bool:
+        return (self._ultimas is None or self._dia != date.today()
+                or time.monotonic() - self._calculadas_em >= self.intervalo_sondagem)
+    
+    def _recalcular(self) -> bool:
+        """Recalcula as estatísticas e informa se o resultado mudou"""
+        novas = self.consulta_repo.obter_estatisticas()
+        mudou = novas != self._ultimas
+        self._ultimas, self._dia, self._calculadas_em = novas, date.today(), time.monotonic()
+        return mudou
+    
+    def _ao_receber_evento(self, evento: dict):
+        if evento['tipo'] in EVENTOS_QUE_ALTERAM:
+            self._pendente.set()
+    
+    def _executar(self):
+        while not self._parar.is_set():
+            if self._pendente.wait(timeout=self.intervalo_sondagem):
+                # Agrupa rajadas de mudanças em um único recálculo (parar interrompe a espera)
+                if self._parar.wait(self.intervalo_minimo):
+                    return
+                self._pendente.clear()
+            try:
+                if self._recalcular():
+                    self.event_bus.publicar('estatisticas', self._ultimas)
+            except Exception as e:
+                print(f"Erro ao recalcular estatísticas: {e}")
@@ -0,0 +1,207 @@
+# src/services/rastreamento.py
+"""
+Rastreamento amostrado de requisições (traces) em memória
+Princípio SRP: Apenas coleta spans de uma requisição e guarda os traces
+Princípio OCP: Novos pontos de medição só abrem span(), sem conhecer o Rastreador
+
+O trace ativo vive num ContextVar, então qualquer camada (etapas do chatbot,
+repositories, cursores SQL, Twilio) abre spans sem receber o trace por
+parâmetro. Fora de um trace amostrado, span() custa uma leitura de ContextVar.
+
+Os traces guardados seguem o formato JSON do OTLP (OpenTelemetry), podendo ser
+importados por ferramentas compatíveis. O user_id nunca é guardado: apenas um
+hash com chave (BLAKE2b), estável dentro da mesma SECRET_KEY.
+"""
+
+import hashlib
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Iterator, List, Optional
+
+NOME_SERVICO = 'atende_py'
+
+
+class Span:
+    """Trecho medido de um trace"""
+    
+    __slots__ = ('nome', 'span_id', 'pai_id', 'inicio_ns', 'fim_ns', 'atributos', 'erro')
+    
+    def __init__(self, nome: str, pai_id: Optional[str], atributos: dict, inicio_ns: Optional[int] = None):
+        self.nome = nome
+        self.span_id = os.urandom(8).hex()
+        self.pai_id = pai_id
+        self.inicio_ns = inicio_ns if inicio_ns is not None else time.time_ns()
+        self.fim_ns = self.inicio_ns
+        self.atributos = atributos
+        self.erro: Optional[str] = None
+    
+    @property
+    def duracao_ms(self) -> float:
+        return (self.fim_ns - self.inicio_ns) / 1_000_000
+    
+    def to_otlp(self, trace_id: str) -> dict:
+        span = {
+            'traceId': trace_id,
+            'spanId': self.span_id,
+            'name': self.nome,
+            'kind': 2 if self.pai_id is None else 1,  # SERVER na raiz, INTERNAL nos demais
+            'startTimeUnixNano': str(self.inicio_ns),
+            'endTimeUnixNano': str(self.fim_ns),
+            'attributes': [_atributo_otlp(chave, valor) for chave, valor in self.atributos.items()],
+            'status': {'code': 2, 'message': self.erro} if self.erro else {'code': 1}
+        }
+        if self.pai_id:
+            span['parentSpanId'] = self.pai_id
+        return span
+
+
+class Trace:
+    """Spans de uma requisição"""
+    
+    MAX_SPANS = 500
+    
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+        self.descartados = 0
+    
+    def adicionar(self, span: Span) -> Span:
+        if len(self.spans) < self.MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.descartados += 1
+        return span
+    
+    @property
+    def raiz(self) -> Span:
+        return self.spans[0]
+    
+    def to_otlp_spans(self) -> List[dict]:
+        return [span.to_otlp(self.trace_id) for span in self.spans]
+
+
+_trace_atual: ContextVar[Optional[Trace]] = ContextVar('trace_atual', default=None)
+_span_atual: ContextVar[Optional[str]] = ContextVar('span_atual', default=None)
+
+
+def trace_ativo() -> bool:
+    """Indica se a execução atual pertence a um trace sendo coletado"""
+    return _trace_atual.get() is not None
+
+
+@contextmanager
+def span(nome: str, **atributos) -> Iterator[Optional[Span]]:
+    """Mede o bloco como um span filho do span atual (no-op fora de trace)"""
+    trace = _trace_atual.get()
+    if trace is None:
+        yield None
+        return
+    
+    registro = trace.adicionar(Span(nome, _span_atual.get(), atributos))
+    token = _span_atual.set(registro.span_id)
+    try:
+        yield registro
+    except BaseException as e:
+        registro.erro = type(e).__name__
+        raise
+    finally:
+        _span_atual.reset(token)
+        registro.fim_ns = time.time_ns()
+
+
+def registrar_span(nome: str, duracao: float, **atributos):
+    """Registra um span já concluído agora, com a duração medida (segundos)"""
+    trace = _trace_atual.get()
+    if trace is None:
+        return
+    fim_ns = time.time_ns()
+    registro = Span(nome, _span_atual.get(), atributos, inicio_ns=fim_ns - int(duracao * 1_000_000_000))
+    registro.fim_ns = fim_ns
+    trace.adicionar(registro)
+
+
+class Rastreador:
+    """Decide a amostragem e guarda os traces concluídos num buffer circular"""
+    
+    def __init__(self, taxa_amostragem: float = 0.1, capacidade: int = 100,
+                 sempre_acima_ms: Optional[float] = None, chave_hash: str = ''):
+        """
+        Args:
+            taxa_amostragem: Fração das requisições rastreadas (0 a 1)
+            capacidade: Quantos traces ficam guardados
+            sempre_acima_ms: Se definido, toda requisição é coletada e as mais
+                lentas que o limiar são guardadas mesmo fora da amostra
+            chave_hash: Chave do hash de user_id
+        """
+        self.taxa_amostragem = taxa_amostragem
+        self.sempre_acima_ms = sempre_acima_ms
+        self._chave_hash = hashlib.sha256(chave_hash.encode()).digest()
+        self._traces: Deque[Trace] = deque(maxlen=capacidade)
+        self._lock = threading.Lock()
+    
+    def hash_usuario(self, user_id: str) -> str:
+        return hashlib.blake2b(user_id.encode(), key=self._chave_hash, digest_size=8).hexdigest()
+    
+    @contextmanager
+    def trace(self, nome: str, user_id: Optional[str] = None, **atributos) -> Iterator[Optional[Trace]]:
+        """Abre o span raiz de uma requisição, se ela for amostrada"""
+        amostrado = random.random() < self.taxa_amostragem
+        if (not amostrado and self.sempre_acima_ms is None) or trace_ativo():
+            yield None
+            return
+        
+        if user_id is not None:
+            atributos['enduser.id_hash'] = self.hash_usuario(user_id)
+        atributos['amostrado'] = amostrado
+        
+        trace = Trace()
+        raiz = trace.adicionar(Span(nome, None, atributos))
+        token_trace = _trace_atual.set(trace)
+        token_span = _span_atual.set(raiz.span_id)
+        try:
+            yield trace
+        except BaseException as e:
+            raiz.erro = type(e).__name__
+            raise
+        finally:
+            _span_atual.reset(token_span)
+            _trace_atual.reset(token_trace)
+            raiz.fim_ns = time.time_ns()
+            if amostrado or raiz.duracao_ms >= self.sempre_acima_ms:
+                with self._lock:
+                    self._traces.append(trace)
+    
+    def traces(self, limite: int = 50, min_ms: float = 0.0) -> List[Trace]:
+        """Traces guardados, do mais recente ao mais antigo"""
+        with self._lock:
+            guardados = list(self._traces)[::-1]
+        return [trace for trace in guardados if trace.raiz.duracao_ms >= min_ms][:limite]
+    
+    def exportar_otlp(self, limite: int = 50, min_ms: float = 0.0) -> dict:
+        """Traces no formato JSON do OTLP (ExportTraceServiceRequest)"""
+        spans = [span for trace in self.traces(limite, min_ms) for span in trace.to_otlp_spans()]
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': [_atributo_otlp('service.name', NOME_SERVICO)]},
+                'scopeSpans': [{'scope': {'name': __name__}, 'spans': spans}]
+            }]
+        }
+    
+    def limpar(self):
+        with self._lock:
+            self._traces.clear()
+
+
+def _atributo_otlp(chave: str, valor) -> dict:
+    if isinstance(valor, bool):
+        return {'key': chave, 'value': {'boolValue': valor}}
+    if isinstance(valor, int):
+        return {'key': chave, 'value': {'intValue': str(valor)}}
+    if isinstance(valor, float):
+        return {'key': chave, 'value': {'doubleValue': valor}}
+    return {'key': chave, 'value': {'stringValue': str(valor)}}
@@ -0,0 +1,196 @@
+# src/services/snapshot_sessoes.py
+"""
+Snapshot do cache de sessões do ChatbotService entre restarts
+Princípio SRP: Apenas grava, valida e restaura o snapshot das conversas em memória
+
+Formato do arquivo (big-endian):
+    cabeçalho  = magic b'ATSS' | versão (1 byte) | criado_em (double, epoch UTC)
+                 | crc32 do corpo (uint32) | tamanho do corpo (uint32)
+    corpo      = zlib(JSON [[user_id, estado, dados], ...])
+
+Com vários workers cada processo grava o seu arquivo (<caminho>.<pid>); a
+restauração junta o arquivo principal e os de cada processo, fica com a
+cópia mais nova de cada conversa e apaga os arquivos por processo lidos.
+
+Na restauração o arquivo é mapeado com mmap, o checksum é conferido antes de
+descomprimir e cada conversa é comparada com estados_conversa numa consulta
+IN: entradas que mudaram no banco depois do snapshot são descartadas (o
+primeiro acesso as recarrega do banco normalmente).
+"""
+
+import glob
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import List, Optional
+from ..models.conversa import Conversa, EstadoConversa
+from .chatbot_service import ChatbotService
+
+MAGIC = b'ATSS'
+VERSAO_FORMATO = 1
+CABECALHO = struct.Struct('>4sBdII')
+
+
+class SnapshotInvalidoError(ValueError):
+    """Levantada quando o arquivo não é um snapshot válido (formato, versão ou checksum)"""
+
+
+def serializar(conversas: List[Conversa], criado_em: Optional[float] = None) -> bytes:
+    """Codifica as conversas no formato binário do snapshot"""
+    linhas = [[conversa.user_id, conversa.estado.value, conversa.dados] for conversa in conversas]
+    corpo = zlib.compress(json.dumps(linhas, separators=(',', ':')).encode('utf-8'))
+    criado_em = time.time() if criado_em is None else criado_em
+    return CABECALHO.pack(MAGIC, VERSAO_FORMATO, criado_em, zlib.crc32(corpo), len(corpo)) + corpo
+
+
+def desserializar(buffer) -> tuple:
+    """
+    Decodifica um snapshot (bytes ou mmap) em (criado_em, conversas)
+    
+    Levanta SnapshotInvalidoError se o cabeçalho, a versão, o tamanho ou o
+    checksum não conferirem.
+    """
+    if len(buffer) < CABECALHO.size:
+        raise SnapshotInvalidoError("arquivo menor que o cabeçalho")
+    
+    magic, versao, criado_em, crc, tamanho = CABECALHO.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise SnapshotInvalidoError("assinatura desconhecida")
+    if versao != VERSAO_FORMATO:
+        raise SnapshotInvalidoError(f"versão {versao} não suportada")
+    
+    corpo = buffer[CABECALHO.size:CABECALHO.size + tamanho]
+    if len(corpo) != tamanho or zlib.crc32(corpo) != crc:
+        raise SnapshotInvalidoError("checksum inválido (arquivo truncado ou corrompido)")
+    
+    try:
+        linhas = json.loads(zlib.decompress(corpo).decode('utf-8'))
+        conversas = [Conversa(user_id, EstadoConversa(estado), dados) for user_id, estado, dados in linhas]
+    except (ValueError, TypeError, zlib.error) as e:
+        raise SnapshotInvalidoError(f"conteúdo inválido: {e}") from e
+    
+    return criado_em, conversas
+
+
+class SnapshotSessoes:
+    """Grava o cache de sessões no shutdown e o restaura no boot"""
+    
+    def __init__(self, caminho: str, chatbot_service: ChatbotService, idade_maxima_horas: float = 24):
+        self.caminho = caminho
+        self.chatbot_service = chatbot_service
+        self.idade_maxima_horas = idade_maxima_horas
+    
+    def salvar(self, por_processo: bool = False) -> int:
+        """
+        Grava as conversas em memória no arquivo e retorna quantas foram salvas
+        
+        Com por_processo=True o destino é <caminho>.<pid>, para que workers
+        que encerram juntos não sobrescrevam o snapshot uns dos outros.
+        A escrita vai para um arquivo temporário renomeado no final, então um
+        processo morto no meio da gravação nunca deixa um snapshot parcial.
+        """
+        conversas = self.chatbot_service.exportar_sessoes()
+        destino = self.arquivo_do_processo() if por_processo else self.caminho
+        temporario = f'{self.caminho}.{os.getpid()}.tmp'
+        
+        with open(temporario, 'wb') as arquivo:
+            arquivo.write(serializar(conversas))
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, destino)
+        
+        return len(conversas)
+    
+    def arquivo_do_processo(self) -> str:
+        """Arquivo do snapshot gravado por este processo com salvar(por_processo=True)"""
+        return f'{self.caminho}.{os.getpid()}'
+    
+    def restaurar(self) -> int:
+        """
+        Carrega o snapshot no cache do ChatbotService e retorna quantas conversas entraram
+        
+        Junta o arquivo principal e os arquivos por processo; uma conversa
+        presente em mais de um fica com a cópia do snapshot mais novo.
+        Snapshot ausente, inválido ou mais velho que idade_maxima_horas é
+        ignorado: o cache volta a ser preenchido sob demanda.
+        """
+        por_usuario = {}
+        for caminho in self._arquivos():
+            lido = self._ler_valido(caminho)
+            if caminho != self.caminho:
+                self._remover(caminho)
+            if lido is None:
+                continue
+            criado_em, conversas = lido
+            for conversa in conversas:
+                if conversa.user_id not in por_usuario or por_usuario[conversa.user_id][0] < criado_em:
+                    por_usuario[conversa.user_id] = (criado_em, conversa)
+        
+        if not por_usuario:
+            return 0
+        validas = self._descartar_desatualizadas(list(por_usuario.values()))
+        return self.chatbot_service.restaurar_sessoes(validas)
+    
+    def _arquivos(self) -> List[str]:
+        """Arquivo principal e arquivos por processo (<caminho>.<pid>) existentes"""
+        por_processo = [caminho for caminho in glob.glob(f'{glob.escape(self.caminho)}.*')
+                        if caminho[len(self.caminho) + 1:].isdigit()]
+        return [self.caminho] + sorted(por_processo)
+    
+    def _ler_valido(self, caminho: str) -> Optional[tuple]:
+        """(criado_em, conversas) do arquivo, ou None se ausente, inválido ou velho demais"""
+        try:
+            criado_em, conversas = self._ler(caminho)
+        except FileNotFoundError:
+            return None
+        except SnapshotInvalidoError as e:
+            print(f"⚠️  Snapshot de sessões ignorado ({caminho}): {e}")
+            return None
+        
+        if time.time() - criado_em > self.idade_maxima_horas * 3600:
+            print(f"⚠️  Snapshot de sessões ignorado ({caminho}): mais velho que {self.idade_maxima_horas:g}h")
+            return None
+        return criado_em, conversas
+    
+    def _remover(self, caminho: str):
+        """Apaga um arquivo por processo já lido (o próximo shutdown grava outro)"""
+        try:
+            os.remove(caminho)
+        except OSError as e:
+            print(f"⚠️  Não foi possível apagar o snapshot de sessões {caminho}: {e}")
+    
+    def _ler(self, caminho: str) -> tuple:
+        """Mapeia o arquivo em memória e decodifica o snapshot"""
+        with open(caminho, 'rb') as arquivo:
+            if os.fstat(arquivo.fileno()).st_size == 0:
+                raise SnapshotInvalidoError("arquivo vazio")
+            with mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                return desserializar(mapa)
+    
+    def _descartar_desatualizadas(self, snapshots: List[tuple]) -> List[Conversa]:
+        """
+        Mantém só as conversas que o banco confirma como atuais
+        
+        Recebe pares (criado_em, conversa). Uma conversa é descartada se não
+        existe mais em estados_conversa, se foi alterada depois do seu
+        snapshot (ultima_atividade mais nova) ou se o estado/dados divergem
+        do banco (escrita no mesmo segundo do snapshot).
+        """
+        atuais = self.chatbot_service.conversa_repo.carregar_estados(conversa.user_id for _, conversa in snapshots)
+        
+        validas = []
+        for criado_em, conversa in snapshots:
+            limite = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(int(criado_em)))
+            atual = atuais.get(conversa.user_id)
+            if atual is None:
+                continue
+            banco, ultima_atividade = atual
+            if ultima_atividade and ultima_atividade > limite:
+                continue
+            if banco.estado != conversa.estado or banco.dados != conversa.dados:
+                continue
+            validas.append(conversa)
+        return validas
@@ -6,23 +6,128 @@ Princípio DIP: Depende de abstrações (interfaces)
 """
 
 import os
+import random
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+import requests
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from twilio.base.exceptions import TwilioRestException
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
 from twilio.twiml.messaging_response import MessagingResponse
+from .metricas import TWILIO, TWILIO_ERROS, TWILIO_RETENTATIVAS, cronometrar
+
+
+# Retry-After (s) da última resposta 429 no contexto atual (thread ou task asyncio)
+RETRY_AFTER: ContextVar[Optional[float]] = ContextVar('twilio_retry_after', default=None)
+
+
+def registrar_retry_after(status: int, headers) -> None:
+    """Guarda o Retry-After de uma resposta 429 (segundos ou data HTTP)"""
+    valor = headers.get('Retry-After') if status == 429 and headers else None
+    segundos = None
+    if valor:
+        try:
+            segundos = max(0.0, float(valor))
+        except ValueError:
+            try:
+                segundos = max(0.0, (parsedate_to_datetime(valor) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                segundos = None
+    RETRY_AFTER.set(segundos)
+
+
+def redirecionar_url(url: str, base_url: Optional[str]) -> str:
+    """Troca esquema e host de uma URL da API da Twilio pelos de base_url"""
+    if not base_url:
+        return url
+    destino = urlsplit(base_url)
+    original = urlsplit(url)
+    return urlunsplit((destino.scheme, destino.netloc, destino.path.rstrip('/') + original.path,
+                       original.query, original.fragment))
+
+
+class TwilioHttpClientRedirecionado(TwilioHttpClient):
+    """
+    Cliente HTTP da Twilio que pode enviar as chamadas para outro host (ex.:
+    servidor falso local) e guarda o Retry-After das respostas 429
+    """
+    
+    def __init__(self, base_url: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+    
+    def request(self, method: str, url: str, *args, **kwargs):
+        resposta = super().request(method, redirecionar_url(url, self.base_url), *args, **kwargs)
+        registrar_retry_after(resposta.status_code, resposta.headers)
+        return resposta
 
 
 class WhatsAppService:
     """Serviço para envio e recebimento de mensagens WhatsApp via Twilio"""
     
-    def __init__(self):
+    # Retry-After maior que isso não é aguardado: a mensagem falha na hora
+    ESPERA_MAXIMA_RETRY_AFTER = 30.0
+    
+    def __init__(self, base_url: Optional[str] = None, max_tentativas: Optional[int] = None,
+                 espera_base: float = 0.5):
+        """
+        Args:
+            base_url: Host alternativo da API (padrão: TWILIO_API_BASE_URL ou a Twilio real)
+            max_tentativas: Tentativas por mensagem em 429 ou falha ao conectar
+                (padrão: TWILIO_MAX_TENTATIVAS ou 3)
+            espera_base: Espera (s) antes da 2ª tentativa; dobra a cada nova tentativa
+        """
         self.account_sid = os.getenv('TWILIO_ACCOUNT_SID')
         self.auth_token = os.getenv('TWILIO_AUTH_TOKEN')
         self.phone_number = os.getenv('TWILIO_PHONE_NUMBER')
+        self.base_url = base_url or os.getenv('TWILIO_API_BASE_URL') or None
+        self.max_tentativas = max(1, max_tentativas or int(os.getenv('TWILIO_MAX_TENTATIVAS', '3')))
+        self.espera_base = espera_base
         
         if not all([self.account_sid, self.auth_token, self.phone_number]):
             raise ValueError("Configurações do Twilio não encontradas nas variáveis de ambiente")
         
-        self.client = Client(self.account_sid, self.auth_token)
+        self._client: Optional[Client] = None
+    
+    @property
+    def client(self) -> Client:
+        """Cliente da Twilio, criado no primeiro envio (o webhook não precisa dele)"""
+        if self._client is None:
+            self._client = Client(self.account_sid, self.auth_token,
+                                  http_client=TwilioHttpClientRedirecionado(self.base_url))
+        return self._client
+    
+    def _deve_repetir(self, erro: Exception) -> bool:
+        """
+        Só repete quando a Twilio com certeza não criou a mensagem
+        
+        messages.create não é idempotente: depois de um 5xx ou de um timeout
+        de leitura a mensagem pode ter sido aceita, e repetir enviaria outra.
+        Sobram o 429 (recusada, com Retry-After) e as falhas ao conectar,
+        antes de a requisição sair.
+        """
+        if isinstance(erro, TwilioRestException):
+            retry_after = RETRY_AFTER.get()
+            return erro.status == 429 and (retry_after is None or retry_after <= self.ESPERA_MAXIMA_RETRY_AFTER)
+        if isinstance(erro, requests.ConnectTimeout):
+            return True
+        if isinstance(erro, requests.ConnectionError):
+            motivo = erro.args[0] if erro.args else None
+            motivo = getattr(motivo, 'reason', motivo)
+            return isinstance(motivo, (NewConnectionError, ConnectTimeoutError))
+        return False
+    
+    def _espera(self, tentativa: int) -> float:
+        """Retry-After do 429 quando informado; senão backoff exponencial com jitter"""
+        retry_after = RETRY_AFTER.get()
+        if retry_after is not None:
+            return retry_after
+        return min(self.espera_base * 2 ** (tentativa - 1), 8.0) * random.uniform(0.5, 1.0)
     
     def enviar_mensagem(self, para: str, mensagem: str) -> Optional[str]:
         """
@@ -39,15 +144,24 @@ class WhatsAppService:
             if not para.startswith('whatsapp:'):
                 para = f'whatsapp:{para}'
             
-            message = self.client.messages.create(
-                body=mensagem,
-                from_=f'whatsapp:{self.phone_number}',
-                to=para
-            )
-            
-            return message.sid
+            for tentativa in range(1, self.max_tentativas + 1):
+                RETRY_AFTER.set(None)
+                try:
+                    with cronometrar(TWILIO, operacao='twilio.enviar_mensagem'):
+                        message = self.client.messages.create(
+                            body=mensagem,
+                            from_=f'whatsapp:{self.phone_number}',
+                            to=para
+                        )
+                    return message.sid
+                except Exception as e:
+                    if tentativa == self.max_tentativas or not self._deve_repetir(e):
+                        raise
+                    TWILIO_RETENTATIVAS.inc(operacao='twilio.enviar_mensagem')
+                    time.sleep(self._espera(tentativa))
             
         except Exception as e:
+            TWILIO_ERROS.inc(operacao='twilio.enviar_mensagem')
             print(f"Erro ao enviar mensagem WhatsApp: {e}")
             return None
     
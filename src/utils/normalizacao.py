@@ -0,0 +1,86 @@
+# src/utils/normalizacao.py
+"""
+Funções de normalização de dados informados pelo usuário
+Princípio SRP: Apenas conversão de texto livre para formatos canônicos
+"""
+
+import re
+import unicodedata
+from datetime import date
+from typing import Optional
+
+# Períodos de atendimento suportados (forma canônica)
+PERIODOS = ('manhã', 'tarde')
+
+_PADRAO_DATA = re.compile(r'^\s*(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})\s*$')
+
+
+def normalizar_data(texto: str) -> Optional[str]:
+    """
+    Converte uma data dd/mm/aaaa (ou com '-' e '.') para ISO (aaaa-mm-dd)
+
+    Returns:
+        Data ISO ou None se o texto não for uma data válida
+    """
+    if not texto:
+        return None
+    
+    match = _PADRAO_DATA.match(texto)
+    if not match:
+        return None
+    
+    dia, mes, ano = (int(parte) for parte in match.groups())
+    try:
+        return date(ano, mes, dia).isoformat()
+    except ValueError:
+        return None
+
+
+def interpretar_data(texto: str) -> Optional[str]:
+    """Data dd/mm/aaaa (como em normalizar_data) ou já em ISO, convertida para ISO; None se inválida"""
+    iso = normalizar_data(texto)
+    if iso or not texto:
+        return iso
+    try:
+        return date.fromisoformat(texto.strip()).isoformat()
+    except ValueError:
+        return None
+
+
+def chave_data(texto: str) -> str:
+    """Chave estável para a data: ISO quando possível, senão o texto normalizado"""
+    return normalizar_data(texto) or (texto or '').strip().lower()
+
+
+def formatar_data(data_iso: str) -> str:
+    """Converte uma data ISO (aaaa-mm-dd) para o formato brasileiro dd/mm/aaaa"""
+    try:
+        return date.fromisoformat(data_iso).strftime('%d/%m/%Y')
+    except ValueError:
+        return data_iso
+
+
+def normalizar_periodo(texto: str) -> Optional[str]:
+    """Converte o período informado para a forma canônica ('manhã' ou 'tarde')"""
+    texto = (texto or '').strip().lower()
+    if texto in ('manhã', 'manha'):
+        return 'manhã'
+    if texto == 'tarde':
+        return 'tarde'
+    return None
+
+
+def normalizar_texto(texto: str) -> str:
+    """
+    Minúsculas e sem acentos ('Manhã' -> 'manha')
+
+    Mesma normalização do tokenizer da busca textual do histórico
+    (unicode61 remove_diacritics 2) e da detecção de intenções do AIService.
+    """
+    decomposto = unicodedata.normalize('NFKD', (texto or '').lower().strip())
+    return ''.join(caractere for caractere in decomposto if not unicodedata.combining(caractere))
+
+
+def chave_nome(texto: str) -> str:
+    """Chave de busca do nome: normalizar_texto com espaços colapsados ('  José  da Silva' -> 'jose da silva')"""
+    return ' '.join(normalizar_texto(texto).split())
@@ -8,6 +8,7 @@
  * - ConfigurationManager: Gerencia configurações (SRP)
  * - StatisticsManager: Gerencia estatísticas (SRP)
  * - AppointmentManager: Gerencia consultas agendadas (SRP)
+ * - LiveUpdatesManager: Recebe eventos do servidor via SSE (SRP)
  */
 
 // ===== API Service - Módulo para comunicação com backend =====
@@ -49,8 +50,14 @@ class ApiService {
         return this.request('/config');
     }
 
-    async getConversationHistory(userId) {
-        return this.request(`/historico/${userId}`);
+    async getConversationHistory(userId, params = {}) {
+        const query = new URLSearchParams(params).toString();
+        return this.request(`/historico/${userId}${query ? `?${query}` : ''}`);
+    }
+
+    async getActiveConversations(params = {}) {
+        const query = new URLSearchParams(params).toString();
+        return this.request(`/conversas/ativas${query ? `?${query}` : ''}`);
     }
 
     async getConversationStatus(userId) {
@@ -67,6 +74,11 @@ class ApiService {
         return this.request('/consultas');
     }
 
+    async searchAppointments(name, limit = 50) {
+        const params = new URLSearchParams({ nome: name, limite: limit });
+        return this.request(`/consultas?${params}`);
+    }
+
     async getUserAppointments(userId) {
         return this.request(`/consultas/${userId}`);
     }
@@ -204,7 +216,28 @@ class ConversationManager {
             restartBtn: document.getElementById('restart-conversa')
         };
         this.currentUserId = null;
+        // Histórico já carregado por usuário: as próximas visitas pedem só o que é novo
+        this.historyCache = new Map();
         this.initEventListeners();
+        this.loadActiveConversations();
+    }
+
+    async loadActiveConversations() {
+        // Estado inicial do painel ao vivo; depois ele é mantido pelos eventos SSE
+        try {
+            const { conversas } = await this.apiService.getActiveConversations({ limite: 20 });
+            conversas.forEach(conversa => {
+                if (!this.activeConversations.has(conversa.user_id)) {
+                    this.activeConversations.set(conversa.user_id, {
+                        estado: conversa.estado,
+                        atualizado: new Date(conversa.ultima_atividade.replace(' ', 'T') + 'Z')
+                    });
+                }
+            });
+            this.updateLiveConversations(this.activeConversations);
+        } catch (error) {
+            console.error('Erro ao carregar conversas ativas:', error);
+        }
     }
 
     initEventListeners() {
@@ -233,7 +266,7 @@ class ConversationManager {
         try {
             this.elements.conversationHistory.innerHTML = '<div class="loading">Carregando...</div>';
             
-            const history = await this.apiService.getConversationHistory(userId);
+            const history = await this.loadHistory(userId);
             this.displayConversationHistory(history, userId);
         } catch (error) {
             console.error('Erro ao buscar histórico:', error);
@@ -247,6 +280,20 @@ class ConversationManager {
         }
     }
 
+    async loadHistory(userId) {
+        const cached = this.historyCache.get(userId);
+        if (!cached || cached.length === 0) {
+            const history = await this.apiService.getConversationHistory(userId, { limite: 200 });
+            this.historyCache.set(userId, history);
+            return history;
+        }
+
+        const novas = await this.apiService.getConversationHistory(userId, { desde: cached[cached.length - 1].id });
+        const history = cached.concat(novas);
+        this.historyCache.set(userId, history);
+        return history;
+    }
+
     displayConversationHistory(history, userId) {
         if (!history || history.length === 0) {
             this.elements.conversationHistory.innerHTML = `
@@ -277,7 +324,7 @@ class ConversationManager {
         
         try {
             const [history, status] = await Promise.all([
-                this.apiService.getConversationHistory(userId),
+                this.loadHistory(userId),
                 this.apiService.getConversationStatus(userId)
             ]);
 
@@ -324,14 +371,39 @@ class ConversationManager {
         }
     }
 
+    registerTransition(transition) {
+        // Evento 'transicao_estado' recebido via SSE
+        this.activeConversations.set(transition.user_id, {
+            estado: transition.para,
+            atualizado: new Date()
+        });
+        this.updateLiveConversations(this.activeConversations);
+    }
+
     updateLiveConversations(conversations) {
-        // Placeholder para conversas ao vivo (implementar WebSocket futuramente)
-        this.elements.liveConversations.innerHTML = `
-            <div class="empty-state">
-                <i class="bi bi-chat-dots pulse"></i>
-                <p>Monitoramento em tempo real será implementado com WebSocket</p>
+        if (!conversations || conversations.size === 0) {
+            this.elements.liveConversations.innerHTML = `
+                <div class="empty-state">
+                    <i class="bi bi-chat-dots pulse"></i>
+                    <p>Aguardando conversas em tempo real...</p>
+                </div>
+            `;
+            return;
+        }
+
+        const recentes = [...conversations.entries()]
+            .sort((a, b) => b[1].atualizado - a[1].atualizado)
+            .slice(0, 20);
+
+        this.elements.liveConversations.innerHTML = recentes.map(([userId, conversa]) => `
+            <div class="conversation-item fade-in" onclick="conversationManager.showConversationDetails('${userId}')">
+                <div class="d-flex justify-content-between">
+                    <strong>👤 ${userId}</strong>
+                    <span class="conversation-meta">${conversa.atualizado.toLocaleTimeString('pt-BR')}</span>
+                </div>
+                <span class="badge bg-primary">${conversa.estado}</span>
             </div>
-        `;
+        `).join('');
     }
 }
 
@@ -405,9 +477,11 @@ class AppointmentManager {
         this.elements = {
             scheduledAppointments: document.getElementById('scheduled-appointments'),
             filterPeriod: document.getElementById('filter-period'),
+            searchPatient: document.getElementById('search-patient'),
             refreshBtn: document.getElementById('refresh-consultas')
         };
         this.appointments = [];
+        this.searchTimer = null;
         this.initEventListeners();
     }
 
@@ -419,13 +493,22 @@ class AppointmentManager {
         this.elements.refreshBtn.addEventListener('click', () => {
             this.loadAppointments();
         });
+
+        // Busca por nome no servidor (prefixo, sem acentos), com debounce
+        this.elements.searchPatient.addEventListener('input', () => {
+            clearTimeout(this.searchTimer);
+            this.searchTimer = setTimeout(() => this.loadAppointments(), 300);
+        });
     }
 
     async loadAppointments() {
         try {
             this.elements.scheduledAppointments.innerHTML = '<div class="loading">Carregando consultas...</div>';
             
-            this.appointments = await this.apiService.getAllAppointments();
+            const name = this.elements.searchPatient.value.trim();
+            this.appointments = name
+                ? (await this.apiService.searchAppointments(name)).consultas
+                : await this.apiService.getAllAppointments();
             this.filterAppointments();
         } catch (error) {
             console.error('Erro ao carregar consultas:', error);
@@ -439,6 +522,17 @@ class AppointmentManager {
         }
     }
 
+    addAppointment(appointment) {
+        // Evento 'consulta_criada' recebido via SSE (durante uma busca por nome
+        // a lista é a resposta do servidor; a nova consulta entra no próximo carregamento)
+        if (this.elements.searchPatient.value.trim()) {
+            return;
+        }
+        appointment.data_criacao = appointment.data_criacao || new Date().toISOString();
+        this.appointments.unshift(appointment);
+        this.filterAppointments();
+    }
+
     filterAppointments() {
         const filter = this.elements.filterPeriod.value;
         const now = new Date();
@@ -517,6 +611,45 @@ class AppointmentManager {
     }
 }
 
+// ===== Live Updates Manager - Eventos do servidor (SSE) =====
+class LiveUpdatesManager {
+    constructor(statisticsManager, appointmentManager, conversationManager) {
+        this.statisticsManager = statisticsManager;
+        this.appointmentManager = appointmentManager;
+        this.conversationManager = conversationManager;
+        this.source = null;
+    }
+
+    start() {
+        // Navegadores sem EventSource continuam com o polling
+        if (!window.EventSource) {
+            this.statisticsManager.loadStatistics();
+            this.statisticsManager.startAutoRefresh();
+            return;
+        }
+
+        // O servidor envia as estatísticas atuais ao conectar e depois só as mudanças;
+        // em caso de queda, o EventSource reconecta sozinho
+        this.source = new EventSource('/eventos');
+
+        this.source.addEventListener('estatisticas', (event) => {
+            this.statisticsManager.updateStatistics(JSON.parse(event.data));
+        });
+
+        this.source.addEventListener('consulta_criada', (event) => {
+            this.appointmentManager.addAppointment(JSON.parse(event.data));
+        });
+
+        this.source.addEventListener('transicao_estado', (event) => {
+            this.conversationManager.registerTransition(JSON.parse(event.data));
+        });
+
+        this.source.onerror = () => {
+            console.warn('Conexão de eventos interrompida, reconectando...');
+        };
+    }
+}
+
 // ===== Dashboard Manager - Classe principal =====
 class DashboardManager {
     constructor() {
@@ -525,6 +658,11 @@ class DashboardManager {
         this.conversationManager = new ConversationManager(this.apiService);
         this.configurationManager = new ConfigurationManager(this.apiService);
         this.appointmentManager = new AppointmentManager(this.apiService);
+        this.liveUpdatesManager = new LiveUpdatesManager(
+            this.statisticsManager,
+            this.appointmentManager,
+            this.conversationManager
+        );
         
         this.init();
     }
@@ -535,13 +673,10 @@ class DashboardManager {
             await this.apiService.getHealthCheck();
             
             // Carrega dados iniciais
-            await Promise.all([
-                this.statisticsManager.loadStatistics(),
-                this.appointmentManager.loadAppointments()
-            ]);
+            await this.appointmentManager.loadAppointments();
 
-            // Inicia atualizações automáticas
-            this.statisticsManager.startAutoRefresh();
+            // Estatísticas e novidades chegam por push (SSE)
+            this.liveUpdatesManager.start();
 
             Utils.showToast('Dashboard carregado com sucesso!', 'success');
         } catch (error) {
@@ -0,0 +1,209 @@
+# tests/test_agenda.py
+"""
+Testes da agenda: capacidade por horário e reservas
+Usam um banco SQLite temporário, sem servidor
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from src.database.database_manager import DatabaseManager
+from src.database.consulta_repository import ConsultaRepository
+from src.database.conversa_repository import ConversaRepository
+from src.database.vaga_repository import VagaRepository
+from src.database.exceptions import ConsultaDuplicadaError, VagaIndisponivelError
+from src.models.consulta import Consulta
+from src.models.conversa import EstadoConversa
+from src.services.chatbot_service import ChatbotService
+
+
+class AgendaTestCase(unittest.TestCase):
+    """Base com banco temporário isolado por teste"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.db_manager = DatabaseManager(self.db_path)
+        self.vaga_repo = VagaRepository(self.db_manager, capacidade_padrao=2)
+        self.consulta_repo = ConsultaRepository(self.db_manager, self.vaga_repo)
+        self.conversa_repo = ConversaRepository(self.db_manager)
+    
+    def tearDown(self):
+        os.remove(self.db_path)
+
+
+class TestVagaRepository(AgendaTestCase):
+    """Testes para o controle de vagas"""
+    
+    def test_horario_sem_linha_usa_capacidade_padrao(self):
+        """Horário nunca reservado está livre com a capacidade padrão"""
+        vaga = self.vaga_repo.obter_vaga('15/07/2025', 'manhã')
+        
+        self.assertEqual(vaga['capacidade'], 2)
+        self.assertEqual(vaga['disponiveis'], 2)
+        self.assertTrue(self.vaga_repo.esta_disponivel('15-07-2025', 'manha'))
+    
+    def test_reserva_respeita_capacidade(self):
+        """Reservas além da capacidade são recusadas sem gravar a consulta"""
+        for nome in ('Ana', 'Bia'):
+            self.consulta_repo.salvar(Consulta(nome, '15/07/2025', 'manhã', nome))
+        
+        with self.assertRaises(VagaIndisponivelError):
+            self.consulta_repo.salvar(Consulta('Caio', '15/07/2025', 'manhã', 'Caio'))
+        
+        self.assertEqual(len(self.consulta_repo.buscar_todas()), 2)
+        self.assertFalse(self.vaga_repo.esta_disponivel('15/07/2025', 'manhã'))
+    
+    def test_reservas_concorrentes(self):
+        """Requisições simultâneas nunca ultrapassam a capacidade"""
+        self.vaga_repo.definir_capacidade('20/07/2025', 'tarde', 5)
+        falhas = []
+        
+        def reservar(indice):
+            try:
+                self.consulta_repo.salvar(Consulta(f'P{indice}', '20/07/2025', 'tarde', f'u{indice}'))
+            except VagaIndisponivelError:
+                falhas.append(indice)
+        
+        threads = [threading.Thread(target=reservar, args=(i,)) for i in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len(falhas), 7)
+        self.assertEqual(self.vaga_repo.obter_vaga('20/07/2025', 'tarde')['reservadas'], 5)
+    
+    def test_proximas_vagas_pula_horarios_lotados(self):
+        """Lista os próximos horários livres em ordem cronológica"""
+        self.vaga_repo.definir_capacidade('15/07/2025', 'manhã', 0)
+        self.vaga_repo.definir_capacidade('15/07/2025', 'tarde', 0)
+        
+        livres = self.vaga_repo.proximas_vagas('15/07/2025', limite=3)
+        
+        self.assertEqual(
+            [(v['data'], v['periodo']) for v in livres],
+            [('16/07/2025', 'manhã'), ('16/07/2025', 'tarde'), ('17/07/2025', 'manhã')]
+        )
+    
+    def test_consultas_anteriores_ao_controle_contam_como_reservas(self):
+        """Consultas gravadas antes do controle de vagas ocupam o horário após a migração"""
+        sem_controle = ConsultaRepository(self.db_manager)
+        for nome in ('Ana', 'Bia'):
+            sem_controle.salvar(Consulta(nome, '15/07/2025', 'manhã', nome))
+        
+        # Banco da versão anterior: vagas com capacidade NOT NULL e sem as reservas acima
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('DROP TABLE vagas')
+        conn.execute('''
+            CREATE TABLE vagas (
+                data TEXT NOT NULL, periodo TEXT NOT NULL, capacidade INTEGER NOT NULL,
+                reservadas INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (data, periodo)
+            )
+        ''')
+        conn.execute("INSERT INTO vagas VALUES ('2025-07-16', 'manhã', 5, 1)")
+        conn.execute('PRAGMA user_version = 11')
+        conn.commit()
+        conn.close()
+        DatabaseManager(self.db_path)
+        
+        self.assertEqual(self.vaga_repo.obter_vaga('16/07/2025', 'manhã')['capacidade'], 5)
+        self.assertEqual(self.vaga_repo.obter_vaga('16/07/2025', 'manhã')['reservadas'], 1)
+        self.assertEqual(self.vaga_repo.obter_vaga('15/07/2025', 'manhã')['reservadas'], 2)
+        livres = self.vaga_repo.proximas_vagas('15/07/2025', limite=1)
+        self.assertEqual([(v['data'], v['periodo']) for v in livres], [('15/07/2025', 'tarde')])
+        with self.assertRaises(VagaIndisponivelError):
+            self.consulta_repo.salvar(Consulta('Caio', '15/07/2025', 'manhã', 'Caio'))
+        
+        self.assertEqual(len(self.consulta_repo.buscar_todas()), 2)
+        self.assertEqual(self.vaga_repo.definir_capacidade('15/07/2025', 'manhã', 3)['reservadas'], 2)
+        self.consulta_repo.salvar(Consulta('Caio', '15/07/2025', 'manhã', 'Caio'))
+        self.assertFalse(self.vaga_repo.esta_disponivel('15/07/2025', 'manhã'))
+
+
+class TestConsultaDuplicada(AgendaTestCase):
+    """Testes da regra de unicidade (usuário, data, período)"""
+    
+    def test_mesmo_horario_recusado_sem_consumir_vaga(self):
+        """Repetir o agendamento levanta erro e não reserva outra vaga"""
+        consulta_id = self.consulta_repo.salvar(Consulta('Ana', '15/07/2025', 'manhã', 'u1'))
+        
+        with self.assertRaises(ConsultaDuplicadaError) as contexto:
+            self.consulta_repo.salvar(Consulta('Ana', '15-07-2025', 'manha', 'u1'))
+        
+        self.assertEqual(contexto.exception.consulta_id, consulta_id)
+        self.assertEqual(self.vaga_repo.obter_vaga('15/07/2025', 'manhã')['reservadas'], 1)
+    
+    def test_backfill_relata_duplicadas_existentes(self):
+        """Bancos antigos recebem a chave e as repetições vão para o relatório"""
+        fd, legado = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        conn = sqlite3.connect(legado)
+        conn.execute('''
+            CREATE TABLE consultas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT NOT NULL, data TEXT NOT NULL,
+                periodo TEXT NOT NULL, data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP, user_id TEXT
+            )
+        ''')
+        conn.executemany(
+            'INSERT INTO consultas (nome, data, periodo, user_id) VALUES (?, ?, ?, ?)',
+            [('Ana', '15/07/2025', 'manhã', 'u1'), ('Ana', '15/07/2025', 'manha', 'u1'), ('Bia', '15/07/2025', 'manhã', 'u2')]
+        )
+        conn.commit()
+        conn.close()
+        
+        try:
+            relatorio = ConsultaRepository(DatabaseManager(legado)).relatorio_duplicadas()
+        finally:
+            os.remove(legado)
+        
+        self.assertEqual(len(relatorio), 1)
+        self.assertEqual(relatorio[0]['id'], 2)
+        self.assertEqual(relatorio[0]['duplicada_de'], 1)
+
+
+class TestChatbotAgenda(AgendaTestCase):
+    """Testes do fluxo do chatbot com horários lotados"""
+    
+    def test_horario_lotado_oferece_alternativas(self):
+        """Chatbot volta a pedir a data e sugere horários livres"""
+        self.vaga_repo.definir_capacidade('15/07/2025', 'manhã', 0)
+        chatbot = ChatbotService(self.consulta_repo, self.conversa_repo, vaga_repo=self.vaga_repo)
+        
+        for mensagem in ('iniciar', 'João', '15/07/2025'):
+            chatbot.processar_mensagem('u1', mensagem)
+        resposta = chatbot.processar_mensagem('u1', 'manhã')
+        
+        self.assertIn('Não há mais vagas', resposta)
+        self.assertIn('15/07/2025 - tarde', resposta)
+        self.assertEqual(chatbot.obter_status_conversa('u1')['estado'], EstadoConversa.AGUARDANDO_DATA.value)
+        self.assertEqual(self.consulta_repo.buscar_todas(), [])
+    
+    def test_agendamento_repetido_informa_consulta_existente(self):
+        """Refazer o fluxo 'nova' para o mesmo horário não duplica a consulta"""
+        chatbot = ChatbotService(self.consulta_repo, self.conversa_repo, vaga_repo=self.vaga_repo)
+        
+        for mensagem in ('iniciar', 'João', '15/07/2025', 'tarde', 'nova', 'João', '15/07/2025'):
+            chatbot.processar_mensagem('u1', mensagem)
+        resposta = chatbot.processar_mensagem('u1', 'tarde')
+        
+        self.assertIn('já tem uma consulta marcada', resposta)
+        self.assertEqual(len(self.consulta_repo.buscar_por_usuario('u1')), 1)
+        self.assertEqual(chatbot.obter_status_conversa('u1')['estado'], EstadoConversa.AGUARDANDO_DATA.value)
+    
+    def test_apos_duplicada_outra_data_conclui_o_agendamento(self):
+        """Depois do aviso de duplicada o usuário informa outra data e o fluxo segue"""
+        chatbot = ChatbotService(self.consulta_repo, self.conversa_repo, vaga_repo=self.vaga_repo)
+        
+        for mensagem in ('iniciar', 'João', '15/07/2025', 'tarde', 'nova', 'João', '15/07/2025', 'tarde', '16/07/2025'):
+            chatbot.processar_mensagem('u1', mensagem)
+        resposta = chatbot.processar_mensagem('u1', 'tarde')
+        
+        self.assertIn('Consulta marcada com sucesso', resposta)
+        self.assertEqual(len(self.consulta_repo.buscar_por_usuario('u1')), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
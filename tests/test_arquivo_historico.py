@@ -0,0 +1,160 @@
+# tests/test_arquivo_historico.py
+"""
+Testes do arquivamento do histórico em segmentos comprimidos
+Usam um banco SQLite e uma pasta de segmentos temporários, sem servidor
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.database.arquivo_historico import ArquivoHistorico, SegmentoInvalidoError
+from src.database.database_manager import DatabaseManager
+from src.database.conversa_repository import ConversaRepository
+from src.models.conversa import EstadoConversa
+
+
+class TestArquivoHistorico(unittest.TestCase):
+    """Movimentação para o arquivo frio e leitura combinada"""
+    
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.db_manager = DatabaseManager(os.path.join(self.diretorio, 'chatbot.db'))
+        self.arquivo = ArquivoHistorico(os.path.join(self.diretorio, 'arquivo'))
+        self.repo = ConversaRepository(self.db_manager, self.arquivo)
+    
+    def tearDown(self):
+        shutil.rmtree(self.diretorio)
+    
+    def _conversar(self, user_id: str, *mensagens: str):
+        for mensagem in mensagens:
+            self.repo.salvar_historico(user_id, mensagem, f'resposta a {mensagem}', EstadoConversa.INICIAL)
+    
+    def _envelhecer(self, user_id: str, dias: int):
+        conn = self.db_manager.get_connection()
+        conn.execute("UPDATE historico_conversas SET timestamp = datetime('now', ?) WHERE user_id = ?",
+                     (f'-{dias} days', user_id))
+        conn.commit()
+        conn.close()
+    
+    def _linhas_na_tabela(self) -> int:
+        conn = self.db_manager.get_connection()
+        total = conn.execute('SELECT COUNT(*) FROM historico_conversas').fetchone()[0]
+        conn.close()
+        return total
+    
+    def _mensagens(self, historico: list) -> list:
+        return [item['mensagem'] for item in historico if item['remetente'] == 'user']
+    
+    def test_leitura_combina_arquivo_e_tabela(self):
+        self._conversar('u1', 'oi', 'Ana')
+        self._envelhecer('u1', 100)
+        self._conversar('u1', '15/07/2030')
+        self._conversar('u2', 'oi')
+        self._envelhecer('u2', 100)
+        antes = self.repo.buscar_historico('u1')
+        
+        movidas = self.repo.arquivar_historico(dias=90, lote=1)
+        
+        self.assertEqual(movidas, 3)
+        self.assertEqual(self._linhas_na_tabela(), 1)
+        self.assertEqual(self.repo.buscar_historico('u1'), antes)
+        self.assertEqual([item['mensagem'] for item in self.repo.buscar_historico('u2')], ['oi', 'resposta a oi'])
+        self.assertEqual(len(self.arquivo.periodos()), 1)
+    
+    def test_arquivamento_interrompido_nao_duplica(self):
+        self._conversar('u1', 'oi', 'Ana')
+        self._envelhecer('u1', 100)
+        conn = self.db_manager.get_connection()
+        linhas = conn.execute('SELECT h.id, h.user_id, h.mensagem_usuario, r.texto, h.estado, h.timestamp '
+                              'FROM historico_conversas h JOIN respostas_bot r ON r.id = h.resposta_id').fetchall()
+        conn.close()
+        # Simula queda depois de gravar o segmento e antes do DELETE
+        self.arquivo.anexar((row[1], (row[0],) + tuple(row[2:])) for row in linhas)
+        
+        self.assertEqual(len(self.repo.buscar_historico('u1')), 4)
+        self.repo.arquivar_historico(dias=90)
+        self.assertEqual(len(self.arquivo.buscar('u1')), 2)
+        self.assertEqual(len(self.repo.buscar_historico('u1')), 4)
+    
+    def test_lotes_gravam_partes_e_o_segmento_uma_vez_por_rodada(self):
+        self._conversar('u1', 'm1', 'm2')
+        self._conversar('u2', 'm3')
+        self._envelhecer('u1', 100)
+        self._envelhecer('u2', 100)
+        gravar = self.arquivo._gravar
+        
+        with patch.object(self.arquivo, '_gravar', side_effect=gravar) as gravados:
+            self.repo.arquivar_historico(dias=90, lote=1)
+        
+        caminhos = [os.path.basename(chamada.args[0]) for chamada in gravados.call_args_list]
+        periodo = self.arquivo.periodos()[0]
+        self.assertEqual(caminhos, [f'historico-{periodo}.{numero:04d}.seg' for numero in (1, 2, 3)]
+                         + [f'historico-{periodo}.seg'])
+        self.assertEqual([nome for nome in os.listdir(self.arquivo.diretorio) if nome.endswith('.seg')],
+                         [f'historico-{periodo}.seg'])
+        self.assertEqual(self._mensagens(self.repo.buscar_historico('u1')), ['m1', 'm2'])
+    
+    def test_paginacao_atravessa_arquivo_e_tabela(self):
+        self._conversar('u1', 'm1', 'm2', 'm3')
+        self._envelhecer('u1', 100)
+        self._conversar('u1', 'm4')
+        self.repo.arquivar_historico(dias=90)
+        
+        pagina = self.repo.buscar_historico('u1', limite=2)
+        anterior = self.repo.buscar_historico('u1', antes_id=pagina[0]['id'], limite=2)
+        novas = self.repo.buscar_historico('u1', desde_id=anterior[-1]['id'])
+        
+        self.assertEqual(self._mensagens(pagina), ['m3', 'm4'])
+        self.assertEqual(self._mensagens(anterior), ['m1', 'm2'])
+        self.assertEqual(self._mensagens(novas), ['m3', 'm4'])
+    
+    def test_cursor_respondido_pela_tabela_nao_le_o_arquivo(self):
+        self._conversar('u1', 'm1', 'm2')
+        self._envelhecer('u1', 100)
+        self._conversar('u1', 'm3', 'm4')
+        self.repo.arquivar_historico(dias=90)
+        recente = self.repo.buscar_historico('u1', limite=2)
+        
+        with patch.object(self.arquivo, 'buscar', side_effect=AssertionError('arquivo lido')):
+            novas = self.repo.buscar_historico('u1', desde_id=recente[0]['id'])
+            pagina = self.repo.buscar_historico('u1', limite=2)
+        
+        self.assertEqual(self._mensagens(novas), ['m4'])
+        self.assertEqual(pagina, recente)
+    
+    def test_cursor_so_descomprime_blocos_da_faixa(self):
+        self._conversar('u1', 'm1', 'm2')
+        self._envelhecer('u1', 100)
+        conn = self.db_manager.get_connection()
+        conn.execute("UPDATE historico_conversas SET timestamp = datetime('now', '-200 days') WHERE id = "
+                     "(SELECT MIN(id) FROM historico_conversas)")
+        conn.commit()
+        conn.close()
+        self.repo.arquivar_historico(dias=90)
+        primeira = self.repo.buscar_historico('u1')[0]['id']
+        ler_bloco = self.arquivo._ler_bloco
+        
+        with patch.object(self.arquivo, '_ler_bloco', side_effect=ler_bloco) as lidos:
+            novas = self.repo.buscar_historico('u1', desde_id=primeira)
+        
+        self.assertEqual(len(self.arquivo.periodos()), 2)
+        self.assertEqual(self._mensagens(novas), ['m2'])
+        self.assertEqual(lidos.call_count, 1)
+    
+    def test_segmento_corrompido_e_detectado(self):
+        self._conversar('u1', 'oi')
+        self._envelhecer('u1', 100)
+        self.repo.arquivar_historico(dias=90)
+        caminho = os.path.join(self.arquivo.diretorio, f'historico-{self.arquivo.periodos()[0]}.seg')
+        with open(caminho, 'r+b') as arquivo:
+            arquivo.seek(6)
+            arquivo.write(b'\x00\x00')
+        
+        with self.assertRaises(SegmentoInvalidoError):
+            ArquivoHistorico(self.arquivo.diretorio).buscar('u1')
+
+
+if __name__ == '__main__':
+    unittest.main()
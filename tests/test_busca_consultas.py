@@ -0,0 +1,97 @@
+# tests/test_busca_consultas.py
+"""
+Testes da busca de consultas por nome do paciente (/consultas?nome=)
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from app import create_app
+from src.database.consulta_repository import ConsultaRepository
+from src.database.database_manager import DatabaseManager
+from src.models.consulta import Consulta
+
+
+class TestBuscaConsultasPorNome(unittest.TestCase):
+    """Prefixo do nome, sem diferenciar acentos e maiúsculas, paginado por cursor"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ['DATABASE_PATH'] = self.db_path
+        self.repo = ConsultaRepository(DatabaseManager(self.db_path))
+        for user_id, nome in (('u1', 'José Silva'), ('u2', 'joana Souza'), ('u3', 'Ana Maria'),
+                              ('u4', 'JOSÉ  Pereira'), ('u5', 'Josué')):
+            self.repo.salvar(Consulta(nome, '15/07/2030', 'tarde', user_id))
+        self.cliente = create_app().test_client()
+    
+    def tearDown(self):
+        del os.environ['DATABASE_PATH']
+        os.remove(self.db_path)
+    
+    def _nomes(self, url: str) -> list:
+        return [consulta['nome'] for consulta in self.cliente.get(url).get_json()['consultas']]
+    
+    def test_prefixo_sem_acentos_e_maiusculas(self):
+        self.assertEqual(self._nomes('/consultas?nome=jose'), ['JOSÉ  Pereira', 'José Silva'])
+        self.assertEqual(self._nomes('/consultas?nome=JO'), ['joana Souza', 'JOSÉ  Pereira', 'José Silva', 'Josué'])
+        self.assertEqual(self._nomes('/consultas?nome=José%20%20s'), ['José Silva'])
+        self.assertEqual(self._nomes('/consultas?nome=maria'), [])
+    
+    def test_paginacao_por_cursor(self):
+        primeira = self.cliente.get('/consultas?nome=jo&limite=3').get_json()
+        segunda = self.cliente.get(f"/consultas?nome=jo&limite=3&apos={primeira['proximo']}").get_json()
+        
+        self.assertEqual(len(primeira['consultas']), 3)
+        self.assertEqual([consulta['nome'] for consulta in segunda['consultas']], ['Josué'])
+        self.assertIsNone(segunda['proximo'])
+    
+    def test_sem_nome_continua_listando_tudo(self):
+        self.assertEqual(len(self.cliente.get('/consultas').get_json()), 5)
+    
+    def test_nome_vazio_ou_limite_invalido(self):
+        self.assertEqual(self.cliente.get('/consultas?nome=').status_code, 400)
+        self.assertEqual(self.cliente.get('/consultas?nome=jo&limite=0').status_code, 400)
+    
+    def test_busca_usa_o_indice(self):
+        conn = sqlite3.connect(self.db_path)
+        plano = ' '.join(linha[3] for linha in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM consultas WHERE nome_normalizado >= 'jo' AND nome_normalizado < 'jp' "
+            "ORDER BY nome_normalizado, id LIMIT 20"
+        ))
+        conn.close()
+        
+        self.assertIn('idx_consultas_nome_normalizado', plano)
+        self.assertNotIn('TEMP B-TREE', plano)
+
+
+class TestMigracaoNomeNormalizado(unittest.TestCase):
+    """Bancos antigos recebem nome_normalizado preenchido no boot"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+    
+    def tearDown(self):
+        os.remove(self.db_path)
+    
+    def test_backfill_das_consultas_existentes(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE consultas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT NOT NULL, data TEXT NOT NULL,
+                periodo TEXT NOT NULL, data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP, user_id TEXT
+            )
+        ''')
+        conn.execute("INSERT INTO consultas (nome, data, periodo, user_id) VALUES ('Órion Araújo', '15/07/2030', 'tarde', 'u1')")
+        conn.commit()
+        conn.close()
+        
+        repo = ConsultaRepository(DatabaseManager(self.db_path))
+        
+        self.assertEqual([consulta.nome for consulta in repo.buscar_por_nome('orion ara')], ['Órion Araújo'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+# tests/test_cache_http.py
+"""
+Testes do cache HTTP (ETag / If-None-Match / gzip) dos endpoints de leitura
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from app import create_app
+
+
+class TestCacheHttp(unittest.TestCase):
+    """Requisições condicionais nos endpoints de leitura"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ['DATABASE_PATH'] = self.db_path
+        self.app = create_app()
+        self.cliente = self.app.test_client()
+    
+    def tearDown(self):
+        del os.environ['DATABASE_PATH']
+        os.remove(self.db_path)
+    
+    def _marcar_consulta(self, user_id: str):
+        for mensagem in ('iniciar', 'Ana', '15/07/2025', 'tarde'):
+            self.cliente.post('/mensagem', json={'user_id': user_id, 'mensagem': mensagem})
+    
+    def test_etag_igual_retorna_304(self):
+        """Segundo GET com If-None-Match não retransmite o corpo"""
+        primeira = self.cliente.get('/consultas')
+        etag = primeira.headers['ETag']
+        
+        segunda = self.cliente.get('/consultas', headers={'If-None-Match': etag})
+        
+        self.assertEqual(primeira.status_code, 200)
+        self.assertEqual(segunda.status_code, 304)
+        self.assertEqual(segunda.data, b'')
+    
+    def test_escrita_invalida_etag(self):
+        """Uma nova consulta muda o ETag e o corpo de /consultas e /estatisticas"""
+        etag_consultas = self.cliente.get('/consultas').headers['ETag']
+        etag_stats = self.cliente.get('/estatisticas').headers['ETag']
+        
+        self._marcar_consulta('u1')
+        
+        consultas = self.cliente.get('/consultas', headers={'If-None-Match': etag_consultas})
+        stats = self.cliente.get('/estatisticas', headers={'If-None-Match': etag_stats})
+        
+        self.assertEqual(consultas.status_code, 200)
+        self.assertEqual(len(consultas.get_json()), 1)
+        self.assertEqual(stats.get_json()['total_consultas'], 1)
+    
+    def test_historico_e_consultas_versionados_separadamente(self):
+        """Mensagem sem nova consulta não invalida /consultas/<user_id>"""
+        etag = self.cliente.get('/consultas/u1').headers['ETag']
+        etag_historico = self.cliente.get('/historico/u1').headers['ETag']
+        
+        self.cliente.post('/mensagem', json={'user_id': 'u1', 'mensagem': 'iniciar'})
+        
+        self.assertEqual(self.cliente.get('/consultas/u1', headers={'If-None-Match': etag}).status_code, 304)
+        self.assertEqual(self.cliente.get('/historico/u1', headers={'If-None-Match': etag_historico}).status_code, 200)
+    
+    def test_resposta_gzip(self):
+        """Clientes que aceitam gzip recebem o corpo comprimido"""
+        self._marcar_consulta('u1')
+        
+        resposta = self.cliente.get('/consultas', headers={'Accept-Encoding': 'gzip'})
+        
+        self.assertEqual(resposta.headers['Content-Encoding'], 'gzip')
+        self.assertTrue(resposta.headers['ETag'].endswith('-gzip"'))
+        self.assertEqual(json.loads(gzip.decompress(resposta.data))[0]['nome'], 'Ana')
+        
+        revalidacao = self.cliente.get('/consultas', headers={
+            'Accept-Encoding': 'gzip', 'If-None-Match': resposta.headers['ETag']
+        })
+        self.assertEqual(revalidacao.status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
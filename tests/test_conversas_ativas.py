@@ -0,0 +1,84 @@
+# tests/test_conversas_ativas.py
+"""
+Testes do endpoint /conversas/ativas
+"""
+
+import os
+import tempfile
+import unittest
+from app import create_app
+from src.database.database_manager import DatabaseManager
+
+
+class ConversasTestCase(unittest.TestCase):
+    """Base com aplicação e banco temporário isolados por teste"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ['DATABASE_PATH'] = self.db_path
+        self.cliente = create_app().test_client()
+        self.db_manager = DatabaseManager(self.db_path)
+    
+    def tearDown(self):
+        del os.environ['DATABASE_PATH']
+        os.remove(self.db_path)
+    
+    def _conversar(self, user_id: str, *mensagens: str):
+        for mensagem in mensagens:
+            self.cliente.post('/mensagem', json={'user_id': user_id, 'mensagem': mensagem})
+    
+    def _definir_atividade(self, modificador: str, *user_ids: str):
+        conn = self.db_manager.get_connection()
+        conn.executemany("UPDATE estados_conversa SET ultima_atividade = datetime('now', ?) WHERE user_id = ?",
+                         [(modificador, user_id) for user_id in user_ids])
+        conn.commit()
+        conn.close()
+
+
+class TestConversasAtivas(ConversasTestCase):
+    """Listagem por recência, paginada por cursor"""
+    
+    def test_lista_por_recencia_com_ultima_interacao(self):
+        self._conversar('antiga', 'oi')
+        self._conversar('recente', 'iniciar', 'Ana')
+        self._conversar('abandonada', 'oi')
+        self._definir_atividade('-2 hours', 'antiga')
+        self._definir_atividade('-3 days', 'abandonada')
+        
+        conversas = self.cliente.get('/conversas/ativas').get_json()['conversas']
+        
+        self.assertEqual([conversa['user_id'] for conversa in conversas], ['recente', 'antiga'])
+        self.assertEqual(conversas[0]['estado'], 'aguardando_data')
+        self.assertEqual(conversas[0]['ultima_interacao']['mensagem_usuario'], 'Ana')
+        self.assertIn('Ana', conversas[0]['ultima_interacao']['resposta_bot'])
+    
+    def test_paginacao_desempata_pelo_user_id(self):
+        for user_id in ('u1', 'u2', 'u3'):
+            self._conversar(user_id, 'oi')
+        self._definir_atividade('-1 hours', 'u1', 'u2', 'u3')
+        
+        primeira = self.cliente.get('/conversas/ativas?limite=2').get_json()
+        segunda = self.cliente.get('/conversas/ativas', query_string={'limite': 2, 'apos': primeira['proximo']}).get_json()
+        
+        self.assertEqual([conversa['user_id'] for conversa in primeira['conversas']], ['u3', 'u2'])
+        self.assertEqual([conversa['user_id'] for conversa in segunda['conversas']], ['u1'])
+        self.assertIsNone(segunda['proximo'])
+    
+    def test_cursor_invalido(self):
+        self.assertEqual(self.cliente.get('/conversas/ativas?apos=ontem').status_code, 400)
+    
+    def test_consulta_usa_indice_de_recencia(self):
+        conn = self.db_manager.get_connection()
+        plano = ' '.join(row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT user_id FROM estados_conversa "
+            "WHERE ultima_atividade >= '2000-01-01' ORDER BY ultima_atividade DESC, user_id DESC LIMIT 20"))
+        conn.close()
+        
+        self.assertIn('idx_estados_conversa_atividade_usuario', plano)
+        self.assertNotIn('TEMP B-TREE', plano)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
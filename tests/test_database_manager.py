@@ -0,0 +1,151 @@
+# tests/test_database_manager.py
+"""
+Testes do DatabaseManager (modos de abertura do banco e inicialização)
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+from src.database.database_manager import DatabaseManager
+from src.database.consulta_repository import ConsultaRepository
+from src.database.conversa_repository import ConversaRepository
+from src.database.monitor_sql import MonitorConsultas
+from src.models.consulta import Consulta
+from src.models.conversa import EstadoConversa
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestBancoEmMemoria(unittest.TestCase):
+    """':memory:' compartilhado entre as conexões de um mesmo DatabaseManager"""
+    
+    def test_conexoes_enxergam_o_mesmo_banco(self):
+        repo = ConsultaRepository(DatabaseManager(':memory:'))
+        repo.salvar(Consulta(nome='Ana', data='15/07/2030', periodo='tarde', user_id='ana'))
+        
+        self.assertEqual(len(repo.buscar_todas()), 1)
+    
+    def test_managers_diferentes_sao_isolados(self):
+        primeiro = ConsultaRepository(DatabaseManager(':memory:'))
+        primeiro.salvar(Consulta(nome='Ana', data='15/07/2030', periodo='tarde', user_id='ana'))
+        
+        segundo = ConsultaRepository(DatabaseManager(':memory:'))
+        
+        self.assertEqual(segundo.buscar_todas(), [])
+
+
+class TestInicializacaoRapida(unittest.TestCase):
+    """Caminho rápido do schema (PRAGMA user_version) e imports preguiçosos"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+    
+    def tearDown(self):
+        os.remove(self.db_path)
+    
+    def test_banco_atualizado_pula_o_ddl(self):
+        DatabaseManager(self.db_path)
+        monitor = MonitorConsultas(limiar_ms=0)
+        
+        DatabaseManager(self.db_path, monitor=monitor)
+        
+        self.assertEqual([item['sql'] for item in monitor.piores()], ['PRAGMA user_version'])
+    
+    def test_versao_antiga_roda_o_ddl(self):
+        manager = DatabaseManager(self.db_path)
+        conn = manager.get_connection()
+        conn.execute('PRAGMA user_version = 0')
+        conn.close()
+        
+        DatabaseManager(self.db_path)
+        
+        conn = manager.get_connection()
+        self.assertEqual(conn.execute('PRAGMA user_version').fetchone()[0], DatabaseManager.VERSAO_SCHEMA)
+        conn.close()
+    
+    def test_versao_mais_nova_nao_e_rebaixada(self):
+        manager = DatabaseManager(self.db_path)
+        conn = manager.get_connection()
+        conn.execute(f'PRAGMA user_version = {DatabaseManager.VERSAO_SCHEMA + 1}')
+        conn.close()
+        monitor = MonitorConsultas(limiar_ms=0)
+        
+        DatabaseManager(self.db_path, monitor=monitor)
+        
+        self.assertEqual([item['sql'] for item in monitor.piores()], ['PRAGMA user_version'])
+        conn = manager.get_connection()
+        self.assertEqual(conn.execute('PRAGMA user_version').fetchone()[0], DatabaseManager.VERSAO_SCHEMA + 1)
+        conn.close()
+    
+    def test_sem_twilio_configurado_nao_importa_twilio(self):
+        env = dict(os.environ, DATABASE_PATH=self.db_path, TWILIO_ACCOUNT_SID='', TWILIO_AUTH_TOKEN='',
+                   TWILIO_PHONE_NUMBER='')
+        codigo = 'import sys; from app import create_app; create_app(); print("twilio" in sys.modules)'
+        
+        saida = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, env=env,
+                               capture_output=True, text=True, check=True).stdout
+        
+        self.assertEqual(saida.strip().splitlines()[-1], 'False')
+
+
+
+class TestRespostasDeduplicadas(unittest.TestCase):
+    """Texto das respostas do bot guardado uma vez em respostas_bot"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+    
+    def tearDown(self):
+        os.remove(self.db_path)
+    
+    def _contar(self, sql: str) -> int:
+        conn = sqlite3.connect(self.db_path)
+        total = conn.execute(sql).fetchone()[0]
+        conn.close()
+        return total
+    
+    def test_resposta_repetida_e_gravada_uma_vez(self):
+        repo = ConversaRepository(DatabaseManager(self.db_path))
+        for user_id in ('u1', 'u2', 'u3'):
+            repo.salvar_historico(user_id, 'oi', 'Olá! Qual é o seu nome?', EstadoConversa.AGUARDANDO_NOME)
+        
+        self.assertEqual(self._contar('SELECT COUNT(*) FROM respostas_bot'), 1)
+        self.assertEqual(self._contar('SELECT COUNT(resposta_bot) FROM historico_conversas'), 0)
+        self.assertEqual(repo.buscar_historico('u2')[1]['mensagem'], 'Olá! Qual é o seu nome?')
+    
+    def test_cache_de_ids_mantem_os_templates_frequentes(self):
+        repo = ConversaRepository(DatabaseManager(self.db_path))
+        repo.MAX_IDS_RESPOSTAS = 2
+        for resposta in ('Qual a data?', 'Obrigado, Ana!', 'Qual a data?', 'Obrigado, Bia!'):
+            repo.salvar_historico('u1', 'oi', resposta, EstadoConversa.AGUARDANDO_DATA)
+        
+        self.assertEqual(list(repo._ids_respostas), ['Qual a data?', 'Obrigado, Bia!'])
+    
+    def test_migracao_move_textos_do_historico_antigo(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE historico_conversas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, mensagem_usuario TEXT,
+                resposta_bot TEXT, estado TEXT, timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.executemany('INSERT INTO historico_conversas (user_id, mensagem_usuario, resposta_bot, estado) '
+                         'VALUES (?, ?, ?, ?)', [('u1', 'oi', 'Ajuda', 'inicial'), ('u1', 'ajuda', 'Ajuda', 'inicial'),
+                                                 ('u2', 'oi', 'Outra', 'inicial')])
+        conn.commit()
+        conn.close()
+        
+        repo = ConversaRepository(DatabaseManager(self.db_path))
+        
+        self.assertEqual(self._contar('SELECT COUNT(*) FROM respostas_bot'), 2)
+        self.assertEqual(self._contar('SELECT COUNT(resposta_bot) FROM historico_conversas'), 0)
+        self.assertEqual([item['mensagem'] for item in repo.buscar_historico('u1')], ['oi', 'Ajuda', 'ajuda', 'Ajuda'])
+
+
+if __name__ == '__main__':
+    unittest.main()
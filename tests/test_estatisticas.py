@@ -0,0 +1,179 @@
+# tests/test_estatisticas.py
+"""
+Testes das estatísticas pré-agregadas (/estatisticas/serie e /estatisticas/funil)
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from app import create_app
+from src.database.consulta_repository import ConsultaRepository
+from src.database.conversa_repository import ConversaRepository
+from src.database.database_manager import DatabaseManager
+from src.database.exceptions import ConsultaDuplicadaError
+from src.models.consulta import Consulta
+from src.models.conversa import Conversa, EstadoConversa
+
+
+class TestSerieConsultas(unittest.TestCase):
+    """Rollup diário mantido no salvar e agregado por dia, semana e mês"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ['DATABASE_PATH'] = self.db_path
+        self.repo = ConsultaRepository(DatabaseManager(self.db_path))
+        for user_id, data, periodo in (('u1', '14/07/2030', 'manhã'), ('u2', '15/07/2030', 'tarde'),
+                                       ('u3', '15/07/2030', 'manha'), ('u4', '15/07/2030', 'tarde'),
+                                       ('u5', '01/08/2030', 'tarde')):
+            self.repo.salvar(Consulta('Paciente', data, periodo, user_id))
+        self.cliente = create_app().test_client()
+    
+    def tearDown(self):
+        del os.environ['DATABASE_PATH']
+        os.remove(self.db_path)
+    
+    def _serie(self, query: str = '') -> list:
+        return self.cliente.get(f'/estatisticas/serie{query}').get_json()
+    
+    def test_serie_diaria_por_periodo(self):
+        serie = self._serie()
+        
+        self.assertEqual([bucket['inicio'] for bucket in serie], ['2030-07-14', '2030-07-15', '2030-08-01'])
+        self.assertEqual(serie[1], {'inicio': '2030-07-15', 'total': 3, 'por_periodo': {'manhã': 1, 'tarde': 2}})
+    
+    def test_semanas_comecam_na_segunda_e_meses_no_dia_1(self):
+        semanas = self._serie('?granularidade=semana')
+        meses = self._serie('?granularidade=mes')
+        
+        self.assertEqual([(bucket['inicio'], bucket['total']) for bucket in semanas],
+                         [('2030-07-08', 1), ('2030-07-15', 3), ('2030-07-29', 1)])
+        self.assertEqual([(bucket['inicio'], bucket['total']) for bucket in meses], [('2030-07-01', 4), ('2030-08-01', 1)])
+    
+    def test_intervalo_inclusivo_em_dois_formatos(self):
+        serie = self._serie('?granularidade=mes&de=15/07/2030&ate=2030-07-31')
+        
+        self.assertEqual(serie, [{'inicio': '2030-07-01', 'total': 3, 'por_periodo': {'manhã': 1, 'tarde': 2}}])
+    
+    def test_duplicada_nao_conta_de_novo(self):
+        with self.assertRaises(ConsultaDuplicadaError):
+            self.repo.salvar(Consulta('Paciente', '2030-07-15', 'tarde', 'u2'))
+        
+        self.assertEqual(self._serie('?de=15/07/2030&ate=15/07/2030')[0]['total'], 3)
+    
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.cliente.get('/estatisticas/serie?granularidade=ano').status_code, 400)
+        self.assertEqual(self.cliente.get('/estatisticas/serie?de=31/02/2030').status_code, 400)
+
+
+class TestBackfillSerie(unittest.TestCase):
+    """Bancos antigos têm o rollup preenchido a partir das consultas existentes"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+    
+    def tearDown(self):
+        os.remove(self.db_path)
+    
+    def test_backfill_ignora_datas_em_texto_livre(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE consultas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT NOT NULL, data TEXT NOT NULL,
+                periodo TEXT NOT NULL, data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP, user_id TEXT
+            )
+        ''')
+        conn.executemany('INSERT INTO consultas (nome, data, periodo, user_id) VALUES (?, ?, ?, ?)', [
+            ('Ana', '15/07/2030', 'tarde', 'u1'), ('Bia', '15/07/2030', 'tarde', 'u2'),
+            ('Caio', 'amanhã', 'tarde', 'u3')
+        ])
+        conn.commit()
+        conn.close()
+        
+        serie = ConsultaRepository(DatabaseManager(self.db_path)).obter_serie()
+        
+        self.assertEqual(serie, [{'inicio': '2030-07-15', 'total': 2, 'por_periodo': {'tarde': 2}}])
+
+
+class TestFunilConversas(unittest.TestCase):
+    """Contadores de transição mantidos pelo ChatbotService e o funil derivado"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ['DATABASE_PATH'] = self.db_path
+        self.cliente = create_app().test_client()
+        conversas = {
+            'u1': ('iniciar', 'Ana', '15/07/2030', 'tarde'),
+            'u2': ('iniciar', 'Bia'),
+            'u3': ('iniciar',)
+        }
+        for user_id, mensagens in conversas.items():
+            for mensagem in mensagens:
+                self.cliente.post('/mensagem', json={'user_id': user_id, 'mensagem': mensagem})
+        self.cliente.post('/conversa/reiniciar/u3')
+    
+    def tearDown(self):
+        del os.environ['DATABASE_PATH']
+        os.remove(self.db_path)
+    
+    def test_entradas_e_conversao_por_etapa(self):
+        funil = self.cliente.get('/estatisticas/funil').get_json()
+        
+        self.assertEqual([(etapa['estado'], etapa['entradas'], etapa['conversao']) for etapa in funil['etapas']], [
+            ('aguardando_nome', 3, None),
+            ('aguardando_data', 2, 0.6667),
+            ('aguardando_periodo', 1, 0.5),
+            ('finalizado', 1, 1.0)
+        ])
+        self.assertIn({'de': 'aguardando_nome', 'para': 'inicial', 'total': 1}, funil['transicoes'])
+    
+    def test_volta_de_etapa_nao_conta_como_entrada(self):
+        ConversaRepository(DatabaseManager(self.db_path)).salvar_estado(
+            Conversa('u2', EstadoConversa.AGUARDANDO_DATA), anterior=EstadoConversa.AGUARDANDO_PERIODO
+        )
+        
+        funil = self.cliente.get('/estatisticas/funil').get_json()
+        
+        self.assertEqual(funil['etapas'][1]['entradas'], 2)
+        self.assertIn({'de': 'aguardando_periodo', 'para': 'aguardando_data', 'total': 1}, funil['transicoes'])
+    
+    def test_agendamento_duplicado_nao_conta_como_conversao(self):
+        for mensagem in ('nova', 'Ana', '15/07/2030', 'tarde'):
+            self.cliente.post('/mensagem', json={'user_id': 'u1', 'mensagem': mensagem})
+        
+        funil = self.cliente.get('/estatisticas/funil').get_json()
+        
+        self.assertEqual(funil['etapas'][3]['entradas'], 1)
+        self.assertIn({'de': 'aguardando_periodo', 'para': 'aguardando_data', 'total': 1}, funil['transicoes'])
+    
+    def test_contador_e_estado_na_mesma_transacao(self):
+        repo = ConversaRepository(DatabaseManager(self.db_path))
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('ALTER TABLE transicoes_por_dia RENAME TO transicoes_fora')
+        conn.commit()
+        conn.close()
+        
+        with self.assertRaises(sqlite3.OperationalError):
+            repo.salvar_estado(Conversa('u2', EstadoConversa.AGUARDANDO_PERIODO), anterior=EstadoConversa.AGUARDANDO_DATA)
+        
+        self.assertEqual(repo.carregar_estado('u2').estado, EstadoConversa.AGUARDANDO_DATA)
+    
+    def test_buckets_por_dia_e_intervalo(self):
+        hoje = datetime.now(timezone.utc).date().isoformat()
+        
+        funil = self.cliente.get(f'/estatisticas/funil?de={hoje}&ate={hoje}').get_json()
+        futuro = self.cliente.get('/estatisticas/funil?de=01/01/2999').get_json()
+        
+        self.assertEqual(funil['por_dia'], [{'dia': hoje, 'entradas': {
+            'aguardando_nome': 3, 'aguardando_data': 2, 'aguardando_periodo': 1, 'finalizado': 1
+        }}])
+        self.assertEqual([etapa['entradas'] for etapa in futuro['etapas']], [0, 0, 0, 0])
+        self.assertEqual(self.cliente.get('/estatisticas/funil?ate=ontem').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
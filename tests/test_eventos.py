@@ -0,0 +1,168 @@
+# tests/test_eventos.py
+"""
+Testes do barramento de eventos e do stream SSE do dashboard
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+from unittest.mock import patch
+from src.database.database_manager import DatabaseManager
+from src.database.consulta_repository import ConsultaRepository
+from src.database.conversa_repository import ConversaRepository
+from src.models.consulta import Consulta
+from src.services.chatbot_service import ChatbotService
+from src.services.event_bus import EventBus
+from src.services.publicador_estatisticas import PublicadorEstatisticas
+from src.controllers.eventos_controller import formatar_sse
+
+
+class TestEventBus(unittest.TestCase):
+    """Testes para o EventBus"""
+    
+    def test_fila_recebe_eventos_publicados(self):
+        """Assinantes recebem os eventos em ordem, com id crescente"""
+        bus = EventBus()
+        fila = bus.assinar_fila()
+        
+        bus.publicar('a', {'x': 1})
+        bus.publicar('b', {'x': 2})
+        
+        primeiro, segundo = fila.get_nowait(), fila.get_nowait()
+        self.assertEqual((primeiro['tipo'], segundo['tipo']), ('a', 'b'))
+        self.assertLess(primeiro['id'], segundo['id'])
+    
+    def test_fila_cheia_descarta_sem_bloquear(self):
+        """Consumidor lento não bloqueia quem publica"""
+        bus = EventBus()
+        fila = bus.assinar_fila(tamanho=1)
+        
+        bus.publicar('a', {})
+        bus.publicar('b', {})
+        
+        self.assertEqual(fila.qsize(), 1)
+        bus.cancelar_fila(fila)
+        self.assertEqual(bus.total_assinantes, 0)
+    
+    def test_formatar_sse(self):
+        """Evento serializado no formato text/event-stream"""
+        texto = formatar_sse({'id': 7, 'tipo': 'estatisticas', 'dados': {'total': 1}})
+        self.assertEqual(texto, 'id: 7\nevent: estatisticas\ndata: {"total": 1}\n\n')
+
+
+class TestChatbotEventos(unittest.TestCase):
+    """Eventos publicados pelo ChatbotService"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        db_manager = DatabaseManager(self.db_path)
+        self.bus = EventBus()
+        self.consulta_repo = ConsultaRepository(db_manager)
+        self.chatbot = ChatbotService(self.consulta_repo, ConversaRepository(db_manager), event_bus=self.bus)
+    
+    def tearDown(self):
+        os.remove(self.db_path)
+    
+    def test_fluxo_publica_transicoes_e_consulta(self):
+        """Cada mudança de estado e a consulta criada geram eventos"""
+        fila = self.bus.assinar_fila()
+        
+        for mensagem in ('iniciar', 'Ana', '15/07/2025', 'tarde'):
+            self.chatbot.processar_mensagem('u1', mensagem)
+        
+        eventos = [fila.get_nowait() for _ in range(fila.qsize())]
+        transicoes = [e['dados']['para'] for e in eventos if e['tipo'] == 'transicao_estado']
+        consultas = [e['dados'] for e in eventos if e['tipo'] == 'consulta_criada']
+        
+        self.assertEqual(transicoes, ['aguardando_nome', 'aguardando_data', 'aguardando_periodo', 'finalizado'])
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual(consultas[0]['nome'], 'Ana')
+    
+    def test_publicador_recalcula_uma_vez_por_rajada(self):
+        """Várias consultas seguidas geram um único evento de estatísticas"""
+        publicador = PublicadorEstatisticas(self.bus, self.consulta_repo, intervalo_minimo=0.2)
+        publicador.iniciar()
+        fila = self.bus.assinar_fila()
+        
+        for i in range(3):
+            for mensagem in ('iniciar', f'P{i}', '15/07/2025', 'tarde'):
+                self.chatbot.processar_mensagem(f'u{i}', mensagem)
+        
+        evento = None
+        while evento is None or evento['tipo'] != 'estatisticas':
+            evento = fila.get(timeout=2)
+        
+        self.assertEqual(evento['dados']['total_consultas'], 3)
+        self.assertTrue(all(e['tipo'] != 'estatisticas' for e in list(fila.queue)))
+    
+    def test_estatisticas_em_memoria_expiram_na_virada_do_dia(self):
+        """Um cliente que conecta depois da meia-noite não recebe os números de ontem"""
+        publicador = PublicadorEstatisticas(self.bus, self.consulta_repo)
+        self.assertEqual(publicador.estatisticas_atuais()['total_consultas'], 0)
+        self.consulta_repo.salvar(Consulta('Ana', '15/07/2025', 'tarde', 'u1'))
+        
+        self.assertEqual(publicador.estatisticas_atuais()['total_consultas'], 0)
+        with patch('src.services.publicador_estatisticas.date') as data:
+            data.today.return_value = date.today() + timedelta(days=1)
+            self.assertEqual(publicador.estatisticas_atuais()['total_consultas'], 1)
+    
+    def test_reiniciar_nao_duplica_a_assinatura(self):
+        """iniciar, parar e iniciar de novo mantém um único callback no barramento"""
+        antes = self.bus.total_assinantes
+        publicador = PublicadorEstatisticas(self.bus, self.consulta_repo, intervalo_minimo=0.01)
+        
+        publicador.iniciar()
+        publicador.parar()
+        publicador.iniciar()
+        self.addCleanup(publicador.parar)
+        
+        self.assertEqual(self.bus.total_assinantes, antes + 1)
+        self.assertTrue(publicador._thread.is_alive())
+    
+    def test_varios_processos_sondam_o_banco(self):
+        """Consultas de outro worker (sem evento neste barramento) são publicadas"""
+        publicador = PublicadorEstatisticas(self.bus, self.consulta_repo, intervalo_minimo=0.1, processos=2)
+        publicador.estatisticas_atuais()
+        publicador.iniciar()
+        self.addCleanup(publicador.parar)
+        fila = self.bus.assinar_fila()
+        
+        self.consulta_repo.salvar(Consulta('Ana', '15/07/2025', 'tarde', 'u1'))
+        
+        evento = fila.get(timeout=2)
+        self.assertEqual(evento['tipo'], 'estatisticas')
+        self.assertEqual(evento['dados']['total_consultas'], 1)
+
+
+class TestEndpointEventos(unittest.TestCase):
+    """Testes do endpoint /eventos via test client do Flask"""
+    
+    def test_stream_envia_estatisticas_iniciais(self):
+        """Ao conectar, o cliente recebe as estatísticas atuais"""
+        fd, db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ['DATABASE_PATH'] = db_path
+        try:
+            from app import create_app
+            cliente = create_app().test_client()
+            resposta = cliente.get('/eventos', buffered=False)
+            
+            self.assertEqual(resposta.mimetype, 'text/event-stream')
+            partes = iter(resposta.response)
+            self.assertEqual(next(partes), b'retry: 3000\n\n')
+            inicial = next(partes).decode()
+            resposta.close()
+        finally:
+            del os.environ['DATABASE_PATH']
+            os.remove(db_path)
+        
+        self.assertIn('event: estatisticas', inicial)
+        dados = json.loads(inicial.split('data: ', 1)[1])
+        self.assertEqual(dados['total_consultas'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
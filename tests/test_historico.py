@@ -0,0 +1,126 @@
+# tests/test_historico.py
+"""
+Testes dos endpoints /historico/<user_id> (cursores desde/antes e limite)
+e /historico/busca (busca textual FTS5)
+"""
+
+import os
+import tempfile
+import unittest
+from app import create_app
+from src.database.conversa_repository import ConversaRepository
+from src.database.database_manager import DatabaseManager
+from src.models.conversa import EstadoConversa
+
+
+class TestHistoricoPaginado(unittest.TestCase):
+    """Atualização incremental e paginação para trás do histórico"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ['DATABASE_PATH'] = self.db_path
+        self.cliente = create_app().test_client()
+        for mensagem in ('oi', 'Ana', '15/07/2030', 'tarde', 'obrigado'):
+            self.cliente.post('/mensagem', json={'user_id': 'u1', 'mensagem': mensagem})
+        self.cliente.post('/mensagem', json={'user_id': 'u2', 'mensagem': 'oi'})
+    
+    def tearDown(self):
+        del os.environ['DATABASE_PATH']
+        os.remove(self.db_path)
+    
+    def _interacoes(self, url: str) -> list:
+        """Mensagens do usuário (uma por interação), na ordem devolvida"""
+        return [item['mensagem'] for item in self.cliente.get(url).get_json() if item['remetente'] == 'user']
+    
+    def test_sem_parametros_devolve_tudo_com_ids(self):
+        historico = self.cliente.get('/historico/u1').get_json()
+        
+        self.assertEqual(len(historico), 10)
+        self.assertTrue(all('id' in item for item in historico))
+        self.assertEqual(historico[0]['id'], historico[1]['id'])
+    
+    def test_limite_traz_as_mais_recentes(self):
+        self.assertEqual(self._interacoes('/historico/u1?limite=2'), ['tarde', 'obrigado'])
+    
+    def test_desde_traz_so_as_novas(self):
+        historico = self.cliente.get('/historico/u1').get_json()
+        
+        self.cliente.post('/mensagem', json={'user_id': 'u1', 'mensagem': 'nova'})
+        
+        self.assertEqual(self._interacoes(f"/historico/u1?desde={historico[-1]['id']}"), ['nova'])
+    
+    def test_antes_pagina_para_tras(self):
+        pagina = self.cliente.get('/historico/u1?limite=2').get_json()
+        
+        anterior = self._interacoes(f"/historico/u1?antes={pagina[0]['id']}&limite=2")
+        
+        self.assertEqual(anterior, ['Ana', '15/07/2030'])
+    
+    def test_limite_invalido(self):
+        self.assertEqual(self.cliente.get('/historico/u1?limite=0').status_code, 400)
+
+
+class TestBuscaHistorico(unittest.TestCase):
+    """Busca textual no histórico, sem diferenciar acentos e maiúsculas"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ['DATABASE_PATH'] = self.db_path
+        self.repo = ConversaRepository(DatabaseManager(self.db_path))
+        self.cliente = create_app().test_client()
+        for user_id, mensagem, resposta in (
+            ('u1', 'Quero o CANCELAMENTO da minha consulta', 'Não consigo cancelar por aqui.'),
+            ('u2', 'prefiro o período da manhã', 'Anotei: manhã.'),
+            ('u3', 'cancelamento cancelamento urgente', 'Ok.'),
+        ):
+            self.repo.salvar_historico(user_id, mensagem, resposta, EstadoConversa.INICIAL)
+    
+    def tearDown(self):
+        del os.environ['DATABASE_PATH']
+        os.remove(self.db_path)
+    
+    def _usuarios(self, url: str) -> list:
+        return [item['user_id'] for item in self.cliente.get(url).get_json()['resultados']]
+    
+    def test_ignora_acentos_e_maiusculas(self):
+        self.assertEqual(self._usuarios('/historico/busca?q=MANHA'), ['u2'])
+        self.assertEqual(self._usuarios('/historico/busca?q=nao'), ['u1'])
+    
+    def test_ordena_por_relevancia_e_marca_trechos(self):
+        resultados = self.cliente.get('/historico/busca?q=Cancelamento').get_json()['resultados']
+        
+        self.assertEqual([item['user_id'] for item in resultados], ['u3', 'u1'])
+        self.assertIn('[CANCELAMENTO]', resultados[1]['mensagem_usuario'])
+    
+    def test_ultimo_termo_casa_como_prefixo(self):
+        self.assertEqual(sorted(self._usuarios('/historico/busca?q=cancel')), ['u1', 'u3'])
+        self.assertEqual(self._usuarios('/historico/busca?q=minha cancel'), ['u1'])
+    
+    def test_filtro_por_usuario_e_paginacao(self):
+        self.assertEqual(self._usuarios('/historico/busca?q=cancelamento&user_id=u1'), ['u1'])
+        
+        primeira = self.cliente.get('/historico/busca?q=cancelamento&limite=1').get_json()
+        segunda = self.cliente.get(f"/historico/busca?q=cancelamento&limite=1&offset={primeira['proximo_offset']}").get_json()
+        
+        self.assertEqual(primeira['proximo_offset'], 1)
+        self.assertEqual([item['user_id'] for item in segunda['resultados']], ['u1'])
+    
+    def test_indice_acompanha_remocoes(self):
+        conn = self.repo.db_manager.get_connection()
+        conn.execute("DELETE FROM historico_conversas WHERE user_id = 'u3'")
+        conn.commit()
+        conn.close()
+        
+        self.assertEqual(self._usuarios('/historico/busca?q=cancelamento'), ['u1'])
+        self.assertEqual(self._usuarios('/historico/busca?q=urgente'), [])
+    
+    def test_consulta_vazia_ou_sem_termos(self):
+        self.assertEqual(self.cliente.get('/historico/busca').status_code, 400)
+        self.assertEqual(self.cliente.get('/historico/busca?q=%3F%21').status_code, 400)
+        self.assertEqual(self.cliente.get('/historico/busca?q=oi&limite=0').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# tests/test_metricas.py
+"""
+Testes das métricas Prometheus e do endpoint /metrics
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from app import create_app
+from src.services.metricas import ETAPAS_MENSAGEM, REPOSITORIOS, RegistroMetricas, instrumentar_repositorio
+
+
+class TestRegistroMetricas(unittest.TestCase):
+    """Serialização de contadores e histogramas"""
+    
+    def test_histograma_acumula_buckets(self):
+        registro = RegistroMetricas()
+        histograma = registro.histograma('teste_segundos', 'Teste', buckets=(0.1, 1.0))
+        histograma.observar(0.05, etapa='a')
+        histograma.observar(0.5, etapa='a')
+        histograma.observar(3.0, etapa='a')
+        
+        texto = registro.exportar()
+        
+        self.assertIn('# TYPE teste_segundos histogram', texto)
+        self.assertIn('teste_segundos_bucket{etapa="a",le="0.1"} 1', texto)
+        self.assertIn('teste_segundos_bucket{etapa="a",le="1"} 2', texto)
+        self.assertIn('teste_segundos_bucket{etapa="a",le="+Inf"} 3', texto)
+        self.assertIn('teste_segundos_count{etapa="a"} 3', texto)
+    
+    def test_contador_escapa_rotulos(self):
+        registro = RegistroMetricas()
+        contador = registro.contador('teste_total', 'Teste')
+        contador.inc(rota='/a"b')
+        contador.inc(rota='/a"b')
+        
+        self.assertIn('teste_total{rota="/a\\"b"} 2', registro.exportar())
+
+
+class TestInstrumentarRepositorio(unittest.TestCase):
+    """Métodos dos repositories medidos pelo decorator de classe"""
+    
+    def test_gerador_e_medido_ate_o_fim_da_iteracao(self):
+        @instrumentar_repositorio
+        class RepositorioFalso:
+            def percorrer(self):
+                for valor in range(3):
+                    time.sleep(0.01)
+                    yield valor
+        
+        iterador = RepositorioFalso().percorrer()
+        self.assertEqual(REPOSITORIOS.contagem(operacao='RepositorioFalso.percorrer'), 0)
+        
+        self.assertEqual(list(iterador), [0, 1, 2])
+        self.assertEqual(REPOSITORIOS.contagem(operacao='RepositorioFalso.percorrer'), 1)
+        self.assertGreaterEqual(REPOSITORIOS.soma(operacao='RepositorioFalso.percorrer'), 0.03)
+
+
+class TestEndpointMetricas(unittest.TestCase):
+    """Medição do fluxo do chatbot exposta em /metrics"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ['DATABASE_PATH'] = self.db_path
+        self.cliente = create_app().test_client()
+    
+    def tearDown(self):
+        del os.environ['DATABASE_PATH']
+        os.remove(self.db_path)
+    
+    def test_metrics_expoe_etapas_e_rotas(self):
+        antes = ETAPAS_MENSAGEM.contagem(etapa='salvar_consulta')
+        for mensagem in ('iniciar', 'Ana', '15/07/2025', 'tarde'):
+            self.cliente.post('/mensagem', json={'user_id': 'metricas', 'mensagem': mensagem})
+        
+        resposta = self.cliente.get('/metrics')
+        texto = resposta.get_data(as_text=True)
+        
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta.content_type.startswith('text/plain; version=0.0.4'))
+        self.assertEqual(ETAPAS_MENSAGEM.contagem(etapa='salvar_consulta'), antes + 1)
+        self.assertGreater(REPOSITORIOS.contagem(operacao='ConsultaRepository.salvar'), 0)
+        self.assertIn('atende_mensagem_etapa_segundos_bucket{etapa="intencao"', texto)
+        self.assertIn('atende_http_requisicoes_total{metodo="POST",rota="/mensagem",status="200"}', texto)
+
+
+if __name__ == '__main__':
+    unittest.main()
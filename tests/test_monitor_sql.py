@@ -0,0 +1,131 @@
+# tests/test_monitor_sql.py
+"""
+Testes do log de SQL lento (MonitorConsultas) e do endpoint administrativo
+"""
+
+import os
+import tempfile
+import unittest
+from app import create_app
+from src.database.conversa_repository import ConversaRepository
+from src.database.database_manager import DatabaseManager
+from src.database.monitor_sql import MonitorConsultas
+
+
+class TestMonitorConsultas(unittest.TestCase):
+    """Medição dos statements feitos pelas conexões do DatabaseManager"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        # Limiar zero: todo statement é considerado lento
+        self.monitor = MonitorConsultas(limiar_ms=0)
+        self.db_manager = DatabaseManager(self.db_path, monitor=self.monitor)
+        self.monitor.limpar()
+    
+    def tearDown(self):
+        os.remove(self.db_path)
+    
+    def test_registra_plano_e_formato_dos_parametros(self):
+        conn = self.db_manager.get_connection()
+        conn.execute('SELECT   * FROM consultas\n WHERE user_id = ?', ('ana',)).fetchall()
+        conn.close()
+        
+        lenta = self.monitor.lentas_recentes()[0]
+        
+        self.assertEqual(lenta['sql'], 'SELECT * FROM consultas WHERE user_id = ?')
+        self.assertEqual(lenta['parametros'], {'tipos': ['str']})
+        self.assertTrue(lenta['plano'])
+    
+    def test_plano_de_statements_multilinha_dos_repositorios(self):
+        ConversaRepository(self.db_manager).buscar_historico('ana', limite=10)
+        
+        lenta = next(item for item in self.monitor.lentas_recentes() if 'FROM historico_conversas h' in item['sql'])
+        
+        self.assertTrue(lenta['plano'])
+        self.assertTrue(any('idx_historico_usuario_id' in linha for linha in lenta['plano']))
+    
+    def test_agrega_por_statement(self):
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        for _ in range(3):
+            cursor.execute('SELECT COUNT(*) FROM consultas')
+        cursor.executemany('INSERT INTO vagas (data, periodo, capacidade) VALUES (?, ?, ?)',
+                           [('2025-07-15', 'manhã', 1), ('2025-07-15', 'tarde', 1)])
+        conn.commit()
+        conn.close()
+        
+        piores = {item['sql']: item for item in self.monitor.piores(limite=50)}
+        
+        self.assertEqual(piores['SELECT COUNT(*) FROM consultas']['execucoes'], 3)
+        self.assertEqual(self.monitor.lentas_recentes()[0]['parametros']['lote'], 2)
+    
+    def test_listas_in_de_tamanhos_diferentes_agregam_juntas(self):
+        conn = self.db_manager.get_connection()
+        for tamanho in (1, 2, 5):
+            marcadores = ','.join('?' * tamanho)
+            conn.execute(f'SELECT estado FROM estados_conversa WHERE user_id IN ({marcadores})',
+                         [f'u{i}' for i in range(tamanho)]).fetchall()
+        conn.close()
+        
+        piores = {item['sql']: item for item in self.monitor.piores(limite=50)}
+        
+        self.assertEqual(piores['SELECT estado FROM estados_conversa WHERE user_id IN (?+)']['execucoes'], 3)
+        self.assertTrue(self.monitor.lentas_recentes()[0]['plano'])
+    
+    def test_mapas_por_statement_sao_limitados(self):
+        monitor = MonitorConsultas(limiar_ms=10_000, max_statements=3)
+        manager = DatabaseManager(self.db_path, monitor=monitor)
+        monitor.limpar()
+        
+        conn = manager.get_connection()
+        for valor in (0, 1, 2, 0, 3):
+            conn.execute(f'SELECT {valor}').fetchall()
+        conn.close()
+        
+        # O menos usado recentemente (SELECT 1) é o que sai
+        self.assertEqual({item['sql'] for item in monitor.piores(limite=50)}, {'SELECT 0', 'SELECT 2', 'SELECT 3'})
+        self.assertEqual(len(monitor._normalizados), 3)
+    
+    def test_limiar_filtra_statements_rapidos(self):
+        monitor = MonitorConsultas(limiar_ms=10_000)
+        DatabaseManager(self.db_path, monitor=monitor)
+        
+        self.assertEqual(monitor.lentas_recentes(), [])
+        self.assertTrue(monitor.piores())
+
+
+class TestEndpointConsultasLentas(unittest.TestCase):
+    """GET /admin/consultas-lentas"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ['DATABASE_PATH'] = self.db_path
+    
+    def tearDown(self):
+        del os.environ['DATABASE_PATH']
+        os.environ.pop('ADMIN_TOKEN', None)
+        os.remove(self.db_path)
+    
+    def test_lista_piores_por_p99(self):
+        cliente = create_app().test_client()
+        cliente.get('/consultas')
+        
+        resposta = cliente.get('/admin/consultas-lentas?ordem=p99')
+        
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta.json['piores'])
+        self.assertEqual(cliente.get('/admin/consultas-lentas?ordem=x').status_code, 400)
+    
+    def test_exige_token_quando_configurado(self):
+        os.environ['ADMIN_TOKEN'] = 'segredo'
+        cliente = create_app().test_client()
+        
+        self.assertEqual(cliente.get('/admin/consultas-lentas').status_code, 401)
+        resposta = cliente.get('/admin/consultas-lentas', headers={'X-Admin-Token': 'segredo'})
+        self.assertEqual(resposta.status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
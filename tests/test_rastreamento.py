@@ -0,0 +1,89 @@
+# tests/test_rastreamento.py
+"""
+Testes do rastreamento amostrado e do endpoint /admin/traces
+"""
+
+import os
+import tempfile
+import unittest
+from app import create_app
+from src.services.rastreamento import Rastreador, span
+
+
+class TestRastreador(unittest.TestCase):
+    """Amostragem, hierarquia de spans e buffer circular"""
+    
+    def test_fora_da_amostra_nao_coleta(self):
+        rastreador = Rastreador(taxa_amostragem=0)
+        
+        with rastreador.trace('POST /mensagem', 'ana') as trace:
+            with span('etapa') as registro:
+                pass
+        
+        self.assertIsNone(trace)
+        self.assertIsNone(registro)
+        self.assertEqual(rastreador.traces(), [])
+    
+    def test_spans_aninhados_e_user_id_com_hash(self):
+        rastreador = Rastreador(taxa_amostragem=1, chave_hash='chave')
+        
+        with rastreador.trace('POST /mensagem', '+5511999999999'):
+            with span('pai'):
+                with span('filho'):
+                    pass
+        
+        raiz, pai, filho = rastreador.traces()[0].spans
+        self.assertEqual(pai.pai_id, raiz.span_id)
+        self.assertEqual(filho.pai_id, pai.span_id)
+        self.assertNotIn('+5511999999999', str(raiz.atributos))
+        self.assertEqual(raiz.atributos['enduser.id_hash'], rastreador.hash_usuario('+5511999999999'))
+    
+    def test_guarda_lentos_fora_da_amostra(self):
+        rastreador = Rastreador(taxa_amostragem=0, sempre_acima_ms=0)
+        
+        with rastreador.trace('POST /mensagem', 'ana'):
+            pass
+        
+        self.assertEqual(len(rastreador.traces()), 1)
+    
+    def test_capacidade_do_buffer(self):
+        rastreador = Rastreador(taxa_amostragem=1, capacidade=2)
+        for _ in range(5):
+            with rastreador.trace('POST /mensagem'):
+                pass
+        
+        self.assertEqual(len(rastreador.traces()), 2)
+
+
+class TestEndpointTraces(unittest.TestCase):
+    """Traces do fluxo /mensagem exportados em JSON OTLP"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ['DATABASE_PATH'] = self.db_path
+        os.environ['TRACE_AMOSTRAGEM'] = '1'
+        self.cliente = create_app().test_client()
+    
+    def tearDown(self):
+        del os.environ['DATABASE_PATH']
+        del os.environ['TRACE_AMOSTRAGEM']
+        os.remove(self.db_path)
+    
+    def test_trace_tem_etapas_e_sql(self):
+        self.cliente.post('/mensagem', json={'user_id': 'ana', 'mensagem': 'iniciar'})
+        
+        resposta = self.cliente.get('/admin/traces')
+        spans = resposta.json['resourceSpans'][0]['scopeSpans'][0]['spans']
+        nomes = {span['name'] for span in spans}
+        
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn('POST /mensagem', nomes)
+        self.assertIn('intencao', nomes)
+        self.assertIn('ConversaRepository.salvar_historico', nomes)
+        self.assertIn('sql', nomes)
+        self.assertEqual(len({span['traceId'] for span in spans}), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,279 @@
+# tests/test_sessoes.py
+"""
+Testes do cache de sessões do ChatbotService (pré-carga, snapshot, expiração e status em lote)
+Usam um banco SQLite temporário, sem servidor
+"""
+
+import glob
+import os
+import tempfile
+import unittest
+from app import create_app
+from src.database.database_manager import DatabaseManager
+from src.database.consulta_repository import ConsultaRepository
+from src.database.conversa_repository import ConversaRepository
+from src.models.conversa import Conversa, EstadoConversa
+from src.services.chatbot_service import ChatbotService
+from src.services.expiracao_conversas import ExpiradorConversas
+from src.services.snapshot_sessoes import SnapshotSessoes, serializar
+
+
+class SessoesTestCase(unittest.TestCase):
+    """Base com banco temporário isolado por teste"""
+    
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.db_manager = DatabaseManager(self.db_path)
+        self.consulta_repo = ConsultaRepository(self.db_manager)
+        self.conversa_repo = ConversaRepository(self.db_manager)
+    
+    def tearDown(self):
+        os.remove(self.db_path)
+    
+    def _novo_chatbot(self) -> ChatbotService:
+        return ChatbotService(self.consulta_repo, self.conversa_repo)
+    
+    def _envelhecer(self, user_id: str, horas: float):
+        conn = self.db_manager.get_connection()
+        conn.execute("UPDATE estados_conversa SET ultima_atividade = datetime('now', ?) WHERE user_id = ?",
+                     (f'-{horas} hours', user_id))
+        conn.commit()
+        conn.close()
+
+
+class TestAquecimentoCache(SessoesTestCase):
+    """Pré-carga das conversas recentes após um restart"""
+    
+    def test_carrega_apenas_conversas_recentes(self):
+        for user_id in ('recente', 'antiga'):
+            self.conversa_repo.salvar_estado(Conversa(user_id, EstadoConversa.AGUARDANDO_DATA, {'nome': user_id}))
+        self._envelhecer('antiga', 48)
+        
+        chatbot = self._novo_chatbot()
+        carregadas = chatbot.aquecer_cache(horas=24)
+        
+        self.assertEqual(carregadas, 1)
+        self.assertEqual(chatbot._conversas_ativas['recente'].dados, {'nome': 'recente'})
+        self.assertNotIn('antiga', chatbot._conversas_ativas)
+    
+    def test_respeita_limite_pelas_mais_recentes(self):
+        for indice, user_id in enumerate(('u1', 'u2', 'u3')):
+            self.conversa_repo.salvar_estado(Conversa(user_id, EstadoConversa.AGUARDANDO_NOME))
+            self._envelhecer(user_id, 3 - indice)
+        
+        chatbot = self._novo_chatbot()
+        chatbot.aquecer_cache(horas=24, limite=2)
+        
+        self.assertEqual(set(chatbot._conversas_ativas), {'u2', 'u3'})
+    
+    def test_primeira_mensagem_usa_o_cache(self):
+        self.conversa_repo.salvar_estado(Conversa('u1', EstadoConversa.AGUARDANDO_DATA, {'nome': 'Ana'}))
+        chatbot = self._novo_chatbot()
+        chatbot.aquecer_cache(horas=1)
+        
+        self.conversa_repo.carregar_estado = None  # qualquer consulta pontual falharia
+        resposta = chatbot.processar_mensagem('u1', '15/07/2030')
+        
+        self.assertIn('15/07/2030', resposta)
+
+
+
+class TestSnapshotSessoes(SessoesTestCase):
+    """Snapshot gravado no shutdown e restaurado no boot seguinte"""
+    
+    def setUp(self):
+        super().setUp()
+        self.snapshot_path = self.db_path + '.sessoes'
+    
+    def tearDown(self):
+        for caminho in glob.glob(self.snapshot_path + '*'):
+            os.remove(caminho)
+        super().tearDown()
+    
+    def _gravar(self, *user_ids: str) -> ChatbotService:
+        chatbot = self._novo_chatbot()
+        for user_id in user_ids:
+            chatbot.processar_mensagem(user_id, 'oi')
+            chatbot.processar_mensagem(user_id, f'Nome {user_id}')
+        SnapshotSessoes(self.snapshot_path, chatbot).salvar()
+        return chatbot
+    
+    def _restaurar(self) -> ChatbotService:
+        chatbot = self._novo_chatbot()
+        self.restauradas = SnapshotSessoes(self.snapshot_path, chatbot).restaurar()
+        return chatbot
+    
+    def test_restaura_conversas_do_shutdown(self):
+        anterior = self._gravar('u1', 'u2')
+        
+        chatbot = self._restaurar()
+        
+        self.assertEqual(self.restauradas, 2)
+        self.assertEqual(chatbot._conversas_ativas['u1'], anterior._conversas_ativas['u1'])
+        self.assertEqual(chatbot._conversas_ativas['u2'].estado, anterior._conversas_ativas['u2'].estado)
+    
+    def test_descarta_conversa_alterada_no_banco(self):
+        self._gravar('u1', 'u2')
+        self.conversa_repo.salvar_estado(Conversa('u1', EstadoConversa.INICIAL))
+        self.conversa_repo.remover_estado('u2')
+        
+        chatbot = self._restaurar()
+        
+        self.assertEqual(self.restauradas, 0)
+        self.assertEqual(chatbot._obter_conversa('u1').estado, EstadoConversa.INICIAL)
+    
+    def test_descarta_conversa_com_atividade_posterior(self):
+        self._gravar('u1')
+        conn = self.db_manager.get_connection()
+        conn.execute("UPDATE estados_conversa SET ultima_atividade = datetime('now', '+1 hour')")
+        conn.commit()
+        conn.close()
+        
+        self._restaurar()
+        
+        self.assertEqual(self.restauradas, 0)
+    
+    def test_ignora_arquivo_corrompido(self):
+        self._gravar('u1')
+        with open(self.snapshot_path, 'r+b') as arquivo:
+            arquivo.seek(-1, os.SEEK_END)
+            ultimo = arquivo.read(1)
+            arquivo.seek(-1, os.SEEK_END)
+            arquivo.write(bytes([ultimo[0] ^ 0xFF]))
+        
+        chatbot = self._restaurar()
+        
+        self.assertEqual(self.restauradas, 0)
+        self.assertEqual(chatbot._conversas_ativas, {})
+    
+    def test_ignora_snapshot_ausente_ou_velho(self):
+        self.assertEqual(SnapshotSessoes(self.snapshot_path, self._novo_chatbot()).restaurar(), 0)
+        
+        self._gravar('u1')
+        restauradas = SnapshotSessoes(self.snapshot_path, self._novo_chatbot(), idade_maxima_horas=0).restaurar()
+        
+        self.assertEqual(restauradas, 0)
+    
+    def test_junta_arquivos_de_cada_worker(self):
+        worker1 = self._novo_chatbot()
+        worker1.processar_mensagem('u1', 'oi')
+        worker2 = self._novo_chatbot()
+        worker2.processar_mensagem('u2', 'oi')
+        for pid, chatbot in ((101, worker1), (102, worker2)):
+            with open(f'{self.snapshot_path}.{pid}', 'wb') as arquivo:
+                arquivo.write(serializar(chatbot.exportar_sessoes()))
+        
+        chatbot = self._restaurar()
+        
+        self.assertEqual(self.restauradas, 2)
+        self.assertEqual(set(chatbot._conversas_ativas), {'u1', 'u2'})
+        self.assertEqual(glob.glob(self.snapshot_path + '*'), [])
+    
+    def test_salvar_por_processo_nao_sobrescreve_o_principal(self):
+        self._gravar('u1')
+        chatbot = self._novo_chatbot()
+        chatbot.processar_mensagem('u2', 'oi')
+        snapshot = SnapshotSessoes(self.snapshot_path, chatbot)
+        
+        snapshot.salvar(por_processo=True)
+        
+        self.assertTrue(os.path.exists(snapshot.arquivo_do_processo()))
+        self.assertEqual(SnapshotSessoes(self.snapshot_path, self._novo_chatbot()).restaurar(), 2)
+
+
+
+class TestExpiracaoConversas(SessoesTestCase):
+    """Remoção de conversas abandonadas do banco e do cache"""
+    
+    def _ultima_atividade(self, user_id: str) -> str:
+        conn = self.db_manager.get_connection()
+        valor = conn.execute('SELECT ultima_atividade FROM estados_conversa WHERE user_id = ?', (user_id,)).fetchone()[0]
+        conn.close()
+        return valor
+    
+    def _contar(self, tabela: str) -> int:
+        conn = self.db_manager.get_connection()
+        total = conn.execute(f'SELECT COUNT(*) FROM {tabela}').fetchone()[0]
+        conn.close()
+        return total
+    
+    def test_salvar_estado_atualiza_ultima_atividade(self):
+        self.conversa_repo.salvar_estado(Conversa('u1'))
+        self._envelhecer('u1', 48)
+        antiga = self._ultima_atividade('u1')
+        
+        self.conversa_repo.salvar_estado(Conversa('u1', EstadoConversa.AGUARDANDO_NOME))
+        
+        self.assertGreater(self._ultima_atividade('u1'), antiga)
+    
+    def test_varredura_remove_ociosas_em_lotes(self):
+        chatbot = self._novo_chatbot()
+        for indice in range(5):
+            chatbot.processar_mensagem(f'velho{indice}', 'oi')
+            self._envelhecer(f'velho{indice}', 48)
+        chatbot.processar_mensagem('ativo', 'oi')
+        
+        removidos = ExpiradorConversas(self.conversa_repo, chatbot, ttl_horas=24, lote=2).varrer()
+        
+        self.assertEqual(removidos, 5)
+        self.assertEqual(self._contar('estados_conversa'), 1)
+        self.assertEqual(set(chatbot._conversas_ativas), {'ativo'})
+        self.assertEqual(self._contar('estados_conversa_expirados'), 0)
+    
+    def test_arquivar_copia_antes_de_remover(self):
+        self.conversa_repo.salvar_estado(Conversa('u1', EstadoConversa.AGUARDANDO_DATA, {'nome': 'Ana'}))
+        self._envelhecer('u1', 48)
+        
+        ExpiradorConversas(self.conversa_repo, self._novo_chatbot(), ttl_horas=24, arquivar=True).varrer()
+        
+        conn = self.db_manager.get_connection()
+        arquivada = conn.execute('SELECT user_id, estado, dados_coletados FROM estados_conversa_expirados').fetchall()
+        conn.close()
+        self.assertEqual(arquivada, [('u1', 'aguardando_data', '{"nome": "Ana"}')])
+        self.assertEqual(self._contar('estados_conversa'), 0)
+    
+    def test_cache_expira_por_ultimo_acesso(self):
+        chatbot = self._novo_chatbot()
+        chatbot.processar_mensagem('u1', 'oi')
+        chatbot.processar_mensagem('u2', 'oi')
+        chatbot._ultimo_acesso['u1'] -= 3600
+        
+        self.assertEqual(chatbot.expirar_sessoes(1800), 1)
+        self.assertEqual(set(chatbot._conversas_ativas), {'u2'})
+
+
+
+class TestStatusEmLote(SessoesTestCase):
+    """Status de vários usuários: cache primeiro, banco para as faltantes"""
+    
+    def test_combina_cache_banco_e_desconhecidos(self):
+        self.conversa_repo.salvar_estado(Conversa('banco', EstadoConversa.AGUARDANDO_PERIODO, {'nome': 'Bia'}))
+        chatbot = self._novo_chatbot()
+        chatbot.processar_mensagem('cache', 'iniciar')
+        
+        status = chatbot.obter_status_conversas(['cache', 'banco', 'novo', 'cache'])
+        
+        self.assertEqual([item['user_id'] for item in status], ['cache', 'banco', 'novo'])
+        self.assertEqual([item['estado'] for item in status], ['aguardando_nome', 'aguardando_periodo', 'inicial'])
+        self.assertEqual(status[1]['dados'], {'nome': 'Bia'})
+        self.assertEqual(set(chatbot._conversas_ativas), {'cache'})
+    
+    def test_cache_dispensa_o_banco(self):
+        chatbot = self._novo_chatbot()
+        chatbot.processar_mensagem('u1', 'iniciar')
+        self.conversa_repo.carregar_estados = None  # qualquer consulta falharia
+        
+        self.assertEqual(chatbot.obter_status_conversas(['u1'])[0]['estado'], 'aguardando_nome')
+    
+    def test_endpoint_recusa_corpo_invalido(self):
+        os.environ['DATABASE_PATH'] = self.db_path
+        self.addCleanup(os.environ.pop, 'DATABASE_PATH')
+        cliente = create_app().test_client()
+        
+        for corpo in ({}, {'user_ids': 'u1'}, {'user_ids': [1]}, ['u1']):
+            self.assertEqual(cliente.post('/conversa/status/lote', json=corpo).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# tests/test_whatsapp_service.py
+"""
+Testes do envio pelo WhatsAppService contra o servidor Twilio falso local
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from fake_twilio import ConfiguracaoFalhas, ServidorTwilioFalso  # noqa: E402
+from src.services.whatsapp_service import WhatsAppService, redirecionar_url  # noqa: E402
+
+CREDENCIAIS = {'TWILIO_ACCOUNT_SID': 'ACteste', 'TWILIO_AUTH_TOKEN': 'token', 'TWILIO_PHONE_NUMBER': '+14155238886'}
+
+
+class TestWhatsAppServiceFalso(unittest.TestCase):
+    """Envio, retentativas e falhas definitivas"""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.servidor = ServidorTwilioFalso(('127.0.0.1', 0))
+        cls.servidor.iniciar_em_thread()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+    
+    def setUp(self):
+        self.servidor.configuracao = ConfiguracaoFalhas()
+        self.servidor.estatisticas.clear()
+        self.ambiente = patch.dict(os.environ, CREDENCIAIS)
+        self.ambiente.start()
+        self.servico = WhatsAppService(base_url=self.servidor.url, max_tentativas=3, espera_base=0.001)
+    
+    def tearDown(self):
+        self.ambiente.stop()
+    
+    def test_envia_para_o_servidor_configurado(self):
+        sid = self.servico.enviar_mensagem('+5511999999999', 'Olá!')
+        
+        self.assertTrue(sid.startswith('SM'))
+        mensagem = self.servidor.mensagens[-1]
+        self.assertEqual(mensagem['to'], 'whatsapp:+5511999999999')
+        self.assertEqual(mensagem['from'], 'whatsapp:+14155238886')
+    
+    def test_repete_apos_429(self):
+        self.servidor.configuracao.taxa_429 = 1.0
+        self.servidor.configuracao.retry_after = 0
+        
+        self.assertIsNone(self.servico.enviar_mensagem('+5511999999999', 'Olá!'))
+        self.assertEqual(self.servidor.estatisticas['429'], 3)
+    
+    def test_espera_o_retry_after_do_429(self):
+        self.servidor.configuracao.taxa_429 = 1.0
+        self.servidor.configuracao.retry_after = 2
+        
+        with patch('src.services.whatsapp_service.time.sleep') as dormir:
+            self.servico.enviar_mensagem('+5511999999999', 'Olá!')
+        
+        self.assertEqual([chamada.args[0] for chamada in dormir.call_args_list], [2.0, 2.0])
+    
+    def test_500_depois_de_aceitar_nao_duplica(self):
+        self.servidor.configuracao.taxa_erros_apos_aceitar = 1.0
+        self.servidor.mensagens.clear()
+        
+        self.assertIsNone(self.servico.enviar_mensagem('+5511999999999', 'Olá!'))
+        self.assertEqual(len(self.servidor.mensagens), 1)
+        self.assertEqual(self.servidor.estatisticas['500_apos_aceitar'], 1)
+    
+    def test_repete_falha_ao_conectar(self):
+        servico = WhatsAppService(base_url='http://127.0.0.1:1', max_tentativas=3, espera_base=0.001)
+        
+        with patch.object(servico, '_espera', return_value=0) as esperas:
+            self.assertIsNone(servico.enviar_mensagem('+5511999999999', 'Olá!'))
+        
+        self.assertEqual(esperas.call_count, 2)
+    
+    def test_erro_definitivo_nao_repete(self):
+        self.assertIsNone(self.servico.enviar_mensagem('+5511999999999', ''))
+        self.assertEqual(self.servidor.estatisticas['400'], 1)
+    
+    def test_redirecionar_url_preserva_caminho(self):
+        url = 'https://api.twilio.com/2010-04-01/Accounts/AC1/Messages.json'
+        
+        self.assertEqual(redirecionar_url(url, 'http://127.0.0.1:5090/'),
+                         'http://127.0.0.1:5090/2010-04-01/Accounts/AC1/Messages.json')
+        self.assertEqual(redirecionar_url(url, None), url)
+
+
+if __name__ == '__main__':
+    unittest.main()
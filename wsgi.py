@@ -0,0 +1,12 @@
+# wsgi.py
+"""
+Ponto de entrada WSGI para produção
+
+Uso:
+    gunicorn wsgi:app            # lê gunicorn.conf.py do diretório atual
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from app import create_app
+
+app = create_app()